@@ -3,24 +3,62 @@ FastAPI Web API for Post Generator
 Provides REST API endpoints for remote post generation
 """
 
-from fastapi import FastAPI, HTTPException, File, UploadFile, Form
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import APIRouter, FastAPI, HTTPException, File, UploadFile, Form, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional, List
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, List
+import asyncio
+import base64
+import json
 import os
-import uuid
-import tempfile
-from post_generator import PostGenerator
+import time
 from post_generator.color_schemes import ColorSchemes
-from post_generator.template_loader import TemplateLoader
-from news_fetcher import NewsFetcher
+from post_generator.template_loader import get_template_registry
+from news_fetcher import GOOGLE_NEWS_HOST, NewsFetcher, get_pooled_fetcher, select_articles
+from starlette.concurrency import run_in_threadpool
+from render_cache import etag_matches, get_render_cache, render_key
+from single_flight import SingleFlight
+from news_cache import get_news_cache
+from host_limiter import get_host_limiter
+from story_index import StoryIndex
+from subscriptions import get_seen_store
+from google_news_decoder import decode_google_news_urls
+from article_extractor import get_article_extractor
+from image_cache import get_image_cache
+from jobs import JobQueueFull, get_job_manager
+from designs import CompiledDesign, get_design_registry
+from warmup import get_warmup
+from render_service import (
+    LEAD_IMAGE_MODES, get_artifact_store, get_batch_pool, get_render_pool,
+    render_post_timed, render_post_to_bytes,
+    shutdown_pools, stream_zip
+)
+
+
+# "full" serves posts and news; "render" serves posts only and never loads
+# the news stack (for render-only workers)
+API_MODE = os.getenv("API_MODE", "full")
+NEWS_ENABLED = API_MODE != "render"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start-up and shutdown hooks"""
+    await get_job_manager().start()
+    get_warmup().start(news=NEWS_ENABLED)
+    yield
+    await get_warmup().stop()
+    await get_job_manager().stop()
+    shutdown_pools()
 
 
 app = FastAPI(
     title="Post Generator API",
     description="Generate branded social media posts via REST API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Enable CORS
@@ -86,6 +124,101 @@ class PostRequest(BaseModel):
     textbox_text_color: str = "#FFFFFF"
     textbox_font_size: int = 35
     textbox_padding: int = 25
+    draft: bool = False  # Low-resolution preview render
+
+
+def request_to_spec(request: BaseModel) -> dict:
+    """Convert a request model to a plain dict that can be sent to a render worker"""
+    if hasattr(request, "model_dump"):
+        return request.model_dump()
+    return request.dict()
+
+
+def png_response(png: bytes, filename: str = "post.png") -> Response:
+    """Return in-memory PNG bytes as a downloadable image response"""
+    return Response(
+        content=png,
+        media_type="image/png",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+_render_flight = SingleFlight()
+
+
+async def _render_through_cache(key: str, render: Callable[[], Awaitable[bytes]]) -> tuple:
+    """Serve a render from the disk tier or render and store it"""
+    cache = get_render_cache()
+    png = await run_in_threadpool(cache.get, key)
+    if png is not None:
+        return png, "hit"
+    
+    png = await render()
+    await run_in_threadpool(cache.put, key, png)
+    return png, "miss"
+
+
+def post_render_key(spec: dict, **render_kwargs) -> str:
+    """
+    Cache key (and ETag) of a render: the canonical hash of the spec plus
+    any uploaded assets and extra render options
+    """
+    assets = {name: value for name, value in render_kwargs.items() if isinstance(value, bytes)}
+    options = {
+        name: value for name, value in render_kwargs.items()
+        if name not in assets and value is not None
+    }
+    key_spec = dict(spec, **options)
+    if spec.get("template"):
+        # Editing a template file must invalidate its cached renders
+        key_spec["template_mtime"] = get_template_registry().mtime(spec["template"])
+    return render_key(key_spec, assets)
+
+
+async def render_cached(key: str, render: Callable[[], Awaitable[bytes]]) -> tuple:
+    """
+    Get a render from the cache, or render it once for all concurrent callers
+    
+    Returns:
+        (png, status) where status is "hit" or "miss"
+    """
+    png = get_render_cache().get_memory(key)
+    if png is not None:
+        return png, "hit"
+    # Identical concurrent requests share one cache lookup and render
+    return await _render_flight.do(key, lambda: _render_through_cache(key, render))
+
+
+async def render_png_response(http_request: Request, spec: dict,
+                              render: Optional[Callable[[], Awaitable[bytes]]] = None,
+                              **render_kwargs) -> Response:
+    """
+    Render a post through the content-addressed cache
+    
+    The ETag is the canonical hash of the spec plus any uploaded assets, so
+    a matching If-None-Match is answered with 304 without rendering, and a
+    repeat request is served from the cache.
+    
+    Args:
+        http_request: Incoming request (for If-None-Match)
+        spec: Full render spec
+        render: Coroutine factory producing the PNG on a cache miss
+            (defaults to a full render on the render pool)
+        **render_kwargs: Uploaded assets (bytes) and extra render options
+    """
+    key = post_render_key(spec, **render_kwargs)
+    if render is None:
+        render = lambda: get_render_pool().run(render_post_to_bytes, spec, **render_kwargs)
+    etag = f'"{key}"'
+    headers = {"ETag": etag}
+    if etag_matches(http_request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    
+    png, headers["X-Render-Cache"] = await render_cached(key, render)
+    
+    response = png_response(png)
+    response.headers.update(headers)
+    return response
 
 
 class TemplateInfo(BaseModel):
@@ -107,12 +240,16 @@ async def root():
             "generate_json": "POST /generate/json - Generate with JSON only (for n8n/webhooks)",
             "generate_advanced": "POST /generate/advanced - Generate with all options",
             "generate_batch": "POST /generate/batch - Generate multiple posts",
+            "generate_batch_stream": "POST /generate/batch/stream - Stream batch results as NDJSON or SSE",
+            "designs": "POST /designs - Register a design; POST /designs/{id}/render renders text onto it",
+            "jobs": "POST /jobs - Queue a render job; GET /jobs/{id} for progress, DELETE to cancel",
             "templates": "GET /templates - List all templates",
             "template_detail": "GET /templates/{name} - Get template details",
             "color_schemes": "GET /color-schemes - List color schemes",
             "color_scheme_detail": "GET /color-schemes/{name} - Get color scheme details",
             "dimensions": "GET /dimensions - List available dimensions",
-            "health": "GET /health - Health check"
+            "health": "GET /health - Readiness check (503 while warming up)",
+            "liveness": "GET /health/live - Liveness check"
         },
         "docs": "/docs - Interactive API documentation"
     }
@@ -134,17 +271,29 @@ async def list_dimensions():
 
 @app.get("/health")
 async def health():
-    """Health check endpoint"""
-    return {"status": "healthy"}
+    """
+    Readiness check endpoint
+    
+    Returns 503 until the startup warmup has finished, so load balancers
+    only route traffic to warm workers.
+    """
+    warmup = get_warmup()
+    if not warmup.ready:
+        return JSONResponse(status_code=503, content={"status": "warming_up", "warmup": warmup.to_dict()})
+    return {"status": "healthy", "warmup": warmup.to_dict()}
+
+
+@app.get("/health/live")
+async def liveness():
+    """Liveness check endpoint (healthy as soon as the process serves requests)"""
+    return {"status": "alive"}
 
 
 @app.get("/templates", response_model=List[str])
 async def list_templates():
     """List all available templates"""
     try:
-        loader = TemplateLoader()
-        templates = loader.list_templates()
-        return templates
+        return get_template_registry().names()
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -153,8 +302,7 @@ async def list_templates():
 async def get_template(template_name: str):
     """Get template details"""
     try:
-        loader = TemplateLoader()
-        template = loader.load_template(template_name)
+        template = get_template_registry().get(template_name)
         return template.to_dict()
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Template '{template_name}' not found")
@@ -193,6 +341,7 @@ async def get_color_scheme(scheme_name: str):
 
 @app.post("/generate/form")
 async def generate_post_form(
+    http_request: Request,
     text: str = Form(...),
     subtext: Optional[str] = Form(None),
     dimension: str = Form("square"),
@@ -247,145 +396,32 @@ async def generate_post_form(
     additional_image: Optional[UploadFile] = File(None),
     additional_image_position: str = Form("center"),
     additional_image_size: Optional[int] = Form(None),
-    additional_image_opacity: int = Form(255)
+    additional_image_opacity: int = Form(255),
+    draft: bool = Form(False)
 ):
     """
     Generate post from form-data (for n8n with file uploads)
     """
+    form_values = locals()
     try:
-        generator = PostGenerator()
-        output_dir = tempfile.gettempdir()
-        output_path = os.path.join(output_dir, f"post_{uuid.uuid4()}.png")
-        logo_path = None
-        additional_image_path = None
-        
-        # Save uploaded logo
-        if logo:
-            logo_path = os.path.join(output_dir, f"logo_{uuid.uuid4()}{os.path.splitext(logo.filename)[1]}")
-            with open(logo_path, "wb") as f:
-                f.write(await logo.read())
-        
-        # Save uploaded additional image
-        if additional_image:
-            additional_image_path = os.path.join(output_dir, f"image_{uuid.uuid4()}{os.path.splitext(additional_image.filename)[1]}")
-            with open(additional_image_path, "wb") as f:
-                f.write(await additional_image.read())
-        
-        # Canvas
-        canvas_size = dimension
-        if dimension == "custom" and custom_width and custom_height:
-            canvas_size = (custom_width, custom_height)
-        
-        # Background
-        bg_rgb = (0, 0, 0)
-        if color_scheme:
-            scheme = ColorSchemes.get_scheme(color_scheme)
-            bg_rgb = scheme.get_background_rgb()
-        elif bg_color:
-            bg_rgb = hex_to_rgb(bg_color)
-        
-        generator.create_canvas(canvas_size, bg_rgb)
-        
-        # Gradient
-        if gradient_start and gradient_end:
-            start = hex_to_rgb(gradient_start)
-            end = hex_to_rgb(gradient_end)
-            generator.apply_gradient(start, end, gradient_direction)
-        
-        # Patterns
-        if pattern == 'lines':
-            pattern_rgb = hex_to_rgb(pattern_color) if pattern_color else (255, 255, 255)
-            generator.add_pattern_lines(
-                color=pattern_rgb,
-                spacing=pattern_spacing,
-                angle=pattern_angle,
-                width=pattern_width,
-                opacity=pattern_opacity
-            )
-        
-        # Shapes
-        if shape_type:
-            shape_rgb = hex_to_rgb(shape_color) if shape_color else (255, 255, 255)
-            generator.add_geometric_shapes(
-                shape_type,
-                color=shape_rgb,
-                opacity=shape_opacity,
-                count=shape_count
-            )
-        
-        # Effects
-        if add_vignette:
-            generator.add_vignette(vignette_intensity)
-        if add_noise:
-            generator.add_noise(noise_intensity)
-        if add_blur:
-            generator.add_blur(blur_radius)
-        
-        # Logo
-        if logo_path:
-            generator.add_logo(logo_path, position=logo_position, size=(logo_size, logo_size))
-        
-        # Additional Image
-        if additional_image_path:
-            img_size = (additional_image_size, additional_image_size) if additional_image_size else None
-            generator.add_image(
-                additional_image_path,
-                position=additional_image_position,
-                size=img_size,
-                opacity=additional_image_opacity
-            )
-        
-        # Main text
-        text_rgb = hex_to_rgb(text_color)
-        generator.add_text(
-            text,
-            position=(text_x, text_y),
-            font_size=font_size,
-            color=text_rgb,
-            max_width=text_max_width,
-            shadow=text_shadow,
-            outline=text_outline
-        )
-        
-        # Subtext
-        if subtext:
-            subtext_rgb = hex_to_rgb(subtext_color) if subtext_color else text_rgb
-            generator.add_text(
-                subtext,
-                position=(subtext_x, subtext_y),
-                font_size=subtext_font_size,
-                color=subtext_rgb,
-                max_width=text_max_width
-            )
-        
-        # Text box
-        if add_textbox and textbox_content:
-            tb_bg = hex_to_rgb(textbox_bg_color) + (textbox_bg_opacity,)
-            tb_text = hex_to_rgb(textbox_text_color)
-            generator.add_text_box(
-                textbox_content,
-                box_position=(textbox_x, textbox_y),
-                box_size=(textbox_width, textbox_height),
-                bg_color=tb_bg,
-                text_color=tb_text,
-                font_size=textbox_font_size,
-                padding=textbox_padding
-            )
-        
-        # Save
-        generator.save(output_path)
+        request = PostRequest(**{
+            name: value for name, value in form_values.items()
+            if name in PostRequest.__annotations__
+        })
         
-        # Cleanup
-        if logo_path and os.path.exists(logo_path):
-            os.remove(logo_path)
-        if additional_image_path and os.path.exists(additional_image_path):
-            os.remove(additional_image_path)
+        # Uploads are decoded straight from memory
+        logo_bytes = await logo.read() if logo else None
+        additional_image_bytes = await additional_image.read() if additional_image else None
         
-        return FileResponse(
-            output_path,
-            media_type="image/png",
-            filename="post.png",
-            background=None
+        # Render off the event loop (or serve from the render cache)
+        return await render_png_response(
+            http_request,
+            request_to_spec(request),
+            logo=logo_bytes,
+            additional_image=additional_image_bytes,
+            additional_image_position=additional_image_position,
+            additional_image_size=additional_image_size,
+            additional_image_opacity=additional_image_opacity
         )
     
     except Exception as e:
@@ -395,6 +431,7 @@ async def generate_post_form(
 @app.post("/generate")
 async def generate_post(
     request: PostRequest,
+    http_request: Request,
     logo: Optional[UploadFile] = File(None)
 ):
     """
@@ -403,187 +440,17 @@ async def generate_post(
     Returns the generated image file
     """
     try:
-        generator = PostGenerator()
-        output_dir = tempfile.gettempdir()
-        output_path = os.path.join(output_dir, f"post_{uuid.uuid4()}.png")
-        logo_path = None
-        
-        # Save uploaded logo if provided
-        if logo:
-            logo_path = os.path.join(output_dir, f"logo_{uuid.uuid4()}{os.path.splitext(logo.filename)[1]}")
-            with open(logo_path, "wb") as f:
-                f.write(await logo.read())
-        
-        # Generate using template
-        if request.template:
-            loader = TemplateLoader()
-            template = loader.load_template(request.template)
-            color_scheme = ColorSchemes.get_scheme(template.color_scheme)
-            
-            generator.create_canvas(template.dimension, color_scheme.get_background_rgb())
-            
-            if template.background_type == "gradient":
-                generator.apply_gradient(
-                    color_scheme.get_primary_rgb(),
-                    color_scheme.get_secondary_rgb(),
-                    template.gradient_direction
-                )
-            
-            if template.pattern_type:
-                if template.pattern_type == "lines":
-                    generator.add_pattern_lines(
-                        color_scheme.get_accent_rgb(),
-                        spacing=template.pattern_spacing,
-                        angle=template.pattern_angle
-                    )
-                else:
-                    generator.add_geometric_shapes(
-                        template.pattern_type,
-                        color_scheme.get_accent_rgb()
-                    )
-            
-            if template.add_vignette:
-                generator.add_vignette(template.vignette_intensity)
-            if template.add_noise:
-                generator.add_noise(template.noise_intensity)
-            
-            if logo_path:
-                generator.add_logo(logo_path, position=template.logo_position, 
-                                 size=template.logo_size, margin=template.logo_margin)
-            
-            generator.add_text(
-                request.text,
-                position=tuple(template.headline_position),
-                font_size=template.headline_size,
-                color=color_scheme.get_text_rgb(),
-                max_width=template.headline_max_width,
-                shadow=template.headline_shadow,
-                outline=template.headline_outline
-            )
-            
-            if request.subtext and template.has_subheadline:
-                generator.add_text(
-                    request.subtext,
-                    position=tuple(template.subheadline_position),
-                    font_path=template.subheadline_font,
-                    font_size=template.subheadline_size,
-                    color=color_scheme.get_text_rgb(),
-                    max_width=template.subheadline_max_width
-                )
-        
-        else:
-            # Custom generation
-            bg_color = (0, 0, 0)
-            if request.color_scheme:
-                scheme = ColorSchemes.get_scheme(request.color_scheme)
-                bg_color = scheme.get_background_rgb()
-            elif request.bg_color:
-                bg_color = hex_to_rgb(request.bg_color)
-            
-            # Handle custom dimensions
-            canvas_size = request.dimension
-            if request.dimension == "custom" and request.custom_width and request.custom_height:
-                canvas_size = (request.custom_width, request.custom_height)
-            
-            generator.create_canvas(canvas_size, bg_color)
-            
-            # Gradient
-            if request.gradient_start and request.gradient_end:
-                start = hex_to_rgb(request.gradient_start)
-                end = hex_to_rgb(request.gradient_end)
-                generator.apply_gradient(start, end, request.gradient_direction)
-            
-            # Patterns
-            if request.pattern == 'lines':
-                pattern_color = hex_to_rgb(request.pattern_color) if request.pattern_color else (255, 255, 255)
-                generator.add_pattern_lines(
-                    color=pattern_color,
-                    spacing=request.pattern_spacing,
-                    angle=request.pattern_angle,
-                    width=request.pattern_width,
-                    opacity=request.pattern_opacity
-                )
-            
-            # Geometric shapes
-            if request.shape_type:
-                shape_color = hex_to_rgb(request.shape_color) if request.shape_color else (255, 255, 255)
-                generator.add_geometric_shapes(
-                    request.shape_type,
-                    color=shape_color,
-                    opacity=request.shape_opacity,
-                    count=request.shape_count
-                )
-            
-            # Effects
-            # Effects
-            if request.add_vignette:
-                generator.add_vignette(request.vignette_intensity)
-            if request.add_noise:
-                generator.add_noise(request.noise_intensity)
-            if request.add_blur:
-                generator.add_blur(request.blur_radius)
-            
-            # Logo
-            if logo_path:
-                generator.add_logo(logo_path, position=request.logo_position, size=(request.logo_size, request.logo_size))
-            
-            # Main text
-            text_color = hex_to_rgb(request.text_color)
-            generator.add_text(
-                request.text,
-                position=(request.text_x, request.text_y),
-                font_size=request.font_size,
-                color=text_color,
-                max_width=request.text_max_width,
-                shadow=request.text_shadow,
-                outline=request.text_outline
-            )
-            
-            # Subtext
-            if request.subtext:
-                subtext_color = hex_to_rgb(request.subtext_color) if request.subtext_color else text_color
-                generator.add_text(
-                    request.subtext,
-                    position=(request.subtext_x, request.subtext_y),
-                    font_size=request.subtext_font_size,
-                    color=subtext_color,
-                    max_width=request.text_max_width
-                )
-            
-            # Text box
-            if request.add_textbox and request.textbox_content:
-                tb_bg = hex_to_rgb(request.textbox_bg_color) + (request.textbox_bg_opacity,)
-                tb_text = hex_to_rgb(request.textbox_text_color)
-                generator.add_text_box(
-                    request.textbox_content,
-                    box_position=(request.textbox_x, request.textbox_y),
-                    box_size=(request.textbox_width, request.textbox_height),
-                    bg_color=tb_bg,
-                    text_color=tb_text,
-                    font_size=request.textbox_font_size,
-                    padding=request.textbox_padding
-                )
-        
-        # Save and return
-        generator.save(output_path)
+        logo_bytes = await logo.read() if logo else None
         
-        # Clean up logo if it was uploaded
-        if logo_path and os.path.exists(logo_path):
-            os.remove(logo_path)
-        
-        return FileResponse(
-            output_path,
-            media_type="image/png",
-            filename="post.png",
-            background=None
-        )
+        # Render (template or custom) off the event loop
+        return await render_png_response(http_request, request_to_spec(request), logo=logo_bytes)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.post("/generate/json")
-async def generate_post_json(request: PostRequest):
+async def generate_post_json(request: PostRequest, http_request: Request):
     """
     Generate a post image from JSON (no file upload support)
     Perfect for n8n and webhook integrations
@@ -591,106 +458,7 @@ async def generate_post_json(request: PostRequest):
     Returns the generated image file
     """
     try:
-        generator = PostGenerator()
-        output_dir = tempfile.gettempdir()
-        output_path = os.path.join(output_dir, f"post_{uuid.uuid4()}.png")
-        
-        # Determine canvas size
-        canvas_size = request.dimension
-        if request.dimension == "custom" and request.custom_width and request.custom_height:
-            canvas_size = (request.custom_width, request.custom_height)
-        
-        # Background color
-        bg_color = (0, 0, 0)
-        if request.color_scheme:
-            scheme = ColorSchemes.get_scheme(request.color_scheme)
-            bg_color = scheme.get_background_rgb()
-        elif request.bg_color:
-            bg_color = hex_to_rgb(request.bg_color)
-        
-        generator.create_canvas(canvas_size, bg_color)
-        
-        # Gradient
-        if request.gradient_start and request.gradient_end:
-            start = hex_to_rgb(request.gradient_start)
-            end = hex_to_rgb(request.gradient_end)
-            generator.apply_gradient(start, end, request.gradient_direction)
-        
-        # Patterns
-        if request.pattern == 'lines':
-            pattern_color = hex_to_rgb(request.pattern_color) if request.pattern_color else (255, 255, 255)
-            generator.add_pattern_lines(
-                color=pattern_color,
-                spacing=request.pattern_spacing,
-                angle=request.pattern_angle,
-                width=request.pattern_width,
-                opacity=request.pattern_opacity
-            )
-        
-        # Geometric shapes
-        if request.shape_type:
-            shape_color = hex_to_rgb(request.shape_color) if request.shape_color else (255, 255, 255)
-            generator.add_geometric_shapes(
-                request.shape_type,
-                color=shape_color,
-                opacity=request.shape_opacity,
-                count=request.shape_count
-            )
-        
-        # Effects
-        if request.add_vignette:
-            generator.add_vignette(request.vignette_intensity)
-        if request.add_noise:
-            generator.add_noise(request.noise_intensity)
-        if request.add_blur:
-            generator.add_blur(request.blur_radius)
-        
-        # Main text
-        text_color = hex_to_rgb(request.text_color)
-        generator.add_text(
-            request.text,
-            position=(request.text_x, request.text_y),
-            font_size=request.font_size,
-            color=text_color,
-            max_width=request.text_max_width,
-            shadow=request.text_shadow,
-            outline=request.text_outline
-        )
-        
-        # Subtext
-        if request.subtext:
-            subtext_color = hex_to_rgb(request.subtext_color) if request.subtext_color else text_color
-            generator.add_text(
-                request.subtext,
-                position=(request.subtext_x, request.subtext_y),
-                font_size=request.subtext_font_size,
-                color=subtext_color,
-                max_width=request.text_max_width
-            )
-        
-        # Text box
-        if request.add_textbox and request.textbox_content:
-            tb_bg = hex_to_rgb(request.textbox_bg_color) + (request.textbox_bg_opacity,)
-            tb_text = hex_to_rgb(request.textbox_text_color)
-            generator.add_text_box(
-                request.textbox_content,
-                box_position=(request.textbox_x, request.textbox_y),
-                box_size=(request.textbox_width, request.textbox_height),
-                bg_color=tb_bg,
-                text_color=tb_text,
-                font_size=request.textbox_font_size,
-                padding=request.textbox_padding
-            )
-        
-        # Save
-        generator.save(output_path)
-        
-        return FileResponse(
-            output_path,
-            media_type="image/png",
-            filename="post.png",
-            background=None
-        )
+        return await render_png_response(http_request, request_to_spec(request))
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -701,47 +469,119 @@ async def generate_batch(posts: List[PostRequest]):
     """
     Generate multiple posts in batch
     
-    Returns a list of generated image URLs
+    Items render in parallel on the batch pool. Results keep request order;
+    a failing item is reported with its error instead of failing the batch.
+    
+    Returns one result per post; successful posts carry an artifact id and
+    a URL to download the PNG from GET /artifacts/{artifact_id}
     """
     try:
-        results = []
+        # Batch posts have no logo upload support
+        jobs = [(request_to_spec(request),) for request in posts]
+        outcomes = await get_batch_pool().map(render_post_to_bytes, jobs)
         
-        for i, request in enumerate(posts):
-            generator = PostGenerator()
-            output_dir = tempfile.gettempdir()
-            output_path = os.path.join(output_dir, f"post_batch_{i}_{uuid.uuid4()}.png")
-            
-            # Simple generation for batch (without logo upload support)
-            bg_color = (0, 0, 0)
-            if request.color_scheme:
-                scheme = ColorSchemes.get_scheme(request.color_scheme)
-                bg_color = scheme.get_background_rgb()
-            
-            generator.create_canvas(request.dimension, bg_color)
-            
-            if request.gradient_start and request.gradient_end:
-                start = hex_to_rgb(request.gradient_start)
-                end = hex_to_rgb(request.gradient_end)
-                generator.apply_gradient(start, end, request.gradient_direction)
-            
-            text_color = hex_to_rgb(request.text_color)
-            generator.add_text(
-                request.text,
-                position=(40, 400),
-                font_size=request.font_size,
-                color=text_color,
-                max_width=900
-            )
-            
-            generator.save(output_path)
-            results.append({"index": i, "path": output_path})
+        store = get_artifact_store()
+        results = []
+        for i, (png, error) in enumerate(outcomes):
+            if error is None:
+                artifact_id = store.put(png)
+                results.append({
+                    "index": i,
+                    "status": "success",
+                    "artifact_id": artifact_id,
+                    "url": f"/artifacts/{artifact_id}"
+                })
+            else:
+                results.append({"index": i, "status": "error", "error": str(error)})
         
-        return JSONResponse(content={"generated": len(results), "files": results})
+        failed = sum(1 for _, error in outcomes if error is not None)
+        return JSONResponse(content={
+            "generated": len(results) - failed,
+            "failed": failed,
+            "files": results
+        })
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+STREAM_FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+# Seconds a stream waits for its next event before checking the client is still there
+STREAM_DISCONNECT_POLL = 1.0
+
+
+def encode_stream_event(format: str, event: str, payload: dict) -> str:
+    """Encode one streamed result as an NDJSON line or a server-sent event"""
+    if format == "sse":
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+    return json.dumps(payload) + "\n"
+
+
+@app.post("/generate/batch/stream")
+async def generate_batch_stream(
+    posts: List[PostRequest],
+    format: str = "ndjson",
+    inline: bool = True
+):
+    """
+    Generate multiple posts, streaming one result per post as it finishes
+    
+    Args:
+        posts: Post requests to render
+        format: "ndjson" (one JSON object per line) or "sse" (server-sent events)
+        inline: Embed the PNG as base64; otherwise return an artifact id
+            that can be downloaded from GET /artifacts/{artifact_id}
+    
+    Each result carries index, status and render_ms, plus image_base64 or
+    artifact_id/url on success and error on failure. Results arrive in
+    completion order; a final "done" event reports the totals.
+    
+    Example:
+        POST /generate/batch/stream?format=sse&inline=false
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    jobs = [(request_to_spec(request),) for request in posts]
+    store = get_artifact_store()
+    
+    def encode_event(event: str, payload: dict) -> str:
+        return encode_stream_event(format, event, payload)
+    
+    async def events():
+        generated = failed = 0
+        async for i, outcome, error in get_batch_pool().imap_unordered(render_post_timed, jobs):
+            if error is not None:
+                failed += 1
+                yield encode_event("result", {"index": i, "status": "error", "error": str(error)})
+                continue
+            
+            png, render_ms = outcome
+            result = {"index": i, "status": "success", "render_ms": round(render_ms, 1), "size": len(png)}
+            if inline:
+                result["image_base64"] = base64.b64encode(png).decode("ascii")
+            else:
+                artifact_id = store.put(png)
+                result["artifact_id"] = artifact_id
+                result["url"] = f"/artifacts/{artifact_id}"
+            generated += 1
+            yield encode_event("result", result)
+        
+        yield encode_event("done", {"status": "done", "generated": generated, "failed": failed})
+    
+    return StreamingResponse(events(), media_type=STREAM_FORMATS[format])
+
+
+@app.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str):
+    """Download a rendered image produced by a streaming batch"""
+    artifact = get_artifact_store().get(artifact_id)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail=f"Artifact '{artifact_id}' not found or expired")
+    data, media_type = artifact
+    return Response(content=data, media_type=media_type)
+
+
 class BatchTextRequest(BaseModel):
     """Request for batch generation with same design, different text"""
     texts: List[str]  # List of different text content
@@ -755,177 +595,259 @@ async def generate_batch_smart(batch: BatchTextRequest):
     Generate multiple posts with same design but different text
     Perfect for n8n: same logo, gradient, effects - just different text
     
-    Returns ZIP file with all images
+    Returns a ZIP file with all images, streamed entry by entry as each post
+    finishes rendering. Posts that fail are listed in errors.txt at the end.
     """
     try:
-        import zipfile
-        import io
-        from fastapi.responses import StreamingResponse
-        
-        output_dir = tempfile.gettempdir()
-        results = []
-        logo_path = None
+        logo_bytes = None
         
         # Download logo once if provided
         if batch.logo_url:
             import requests
-            logo_ext = batch.logo_url.split('.')[-1]
-            logo_path = os.path.join(output_dir, f"batch_logo_{uuid.uuid4()}.{logo_ext}")
-            response = requests.get(batch.logo_url)
-            with open(logo_path, 'wb') as f:
-                f.write(response.content)
-        
-        # Generate each post
-        for i, text in enumerate(batch.texts):
-            generator = PostGenerator()
-            output_path = os.path.join(output_dir, f"post_{i+1}.png")
-            
-            # Canvas
-            canvas_size = batch.design.dimension
-            if batch.design.dimension == "custom" and batch.design.custom_width and batch.design.custom_height:
-                canvas_size = (batch.design.custom_width, batch.design.custom_height)
-            
-            # Background
-            bg_color = (0, 0, 0)
-            if batch.design.color_scheme:
-                scheme = ColorSchemes.get_scheme(batch.design.color_scheme)
-                bg_color = scheme.get_background_rgb()
-            elif batch.design.bg_color:
-                bg_color = hex_to_rgb(batch.design.bg_color)
-            
-            generator.create_canvas(canvas_size, bg_color)
-            
-            # Gradient
-            if batch.design.gradient_start and batch.design.gradient_end:
-                start = hex_to_rgb(batch.design.gradient_start)
-                end = hex_to_rgb(batch.design.gradient_end)
-                generator.apply_gradient(start, end, batch.design.gradient_direction)
-            
-            # Patterns
-            if batch.design.pattern == 'lines':
-                pattern_color = hex_to_rgb(batch.design.pattern_color) if batch.design.pattern_color else (255, 255, 255)
-                generator.add_pattern_lines(
-                    color=pattern_color,
-                    spacing=batch.design.pattern_spacing,
-                    angle=batch.design.pattern_angle,
-                    width=batch.design.pattern_width,
-                    opacity=batch.design.pattern_opacity
-                )
-            
-            # Shapes
-            if batch.design.shape_type:
-                shape_color = hex_to_rgb(batch.design.shape_color) if batch.design.shape_color else (255, 255, 255)
-                generator.add_geometric_shapes(
-                    batch.design.shape_type,
-                    color=shape_color,
-                    opacity=batch.design.shape_opacity,
-                    count=batch.design.shape_count
-                )
-            
-            # Effects
-            if batch.design.add_vignette:
-                generator.add_vignette(batch.design.vignette_intensity)
-            if batch.design.add_noise:
-                generator.add_noise(batch.design.noise_intensity)
-            if batch.design.add_blur:
-                generator.add_blur(batch.design.blur_radius)
-            
-            # Logo (same for all)
-            if logo_path:
-                generator.add_logo(logo_path, position=batch.design.logo_position, 
-                                 size=(batch.design.logo_size, batch.design.logo_size))
-            
-            # Text (different for each)
-            text_color = hex_to_rgb(batch.design.text_color)
-            generator.add_text(
-                text,
-                position=(batch.design.text_x, batch.design.text_y),
-                font_size=batch.design.font_size,
-                color=text_color,
-                max_width=batch.design.text_max_width,
-                shadow=batch.design.text_shadow,
-                outline=batch.design.text_outline
-            )
-            
-            # Subtext (if design has it)
-            if batch.design.subtext:
-                subtext_color = hex_to_rgb(batch.design.subtext_color) if batch.design.subtext_color else text_color
-                generator.add_text(
-                    batch.design.subtext,
-                    position=(batch.design.subtext_x, batch.design.subtext_y),
-                    font_size=batch.design.subtext_font_size,
-                    color=subtext_color,
-                    max_width=batch.design.text_max_width
-                )
-            
-            # Text box (if design has it)
-            if batch.design.add_textbox and batch.design.textbox_content:
-                tb_bg = hex_to_rgb(batch.design.textbox_bg_color) + (batch.design.textbox_bg_opacity,)
-                tb_text = hex_to_rgb(batch.design.textbox_text_color)
-                generator.add_text_box(
-                    batch.design.textbox_content,
-                    box_position=(batch.design.textbox_x, batch.design.textbox_y),
-                    box_size=(batch.design.textbox_width, batch.design.textbox_height),
-                    bg_color=tb_bg,
-                    text_color=tb_text,
-                    font_size=batch.design.textbox_font_size,
-                    padding=batch.design.textbox_padding
-                )
-            
-            generator.save(output_path)
-            results.append(output_path)
-        
-        # Cleanup logo
-        if logo_path and os.path.exists(logo_path):
-            os.remove(logo_path)
-        
-        # Create ZIP file
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for i, file_path in enumerate(results):
-                zip_file.write(file_path, f"post_{i+1}.png")
-                os.remove(file_path)  # Clean up
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, requests.get, batch.logo_url)
+            response.raise_for_status()
+            logo_bytes = response.content
         
-        zip_buffer.seek(0)
-        
-        return StreamingResponse(
-            zip_buffer,
-            media_type="application/zip",
-            headers={"Content-Disposition": f"attachment; filename=posts_batch_{len(batch.texts)}.zip"}
+        # Same design (and logo) for every post, different text
+        design = request_to_spec(batch.design)
+        jobs = [(dict(design, text=text), logo_bytes) for text in batch.texts]
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    async def zip_entries():
+        errors = []
+        async for i, png, error in get_batch_pool().imap_unordered(render_post_to_bytes, jobs):
+            if error is not None:
+                errors.append((i, str(error)))
+                continue
+            yield f"post_{i+1}.png", png
+        if errors:
+            lines = [f"post_{i+1}.png: {message}" for i, message in sorted(errors)]
+            yield "errors.txt", ("\n".join(lines) + "\n").encode()
+    
+    return StreamingResponse(
+        stream_zip(zip_entries()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=posts_batch_{len(batch.texts)}.zip"}
+    )
+
+
+# ============================================================================
+# REGISTERED DESIGNS
+# ============================================================================
+
+class DesignRequest(PostRequest):
+    """A design to register: any post settings, text fields are ignored"""
+    text: str = ""
+    logo_url: Optional[str] = None  # Optional logo URL to download once
+
+
+class DesignRenderRequest(BaseModel):
+    """Text for one post rendered with a registered design"""
+    text: str
+    subtext: Optional[str] = None
+    textbox_content: Optional[str] = None
+    draft: bool = False
+
+
+async def compile_design(request: DesignRequest) -> CompiledDesign:
+    """Download the design's logo (if any), then register and compile it"""
+    logo_bytes = None
+    if request.logo_url:
+        import requests
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(None, requests.get, request.logo_url)
+        response.raise_for_status()
+        logo_bytes = response.content
+    
+    spec = request_to_spec(request)
+    spec.pop("logo_url")
+    return await run_in_threadpool(get_design_registry().register, spec, logo_bytes)
+
+
+@app.post("/designs", status_code=201)
+async def register_design(request: DesignRequest):
+    """
+    Register a design and compile it
+    
+    The background, effects and logo are rendered once and kept in memory;
+    posts are then rendered with POST /designs/{design_id}/render by sending
+    only their text. Registering the same design again returns the same id.
+    
+    Example:
+        POST /designs {"color_scheme": "professional_blue", "add_vignette": true}
+    """
+    try:
+        design = await compile_design(request)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return dict(design.to_dict(), url=f"/designs/{design.id}/render")
+
+
+@app.get("/designs/{design_id}")
+async def get_design(design_id: str):
+    """Get a registered design's settings"""
+    design = get_design_registry().get(design_id)
+    if design is None:
+        raise HTTPException(status_code=404, detail=f"Design '{design_id}' not found or evicted")
+    return design.to_dict()
+
+
+@app.post("/designs/{design_id}/render")
+async def render_design(design_id: str, request: DesignRenderRequest, http_request: Request):
+    """
+    Render a post with a registered design
+    
+    Only the text is drawn per request. Renders share the cache and ETags of
+    /generate: the same design and text always produce the same image.
+    Returns 404 if the design was evicted; register it again to restore it.
+    """
+    design = get_design_registry().get(design_id)
+    if design is None:
+        raise HTTPException(status_code=404, detail=f"Design '{design_id}' not found or evicted")
+    
+    try:
+        fields = request_to_spec(request)
+        return await render_png_response(
+            http_request, design.merge(fields),
+            render=lambda: get_render_pool().run_local(design.render, fields),
+            logo=design.logo
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# RENDER JOBS
+# ============================================================================
+
+class JobRequest(BaseModel):
+    """Render job: a list of posts, and/or many texts sharing one design"""
+    posts: List[PostRequest] = []
+    texts: List[str] = []  # Rendered with `design`, like /generate/batch-smart
+    design: Optional[PostRequest] = None
+    logo_url: Optional[str] = None  # Optional logo URL applied to every post
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(job_request: JobRequest):
+    """
+    Queue a render job and return its id immediately
+    
+    Poll GET /jobs/{job_id} for progress and results; finished images are
+    downloaded from the artifact URLs in the results.
+    
+    Example:
+        POST /jobs {"design": {...}, "texts": ["Post 1", "Post 2"]}
+    """
+    specs = [request_to_spec(post) for post in job_request.posts]
+    if job_request.texts:
+        if job_request.design is None:
+            raise HTTPException(status_code=400, detail="'texts' requires a 'design'")
+        design = request_to_spec(job_request.design)
+        specs.extend(dict(design, text=text) for text in job_request.texts)
+    if not specs:
+        raise HTTPException(status_code=400, detail="Job has no posts to render")
+    
+    try:
+        job = get_job_manager().submit(specs, logo_url=job_request.logo_url)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "total": len(specs),
+        "url": f"/jobs/{job.id}"
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get job status, progress and the results finished so far"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job (posts already finished stay available)"""
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return {"job_id": job.id, "status": job.status}
+
+
 # ============================================================================
 # NEWS FETCHER ENDPOINTS
 # ============================================================================
 
-# Initialize news fetcher (lazy loading)
-_news_fetcher = None
+# Registered on the app only when the news stack is enabled (see API_MODE)
+news_router = APIRouter()
+
+_news_flight = SingleFlight()
 
 def get_news_fetcher(
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
     max_results: int = 10
-):
-    """Get or create news fetcher instance"""
-    return NewsFetcher(
-        language=language,
-        country=country,
-        period=period,
-        max_results=max_results
+) -> NewsFetcher:
+    """Get a pooled news fetcher (shares one keep-alive HTTP session)"""
+    return get_pooled_fetcher(language, country, period, max_results)
+
+
+async def fetch_news(
+    method: str,
+    query: Optional[str],
+    language: str,
+    country: str,
+    period: str,
+    max_results: int,
+    subscriber: Optional[str] = None
+) -> list:
+    """
+    Run a NewsFetcher query in a worker thread, through the news cache
+    
+    Cached results are served from memory (stale ones while a background
+    refresh runs). Identical queries that arrive while one is in flight
+    share its result, and live fetches respect the per-host request cap.
+    With a subscriber, only articles not yet sent to it are returned, and
+    those are recorded as sent.
+    """
+    def fetch():
+        fetcher = get_news_fetcher(language, country, period, max_results)
+        if query is None:
+            return getattr(fetcher, method)()
+        return getattr(fetcher, method)(query)
+    
+    async def fetch_limited():
+        async with get_host_limiter().limit(GOOGLE_NEWS_HOST):
+            return await run_in_threadpool(fetch)
+    
+    key = (language, country, period, max_results, method, query)
+    articles, _ = await get_news_cache().get(
+        key, lambda: _news_flight.do(key, fetch_limited)
     )
+    if subscriber:
+        articles = await run_in_threadpool(get_seen_store().take_unseen, subscriber, articles)
+    return articles
 
 
-@app.get("/news/top")
+@news_router.get("/news/top")
 async def get_top_news(
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
-    max_results: int = 10
+    max_results: int = 10,
+    subscriber: Optional[str] = None
 ):
     """
     Get top news headlines
@@ -935,6 +857,7 @@ async def get_top_news(
         country: Country code (default: 'US')
         period: Time period (7d, 1m, 1y)
         max_results: Maximum number of results (default: 10)
+        subscriber: Only return articles not yet sent to this subscriber
     
     Returns:
         List of top news articles
@@ -943,8 +866,7 @@ async def get_top_news(
         GET /news/top?country=US&period=7d&max_results=5
     """
     try:
-        fetcher = get_news_fetcher(language, country, period, max_results)
-        articles = fetcher.get_top_news()
+        articles = await fetch_news('get_top_news', None, language, country, period, max_results, subscriber)
         
         return {
             "status": "success",
@@ -958,13 +880,14 @@ async def get_top_news(
         raise HTTPException(status_code=500, detail=f"Error fetching top news: {str(e)}")
 
 
-@app.get("/news/search")
+@news_router.get("/news/search")
 async def search_news(
     keyword: str,
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
-    max_results: int = 10
+    max_results: int = 10,
+    subscriber: Optional[str] = None
 ):
     """
     Search news by keyword
@@ -975,6 +898,7 @@ async def search_news(
         country: Country code
         period: Time period
         max_results: Maximum results
+        subscriber: Only return articles not yet sent to this subscriber
     
     Returns:
         List of news articles matching keyword
@@ -983,8 +907,7 @@ async def search_news(
         GET /news/search?keyword=artificial+intelligence&max_results=5
     """
     try:
-        fetcher = get_news_fetcher(language, country, period, max_results)
-        articles = fetcher.get_news_by_keyword(keyword)
+        articles = await fetch_news('get_news_by_keyword', keyword, language, country, period, max_results, subscriber)
         
         return {
             "status": "success",
@@ -999,13 +922,14 @@ async def search_news(
         raise HTTPException(status_code=500, detail=f"Error searching news: {str(e)}")
 
 
-@app.get("/news/topic/{topic}")
+@news_router.get("/news/topic/{topic}")
 async def get_news_by_topic(
     topic: str,
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
-    max_results: int = 10
+    max_results: int = 10,
+    subscriber: Optional[str] = None
 ):
     """
     Get news by topic
@@ -1016,6 +940,7 @@ async def get_news_by_topic(
         country: Country code
         period: Time period
         max_results: Maximum results
+        subscriber: Only return articles not yet sent to this subscriber
     
     Returns:
         List of news articles for the topic
@@ -1024,8 +949,7 @@ async def get_news_by_topic(
         GET /news/topic/TECHNOLOGY?max_results=5
     """
     try:
-        fetcher = get_news_fetcher(language, country, period, max_results)
-        articles = fetcher.get_news_by_topic(topic)
+        articles = await fetch_news('get_news_by_topic', topic, language, country, period, max_results, subscriber)
         
         return {
             "status": "success",
@@ -1040,13 +964,14 @@ async def get_news_by_topic(
         raise HTTPException(status_code=500, detail=f"Error fetching news by topic: {str(e)}")
 
 
-@app.get("/news/location")
+@news_router.get("/news/location")
 async def get_news_by_location(
     location: str,
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
-    max_results: int = 10
+    max_results: int = 10,
+    subscriber: Optional[str] = None
 ):
     """
     Get news by location
@@ -1057,6 +982,7 @@ async def get_news_by_location(
         country: Country code
         period: Time period
         max_results: Maximum results
+        subscriber: Only return articles not yet sent to this subscriber
     
     Returns:
         List of news articles for the location
@@ -1065,8 +991,7 @@ async def get_news_by_location(
         GET /news/location?location=New+York&max_results=5
     """
     try:
-        fetcher = get_news_fetcher(language, country, period, max_results)
-        articles = fetcher.get_news_by_location(location)
+        articles = await fetch_news('get_news_by_location', location, language, country, period, max_results, subscriber)
         
         return {
             "status": "success",
@@ -1081,13 +1006,14 @@ async def get_news_by_location(
         raise HTTPException(status_code=500, detail=f"Error fetching news by location: {str(e)}")
 
 
-@app.get("/news/site")
+@news_router.get("/news/site")
 async def get_news_by_site(
     site: str,
     language: str = 'en',
     country: str = 'US',
     period: str = '7d',
-    max_results: int = 10
+    max_results: int = 10,
+    subscriber: Optional[str] = None
 ):
     """
     Get news from specific website
@@ -1098,6 +1024,7 @@ async def get_news_by_site(
         country: Country code
         period: Time period
         max_results: Maximum results
+        subscriber: Only return articles not yet sent to this subscriber
     
     Returns:
         List of news articles from the site
@@ -1106,8 +1033,7 @@ async def get_news_by_site(
         GET /news/site?site=cnn.com&max_results=5
     """
     try:
-        fetcher = get_news_fetcher(language, country, period, max_results)
-        articles = fetcher.get_news_by_site(site)
+        articles = await fetch_news('get_news_by_site', site, language, country, period, max_results, subscriber)
         
         return {
             "status": "success",
@@ -1122,7 +1048,416 @@ async def get_news_by_site(
         raise HTTPException(status_code=500, detail=f"Error fetching news by site: {str(e)}")
 
 
-@app.get("/news/decode-google-url")
+class NewsQuery(BaseModel):
+    """One query of a multi-query news request"""
+    type: str  # "top", "keyword", "topic", "location" or "site"
+    value: Optional[str] = None  # Keyword, topic, location or site (unused for "top")
+    language: Optional[str] = None  # Overrides the request defaults
+    country: Optional[str] = None
+    period: Optional[str] = None
+    max_results: Optional[int] = None
+
+
+class MultiNewsRequest(BaseModel):
+    """Several news queries fetched concurrently"""
+    queries: List[NewsQuery]
+    language: str = 'en'
+    country: str = 'US'
+    period: str = '7d'
+    max_results: int = 10
+    dedupe: bool = True
+    subscriber: Optional[str] = None  # Only articles not yet sent to this subscriber
+
+
+NEWS_QUERY_METHODS = {
+    "top": "get_top_news",
+    "keyword": "get_news_by_keyword",
+    "topic": "get_news_by_topic",
+    "location": "get_news_by_location",
+    "site": "get_news_by_site",
+}
+NEWS_MULTI_MAX_QUERIES = int(os.getenv("NEWS_MULTI_MAX_QUERIES", "20"))
+
+
+def validate_news_queries(request: MultiNewsRequest):
+    """Reject an empty, oversized or malformed list of queries with a 400"""
+    if not request.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(request.queries) > NEWS_MULTI_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {NEWS_MULTI_MAX_QUERIES} queries per request"
+        )
+    for query in request.queries:
+        if query.type not in NEWS_QUERY_METHODS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown query type '{query.type}'. Available: {list(NEWS_QUERY_METHODS)}"
+            )
+        if query.type != "top" and not query.value:
+            raise HTTPException(status_code=400, detail=f"Query type '{query.type}' requires a value")
+
+
+async def run_news_query(query: NewsQuery, request: MultiNewsRequest) -> list:
+    """Fetch one query, falling back to the request's defaults"""
+    return await fetch_news(
+        NEWS_QUERY_METHODS[query.type],
+        query.value if query.type != "top" else None,
+        query.language or request.language,
+        query.country or request.country,
+        query.period or request.period,
+        query.max_results or request.max_results
+    )
+
+
+@news_router.post("/news/multi")
+async def get_news_multi(request: MultiNewsRequest):
+    """
+    Run several news queries concurrently
+    
+    Queries run in parallel (through the news cache, with at most
+    HOST_CONCURRENCY requests to Google News at a time), so the total time
+    is about that of the slowest query. With dedupe, only one article per
+    story is listed (same URL, or near-identical titles from different
+    publishers), under the first query that found it. With a subscriber,
+    only articles not yet sent to it are returned.
+    
+    Returns:
+        Results grouped per query, in request order
+    
+    Example:
+        POST /news/multi
+        {"queries": [{"type": "topic", "value": "TECHNOLOGY"},
+                     {"type": "keyword", "value": "AI startups"}]}
+    """
+    validate_news_queries(request)
+    
+    outcomes = await asyncio.gather(
+        *(run_news_query(query, request) for query in request.queries),
+        return_exceptions=True
+    )
+    
+    stories = StoryIndex()
+    groups = []
+    total = duplicates = 0
+    for query, outcome in zip(request.queries, outcomes):
+        group = {"type": query.type, "value": query.value}
+        if isinstance(outcome, Exception):
+            group.update(status="error", error=str(outcome), count=0, articles=[])
+            groups.append(group)
+            continue
+        
+        articles, dropped = await run_in_threadpool(
+            select_articles, outcome, stories, request.dedupe, request.subscriber
+        )
+        duplicates += len(dropped)
+        total += len(articles)
+        group.update(status="success", count=len(articles), articles=articles)
+        groups.append(group)
+    
+    return {
+        "status": "success",
+        "count": total,
+        "duplicates_removed": duplicates,
+        "queries": groups
+    }
+
+
+class NewsPostsRequest(MultiNewsRequest):
+    """News queries rendered straight into posts with one design"""
+    limit: int = 5  # Posts per query
+    design_id: Optional[str] = None  # A design registered with POST /designs
+    design: Optional[DesignRequest] = None  # Or an inline design (registered on the fly)
+    summary_field: Optional[str] = None  # "subtext" or "textbox_content": fill with the extracted summary
+    lead_image: Optional[str] = None  # "overlay" or "background": draw the article's lead image
+    lead_image_position: str = "center"  # Overlay position preset
+    lead_image_size: int = 600  # Overlay bounding box edge
+    lead_image_opacity: int = 255
+
+
+NEWS_SUMMARY_FIELDS = ("subtext", "textbox_content")
+IMAGE_POSITIONS = ("top-left", "top-center", "top-right", "bottom-left", "bottom-center", "bottom-right", "center")
+
+
+def article_post_fields(article: dict) -> dict:
+    """Post text for an article: the headline as text, the publisher as subtext"""
+    title = article.get('title') or ''
+    publisher = article.get('publisher') or ''
+    # Google News titles end with " - <publisher>"
+    suffix = f" - {publisher}"
+    if publisher and title.endswith(suffix):
+        title = title[:-len(suffix)]
+    return {"text": title, "subtext": publisher or None}
+
+
+@news_router.post("/news/posts")
+async def news_to_posts(request: NewsPostsRequest, http_request: Request,
+                        format: str = "ndjson", inline: bool = True):
+    """
+    Fetch news and render a post per article, streaming each post as it finishes
+    
+    With a subscriber, articles already sent to it are skipped, so a
+    scheduled workflow only renders what is new since its last poll.
+    
+    Queries are fetched concurrently, and each article starts rendering as
+    soon as its query returns, so the first posts arrive while other
+    queries are still being fetched. Every post uses the same design: a
+    registered design_id, or an inline design (which may name a template).
+    The headline is drawn as the text and the publisher as the subtext.
+    With summary_field, each article is downloaded and its extracted
+    summary fills that field instead. With lead_image, the article's lead
+    image (its og:image) is drawn as an overlay or as the background; it is
+    downloaded once and kept decoded at the size the post needs.
+    
+    Args:
+        request: Queries (as for /news/multi), posts per query and the design
+        format: "ndjson" (one JSON object per line) or "sse" (server-sent events)
+        inline: Embed the PNG as base64; otherwise return an artifact id
+            that can be downloaded from GET /artifacts/{artifact_id}
+    
+    Streams a "query" event per query (its status and article count), a
+    "result" event per post (index, query, article, status, render_ms and
+    the image or an error) and a final "done" event with the totals.
+    Fetches and renders still in flight are cancelled if the client
+    disconnects.
+    
+    Example:
+        POST /news/posts?format=sse
+        {"queries": [{"type": "topic", "value": "TECHNOLOGY"}],
+         "limit": 3, "design_id": "3f2a..."}
+    """
+    if format not in STREAM_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    validate_news_queries(request)
+    if request.summary_field is not None and request.summary_field not in NEWS_SUMMARY_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"summary_field must be one of {list(NEWS_SUMMARY_FIELDS)}"
+        )
+    if request.lead_image is not None:
+        if request.lead_image not in LEAD_IMAGE_MODES:
+            raise HTTPException(status_code=400, detail=f"lead_image must be one of {list(LEAD_IMAGE_MODES)}")
+        if request.lead_image_position not in IMAGE_POSITIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"lead_image_position must be one of {list(IMAGE_POSITIONS)}"
+            )
+        if request.lead_image_size < 1 or not 0 <= request.lead_image_opacity <= 255:
+            raise HTTPException(
+                status_code=400,
+                detail="lead_image_size must be positive and lead_image_opacity 0-255"
+            )
+    
+    if request.design_id:
+        design = get_design_registry().get(request.design_id)
+        if design is None:
+            raise HTTPException(status_code=404, detail=f"Design '{request.design_id}' not found or evicted")
+    elif request.design is not None:
+        try:
+            design = await compile_design(request.design)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+    else:
+        raise HTTPException(status_code=400, detail="Either design_id or design is required")
+    
+    store = get_artifact_store()
+    image_cache = get_image_cache()
+    
+    async def events():
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks = set()
+        stories = StoryIndex()
+        select_lock = asyncio.Lock()
+        totals = {"generated": 0, "failed": 0, "duplicates_removed": 0}
+        # Every fetch and render task puts exactly one event on the queue
+        outstanding = len(request.queries)
+        posts = 0
+        
+        def spawn(coroutine):
+            task = asyncio.ensure_future(coroutine)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        
+        async def render(index: int, query_index: int, article: dict):
+            result = {"index": index, "query": query_index, "article": article}
+            try:
+                fields = article_post_fields(article)
+                lead_image = None
+                if request.summary_field or request.lead_image:
+                    [(extracted, error)] = await get_article_extractor().extract_many([article['url']])
+                    if extracted is None:
+                        if request.summary_field:
+                            result["summary_error"] = error
+                        if request.lead_image:
+                            result["lead_image_error"] = error
+                    if extracted is not None and request.summary_field:
+                        fields[request.summary_field] = extracted["summary"]
+                        result["article"] = dict(result["article"], summary=extracted["summary"])
+                    if extracted is not None and request.lead_image:
+                        image_url = extracted["top_image"]
+                        try:
+                            if not image_url:
+                                raise ValueError("Article has no lead image")
+                            # Download within the publisher's limit; the render only decodes
+                            async with get_host_limiter().limit(image_url):
+                                await run_in_threadpool(image_cache.fetch, image_url)
+                        except Exception as e:
+                            result["lead_image_error"] = str(e)
+                        else:
+                            lead_image = {
+                                "url": image_url, "mode": request.lead_image,
+                                "position": request.lead_image_position,
+                                "size": request.lead_image_size,
+                                "opacity": request.lead_image_opacity,
+                            }
+                            result["article"] = dict(result["article"], lead_image=image_url)
+                
+                start = time.perf_counter()
+                png, cache_status = await render_cached(
+                    post_render_key(design.merge(fields), logo=design.logo, lead_image=lead_image),
+                    lambda: get_render_pool().run_local(design.render, fields, "PNG", lead_image)
+                )
+                result.update(
+                    status="success", cache=cache_status, size=len(png),
+                    render_ms=round((time.perf_counter() - start) * 1000, 1)
+                )
+                if inline:
+                    result["image_base64"] = base64.b64encode(png).decode("ascii")
+                else:
+                    artifact_id = store.put(png)
+                    result["artifact_id"] = artifact_id
+                    result["url"] = f"/artifacts/{artifact_id}"
+                totals["generated"] += 1
+            except Exception as e:
+                totals["failed"] += 1
+                result.update(status="error", error=str(e))
+            finally:
+                queue.put_nowait(("result", result))
+        
+        async def fetch(query_index: int, query: NewsQuery):
+            nonlocal outstanding, posts
+            event = {"query": query_index, "type": query.type, "value": query.value}
+            try:
+                articles = await run_news_query(query, request)
+                fetcher = get_news_fetcher(
+                    query.language or request.language, query.country or request.country,
+                    query.period or request.period, query.max_results or request.max_results
+                )
+                dropped = []
+                # One query at a time, so each sees the stories the others picked
+                async with select_lock:
+                    selected = await run_in_threadpool(
+                        fetcher.get_articles_for_posts, limit=request.limit,
+                        dedupe=request.dedupe, story_index=stories,
+                        subscriber=request.subscriber, articles=articles, dropped=dropped
+                    )
+                totals["duplicates_removed"] += len(dropped)
+                
+                for article in selected:
+                    outstanding += 1
+                    spawn(render(posts, query_index, article))
+                    posts += 1
+                event.update(status="success", count=len(selected))
+            except Exception as e:
+                event.update(status="error", error=str(e), count=0)
+            finally:
+                queue.put_nowait(("query", event))
+        
+        for query_index, query in enumerate(request.queries):
+            spawn(fetch(query_index, query))
+        
+        try:
+            while outstanding:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), STREAM_DISCONNECT_POLL)
+                except asyncio.TimeoutError:
+                    # Nobody is listening any more: stop fetching and rendering
+                    if await http_request.is_disconnected():
+                        return
+                    continue
+                outstanding -= 1
+                yield encode_stream_event(format, event, payload)
+            yield encode_stream_event(format, "done", dict(status="done", **totals))
+        finally:
+            for task in list(tasks):
+                task.cancel()
+    
+    return StreamingResponse(events(), media_type=STREAM_FORMATS[format])
+
+
+class ExtractArticlesRequest(BaseModel):
+    """Article URLs to download and extract"""
+    urls: List[str]
+    include_text: bool = True  # Include the full article text
+
+
+ARTICLE_EXTRACT_MAX_URLS = int(os.getenv("ARTICLE_EXTRACT_MAX_URLS", "50"))
+
+
+@news_router.post("/news/articles/extract")
+async def extract_articles(request: ExtractArticlesRequest):
+    """
+    Download articles and extract their text and summary
+    
+    Pages are fetched concurrently (at most HOST_CONCURRENCY per publisher
+    domain) and extracted articles are cached by URL. Google News links are
+    decoded first. A URL that fails is reported with its error.
+    
+    Returns:
+        One result per URL, in request order
+    
+    Example:
+        POST /news/articles/extract
+        {"urls": ["https://news.google.com/rss/articles/CBMi...", "https://example.com/story"]}
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required")
+    if len(request.urls) > ARTICLE_EXTRACT_MAX_URLS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {ARTICLE_EXTRACT_MAX_URLS} URLs per request"
+        )
+    
+    outcomes = await get_article_extractor().extract_many(request.urls)
+    
+    results = []
+    for url, (article, error) in zip(request.urls, outcomes):
+        if error is not None:
+            results.append({"url": url, "status": "error", "error": error})
+            continue
+        if not request.include_text:
+            article = {name: value for name, value in article.items() if name != "text"}
+        results.append({"url": url, "status": "success", "article": article})
+    
+    failed = sum(1 for result in results if result["status"] == "error")
+    return {
+        "status": "success",
+        "extracted": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+
+@news_router.get("/news/subscriptions/{subscriber}")
+async def get_subscription(subscriber: str):
+    """
+    Get how many article fingerprints a subscriber has seen
+    
+    Any news endpoint called with subscriber=<id> creates the subscription
+    on first use; there is nothing to register.
+    """
+    seen = await run_in_threadpool(get_seen_store().count, subscriber)
+    return {"subscriber": subscriber, "seen": seen}
+
+
+@news_router.delete("/news/subscriptions/{subscriber}")
+async def reset_subscription(subscriber: str):
+    """Forget everything a subscriber has seen, so its next poll returns every article"""
+    removed = await run_in_threadpool(get_seen_store().reset, subscriber)
+    return {"subscriber": subscriber, "status": "reset", "removed": removed}
+
+
+@news_router.get("/news/decode-google-url")
 async def decode_google_news_url(url: str):
     """
     Decode Google News URL to get the real article URL
@@ -1140,61 +1475,9 @@ async def decode_google_news_url(url: str):
         This uses Google News's internal batchexecute API to properly decode URLs
     """
     try:
-        import json
-        from urllib.parse import quote, urlparse
-        import requests
-        from bs4 import BeautifulSoup
-        
-        def get_decoding_params(gn_art_id: str) -> dict:
-            # Step 1: fetch Google News internal article page
-            resp = requests.get(f"https://news.google.com/rss/articles/{gn_art_id}")
-            resp.raise_for_status()
-            
-            soup = BeautifulSoup(resp.text, "lxml")
-            div = soup.select_one("c-wiz > div")
-            
-            return {
-                "signature": div.get("data-n-a-sg"),
-                "timestamp": div.get("data-n-a-ts"),
-                "gn_art_id": gn_art_id,
-            }
-        
-        def decode_urls(articles_params: list) -> list:
-            # Step 2: build batchexecute payload
-            articles_reqs = [
-                [
-                    "Fbv4je",
-                    (
-                        f'[\"garturlreq\",[[\"X\",\"X\",[\"X\",\"X\"],null,null,1,1,\"US:en\",'
-                        f'null,1,null,null,null,null,null,0,1],\"X\",\"X\",1,[1,1,1],1,1,'
-                        f'null,0,0,null,0],\"{art["gn_art_id"]}\",{art["timestamp"]},'
-                        f'\"{art["signature"]}\"]'
-                    ),
-                ]
-                for art in articles_params
-            ]
-            
-            payload = f"f.req={quote(json.dumps([articles_reqs]))}"
-            headers = {"content-type": "application/x-www-form-urlencoded;charset=UTF-8"}
-            
-            resp = requests.post(
-                "https://news.google.com/_/DotsSplashUi/data/batchexecute",
-                headers=headers,
-                data=payload,
-            )
-            resp.raise_for_status()
-            
-            # Step 3: parse final URLs
-            body = resp.text.split("\n\n")[1]
-            parsed = json.loads(body)[:-2]
-            return [json.loads(item[2])[1] for item in parsed]
-        
-        # Extract article ID from URL
-        gn_art_id = urlparse(url).path.split("/")[-1]
-        
-        # Get decoding parameters and decode
-        params = get_decoding_params(gn_art_id)
-        decoded_url = decode_urls([params])[0]
+        [(decoded_url, error)] = await decode_google_news_urls([url])
+        if error is not None:
+            raise ValueError(error)
         
         return {
             "status": "success",
@@ -1211,7 +1494,53 @@ async def decode_google_news_url(url: str):
         }
 
 
-@app.get("/news/available-countries")
+class DecodeUrlsRequest(BaseModel):
+    """Google News URLs to decode"""
+    urls: List[str]
+
+
+NEWS_DECODE_MAX_URLS = int(os.getenv("NEWS_DECODE_MAX_URLS", "100"))
+
+
+@news_router.post("/news/decode-google-urls")
+async def decode_google_news_urls_batch(request: DecodeUrlsRequest):
+    """
+    Decode many Google News URLs in one call
+    
+    Article pages are fetched concurrently and all articles are decoded
+    with as few batchexecute calls as possible. A URL that fails to decode
+    is reported with its error without failing the others.
+    
+    Returns:
+        One result per URL, in request order
+    
+    Example:
+        POST /news/decode-google-urls
+        {"urls": ["https://news.google.com/rss/articles/CBMi...", "..."]}
+    """
+    if len(request.urls) > NEWS_DECODE_MAX_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {NEWS_DECODE_MAX_URLS} URLs per request")
+    
+    outcomes = await decode_google_news_urls(request.urls)
+    
+    results = []
+    for url, (decoded_url, error) in zip(request.urls, outcomes):
+        if error is None:
+            results.append({"original_url": url, "decoded_url": decoded_url, "status": "success"})
+        else:
+            results.append({"original_url": url, "status": "error", "error": error})
+    
+    failed = sum(1 for _, error in outcomes if error is not None)
+    return {
+        "status": "success",
+        "count": len(results),
+        "decoded": len(results) - failed,
+        "failed": failed,
+        "results": results
+    }
+
+
+@news_router.get("/news/available-countries")
 async def get_available_countries():
     """
     Get list of available countries
@@ -1233,7 +1562,7 @@ async def get_available_countries():
         raise HTTPException(status_code=500, detail=f"Error fetching countries: {str(e)}")
 
 
-@app.get("/news/available-languages")
+@news_router.get("/news/available-languages")
 async def get_available_languages():
     """
     Get list of available languages
@@ -1255,7 +1584,7 @@ async def get_available_languages():
         raise HTTPException(status_code=500, detail=f"Error fetching languages: {str(e)}")
 
 
-@app.get("/news/topics")
+@news_router.get("/news/topics")
 async def get_available_topics():
     """
     Get list of available news topics
@@ -1272,10 +1601,8 @@ async def get_available_topics():
     }
 
 
-def hex_to_rgb(hex_color: str) -> tuple:
-    """Convert hex color to RGB tuple"""
-    hex_color = hex_color.lstrip('#')
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+if NEWS_ENABLED:
+    app.include_router(news_router)
 
 
 if __name__ == "__main__":
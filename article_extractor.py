@@ -0,0 +1,242 @@
+"""
+Article Extractor for Post Generator API
+Downloads news articles and extracts their main text and summary
+"""
+
+import asyncio
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from google_news_decoder import decode_google_news_urls, is_google_news_url, resolve_google_news_url
+from host_limiter import HostLimiter, get_host_limiter
+from news_fetcher import NEWS_HTTP_TIMEOUT, get_http_session
+
+
+# Extraction settings
+ARTICLE_CACHE_SIZE = int(os.getenv("ARTICLE_CACHE_SIZE", "500"))
+ARTICLE_CACHE_TTL = float(os.getenv("ARTICLE_CACHE_TTL", "3600"))
+ARTICLE_MAX_BYTES = int(os.getenv("ARTICLE_MAX_BYTES", str(5 * 1024 * 1024)))
+ARTICLE_SUMMARY_SENTENCES = int(os.getenv("ARTICLE_SUMMARY_SENTENCES", "3"))
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])["”\']?\s+(?=["“\']?[A-Z0-9])')
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([\w-]+)', re.IGNORECASE)
+
+
+def summarize(text: str, sentences: int = ARTICLE_SUMMARY_SENTENCES) -> str:
+    """
+    Lead summary of an article: its first sentences
+    
+    News articles put the gist first, so the lead makes a good summary and
+    needs no NLP models.
+    """
+    lead = []
+    for paragraph in text.split("\n"):
+        paragraph = paragraph.strip()
+        # Skip headings and captions repeated at the top of the body
+        if len(paragraph) < 40 or paragraph[-1] not in '.!?"”\'':
+            continue
+        lead.extend(_SENTENCE_END.split(paragraph))
+        if len(lead) >= sentences:
+            break
+    return " ".join(lead[:sentences])
+
+
+def extract_article(html: str, url: str) -> Dict[str, Any]:
+    """
+    Extract an article from its HTML (no network access)
+    
+    Args:
+        html: Article page HTML
+        url: URL the page was downloaded from (resolves relative links)
+    
+    Returns:
+        Dictionary with url, title, text, summary, description, authors,
+        published_date and top_image
+    """
+    from newspaper import Article
+    
+    article = Article(url, fetch_images=False)
+    article.download(input_html=html)
+    article.parse()
+    
+    description = (article.meta_description or "").strip()
+    return {
+        "url": url,
+        "title": article.title or "",
+        "text": article.text or "",
+        # Prefer the publisher's own description over the lead sentences
+        "summary": description or summarize(article.text or ""),
+        "description": description,
+        "authors": list(article.authors),
+        "published_date": article.publish_date.isoformat() if article.publish_date else None,
+        "top_image": article.top_image or article.meta_img or None,
+    }
+
+
+def fetch_article_html(url: str) -> Tuple[str, str]:
+    """
+    Download an article page (blocking), following redirects
+    
+    Returns:
+        (final_url, html)
+    
+    Raises:
+        ValueError: If the response is not HTML
+    """
+    with get_http_session().get(url, timeout=NEWS_HTTP_TIMEOUT, stream=True) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get("content-type", "text/html")
+        if "html" not in content_type:
+            raise ValueError(f"Not an HTML page ({content_type})")
+        
+        body = bytearray()
+        for chunk in resp.iter_content(64 * 1024):
+            body.extend(chunk)
+            if len(body) >= ARTICLE_MAX_BYTES:
+                break
+        if "charset" in content_type and resp.encoding:
+            encoding = resp.encoding
+        else:
+            # requests assumes ISO-8859-1 without a header charset; trust the page instead
+            match = _META_CHARSET.search(body[:4096])
+            encoding = match.group(1).decode("ascii") if match else "utf-8"
+        try:
+            return resp.url, body.decode(encoding, errors="replace")
+        except LookupError:
+            return resp.url, body.decode("utf-8", errors="replace")
+
+
+class ArticleExtractor:
+    """
+    Concurrent article extraction with a per-URL cache
+    
+    Pages are downloaded concurrently, at most HOST_CONCURRENCY at a time
+    per publisher domain, and parsed on worker threads. Extracted articles
+    are cached in memory by URL (both the requested URL and, for Google News
+    links, the publisher URL it resolves to) for ttl seconds.
+    """
+    
+    def __init__(self, cache_size: int = ARTICLE_CACHE_SIZE, ttl: float = ARTICLE_CACHE_TTL,
+                 limiter: Optional[HostLimiter] = None):
+        """
+        Initialize the extractor
+        
+        Args:
+            cache_size: Maximum number of cached articles
+            ttl: Seconds an extracted article is cached
+            limiter: Per-host concurrency limits (defaults to the process-wide one)
+        """
+        self.cache_size = max(1, cache_size)
+        self.ttl = ttl
+        self.limiter = limiter
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached article for a URL, or None"""
+        with self._lock:
+            entry = self._cache.get(url)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._cache[url]
+                return None
+            self._cache.move_to_end(url)
+            return entry[1]
+    
+    def _store(self, urls: List[str], article: Dict[str, Any]):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for url in urls:
+                self._cache[url] = (expires, article)
+                self._cache.move_to_end(url)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+    
+    def extract(self, url: str) -> Dict[str, Any]:
+        """
+        Extract one article (blocking)
+        
+        Args:
+            url: Publisher or Google News article URL
+        
+        Returns:
+            Extracted article (see extract_article)
+        """
+        article = self.cached(url)
+        if article is None:
+            final_url, html = fetch_article_html(resolve_google_news_url(url))
+            article = extract_article(html, final_url)
+            self._store([url, final_url], article)
+        return article
+    
+    async def extract_many(self, urls: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Extract many articles concurrently
+        
+        Google News links are decoded first (in batches). Duplicate URLs are
+        extracted once, and a failing URL does not fail the others.
+        
+        Returns:
+            One (article, error) pair per input URL, in input order
+        """
+        loop = asyncio.get_running_loop()
+        limiter = self.limiter or get_host_limiter()
+        
+        results: Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]] = {}
+        missing = []
+        for url in dict.fromkeys(urls):
+            article = self.cached(url)
+            if article is not None:
+                results[url] = (article, None)
+            else:
+                missing.append(url)
+        
+        targets = dict(zip(missing, missing))
+        google_links = [url for url in missing if is_google_news_url(url)]
+        if google_links:
+            for url, (decoded, error) in zip(google_links, await decode_google_news_urls(google_links)):
+                if error is not None:
+                    results[url] = (None, f"Could not decode Google News URL: {error}")
+                    del targets[url]
+                else:
+                    targets[url] = decoded
+        
+        async def extract_one(url: str, target: str):
+            try:
+                article = self.cached(target)
+                if article is None:
+                    async with limiter.limit(target):
+                        final_url, html = await loop.run_in_executor(None, fetch_article_html, target)
+                    article = await loop.run_in_executor(None, extract_article, html, final_url)
+                    self._store([url, target, final_url], article)
+                results[url] = (article, None)
+            except Exception as e:
+                results[url] = (None, str(e))
+        
+        await asyncio.gather(*(extract_one(url, target) for url, target in targets.items()))
+        return [results[url] for url in urls]
+    
+    def clear(self):
+        """Drop every cached article"""
+        with self._lock:
+            self._cache.clear()
+    
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+_article_extractor: Optional[ArticleExtractor] = None
+_article_extractor_lock = threading.Lock()
+
+
+def get_article_extractor() -> ArticleExtractor:
+    """Get the process-wide article extractor"""
+    global _article_extractor
+    with _article_extractor_lock:
+        if _article_extractor is None:
+            _article_extractor = ArticleExtractor()
+        return _article_extractor
@@ -0,0 +1,138 @@
+"""
+Decoded URL Cache for Post Generator API
+Persistent mapping of Google News article ids to publisher URLs
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+# Directory for persistent state; kept across restarts, unlike the temp dir
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+DECODED_URL_CACHE_PATH = os.getenv(
+    "DECODED_URL_CACHE_PATH", os.path.join(DATA_DIR, "decoded_urls.sqlite3")
+)
+DECODED_URL_CACHE_MAX_ENTRIES = int(os.getenv("DECODED_URL_CACHE_MAX_ENTRIES", "100000"))
+
+# SQLite limits the number of bound parameters per statement
+_CHUNK = 500
+
+
+class DecodedUrlCache:
+    """
+    SQLite-backed cache of decoded Google News URLs
+    
+    Article ids never change what they point to, so entries do not expire;
+    once max_entries is exceeded the oldest entries are evicted. The
+    database runs in WAL mode, so every worker process can read and write
+    the same file concurrently, and it survives restarts. Set max_entries
+    to 0 to disable the cache.
+    
+    Cache failures are logged and treated as misses; they never fail a decode.
+    """
+    
+    def __init__(self, path: str = DECODED_URL_CACHE_PATH,
+                 max_entries: int = DECODED_URL_CACHE_MAX_ENTRIES):
+        """
+        Initialize the cache
+        
+        Args:
+            path: SQLite database file
+            max_entries: Maximum number of cached URLs (0 disables the cache)
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        
+        if self.enabled:
+            try:
+                with self._connect() as db:
+                    db.execute(
+                        "CREATE TABLE IF NOT EXISTS decoded_urls ("
+                        "gn_art_id TEXT PRIMARY KEY, url TEXT NOT NULL, decoded_at REAL NOT NULL)"
+                    )
+                    db.execute("CREATE INDEX IF NOT EXISTS decoded_urls_age ON decoded_urls (decoded_at)")
+            except sqlite3.Error as e:
+                print(f"Warning: Could not open decoded URL cache at {path}. Error: {e}")
+                self.max_entries = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+    
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+    
+    def get_many(self, gn_art_ids: Iterable[str]) -> Dict[str, str]:
+        """Look up many article ids; returns only the ids that are cached"""
+        ids = list(gn_art_ids)
+        if not self.enabled or not ids:
+            return {}
+        
+        found = {}
+        try:
+            db = self._connect()
+            for i in range(0, len(ids), _CHUNK):
+                chunk = ids[i:i + _CHUNK]
+                rows = db.execute(
+                    f"SELECT gn_art_id, url FROM decoded_urls WHERE gn_art_id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            print(f"Warning: Decoded URL cache lookup failed. Error: {e}")
+        return found
+    
+    def put_many(self, decoded: Dict[str, str]):
+        """Store decoded URLs by article id, evicting the oldest entries if full"""
+        if not self.enabled or not decoded:
+            return
+        
+        now = time.time()
+        try:
+            with self._connect() as db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO decoded_urls (gn_art_id, url, decoded_at) VALUES (?, ?, ?)",
+                    [(gn_art_id, url, now) for gn_art_id, url in decoded.items()]
+                )
+                (count,) = db.execute("SELECT COUNT(*) FROM decoded_urls").fetchone()
+                if count > self.max_entries:
+                    db.execute(
+                        "DELETE FROM decoded_urls WHERE gn_art_id IN ("
+                        "SELECT gn_art_id FROM decoded_urls ORDER BY decoded_at LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+        except sqlite3.Error as e:
+            print(f"Warning: Could not write decoded URL cache. Error: {e}")
+    
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        (count,) = self._connect().execute("SELECT COUNT(*) FROM decoded_urls").fetchone()
+        return count
+
+
+_decoded_url_cache: Optional[DecodedUrlCache] = None
+_decoded_url_cache_lock = threading.Lock()
+
+
+def get_decoded_url_cache() -> DecodedUrlCache:
+    """Get the process-wide decoded URL cache"""
+    global _decoded_url_cache
+    with _decoded_url_cache_lock:
+        if _decoded_url_cache is None:
+            _decoded_url_cache = DecodedUrlCache()
+        return _decoded_url_cache
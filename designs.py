@@ -0,0 +1,221 @@
+"""
+Registered Designs for Post Generator API
+Compile a design once, then render many posts that differ only in text
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from PIL import Image
+from post_generator import PostGenerator
+from render_cache import render_key
+from render_service import add_lead_image, add_post_text, build_background, build_background_layers
+
+
+# Maximum number of compiled designs kept in memory
+DESIGN_CACHE_SIZE = int(os.getenv("DESIGN_CACHE_SIZE", "64"))
+
+# Fields that change between posts of the same design
+DESIGN_TEXT_FIELDS = ("text", "subtext", "textbox_content")
+
+# Per-render options that are not part of the design
+DESIGN_RENDER_OPTIONS = ("draft",)
+
+
+def design_id(spec: Dict[str, Any], logo: Optional[bytes] = None) -> str:
+    """
+    Stable id of a design: registering the same design twice yields the same id
+    
+    Args:
+        spec: PostRequest fields; text fields and render options are ignored
+        logo: Logo image bytes
+    """
+    design_spec = {
+        name: value for name, value in spec.items()
+        if name not in DESIGN_TEXT_FIELDS and name not in DESIGN_RENDER_OPTIONS
+    }
+    return render_key(design_spec, {"logo": logo})[:32]
+
+
+@dataclass
+class CompiledDesign:
+    """
+    A registered design with its text-independent layer pre-rendered
+    
+    The background (canvas, gradient, patterns, shapes, effects and logo)
+    is rendered once per scale and kept as an image; each post only copies
+    it and draws its text. Posts with a lead image as their background use
+    a second, layered compile (see build_background_layers) so the image
+    goes between the canvas and the patterns, shapes and logo.
+    """
+    id: str
+    spec: Dict[str, Any]
+    logo: Optional[bytes] = field(default=None, repr=False)
+    created_at: float = field(default_factory=time.time)
+    renders: int = 0
+    _backgrounds: Dict[bool, Image.Image] = field(default_factory=dict, repr=False)
+    _layers: Dict[bool, Tuple[Image.Image, Image.Image]] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _renders_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    
+    def merge(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Full render spec for this design with the given text fields and options"""
+        spec = dict(self.spec)
+        spec.update(
+            (name, value) for name, value in fields.items()
+            if name in DESIGN_TEXT_FIELDS or name in DESIGN_RENDER_OPTIONS
+        )
+        return spec
+    
+    def compile(self, draft: bool = False) -> Image.Image:
+        """
+        Get the pre-rendered background, rendering it on first use
+        
+        The text stage is run once on a throwaway copy so the fonts it needs
+        are loaded before the first real render.
+        """
+        background = self._backgrounds.get(draft)
+        if background is not None:
+            return background
+        
+        with self._lock:
+            background = self._backgrounds.get(draft)
+            if background is None:
+                spec = self.merge({"draft": draft})
+                generator = build_background(spec, logo=self.logo)
+                background = generator.img
+                
+                warmup = PostGenerator(draft=draft).load_canvas(background)
+                add_post_text(warmup, dict(spec, text="Ag", subtext="Ag", textbox_content="Ag"))
+                
+                self._backgrounds[draft] = background
+        return background
+    
+    def compile_layers(self, draft: bool = False) -> Tuple[Image.Image, Image.Image]:
+        """Get the (base, overlay) background layers, rendering them on first use"""
+        layers = self._layers.get(draft)
+        if layers is not None:
+            return layers
+        
+        with self._lock:
+            layers = self._layers.get(draft)
+            if layers is None:
+                layers = build_background_layers(self.merge({"draft": draft}), logo=self.logo)
+                self._layers[draft] = layers
+        return layers
+    
+    def render(self, fields: Dict[str, Any], format: str = "PNG",
+               lead_image: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        Render one post of this design
+        
+        Args:
+            fields: Text fields (text, subtext, textbox_content) and draft
+            format: Output image format
+            lead_image: add_lead_image arguments (url, mode, position, size,
+                opacity) to draw a web image. An overlay goes between the
+                background and the text; a background goes under the
+                patterns, shapes and logo
+        
+        Returns:
+            Encoded image bytes
+        """
+        spec = self.merge(fields)
+        draft = spec.get("draft", False)
+        generator = PostGenerator(draft=draft)
+        if lead_image and lead_image.get("mode") == "background":
+            base, overlay = self.compile_layers(draft)
+            generator.load_canvas(base)
+            add_lead_image(generator, **lead_image)
+            generator.add_layer(overlay)
+        else:
+            generator.load_canvas(self.compile(draft))
+            if lead_image:
+                add_lead_image(generator, **lead_image)
+        add_post_text(generator, spec)
+        with self._renders_lock:
+            self.renders += 1
+        return generator.to_bytes(format)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Design settings and compile status"""
+        return {
+            "design_id": self.id,
+            "design": self.spec,
+            "has_logo": self.logo is not None,
+            "compiled": {"full": False in self._backgrounds, "draft": True in self._backgrounds},
+            "renders": self.renders,
+            "created_at": self.created_at,
+        }
+
+
+class DesignRegistry:
+    """
+    In-memory LRU of compiled designs
+    
+    Designs are content-addressed, so re-registering an evicted design
+    restores it under the same id.
+    """
+    
+    def __init__(self, max_designs: int = DESIGN_CACHE_SIZE):
+        self.max_designs = max(1, max_designs)
+        self._designs: "OrderedDict[str, CompiledDesign]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def register(self, spec: Dict[str, Any], logo: Optional[bytes] = None) -> CompiledDesign:
+        """
+        Register and compile a design, or return the existing one
+        
+        Args:
+            spec: PostRequest fields describing the design
+            logo: Logo image bytes
+        
+        Returns:
+            The compiled design
+        """
+        new_id = design_id(spec, logo)
+        design = self.get(new_id)
+        if design is not None:
+            return design
+        
+        design_spec = {
+            name: (None if name in DESIGN_TEXT_FIELDS else value)
+            for name, value in spec.items()
+            if name not in DESIGN_RENDER_OPTIONS
+        }
+        design_spec["text"] = ""
+        design = CompiledDesign(id=new_id, spec=design_spec, logo=logo)
+        design.compile(draft=False)
+        
+        with self._lock:
+            existing = self._designs.get(new_id)
+            if existing is not None:
+                return existing
+            self._designs[new_id] = design
+            while len(self._designs) > self.max_designs:
+                self._designs.popitem(last=False)
+        return design
+    
+    def get(self, design_id: str) -> Optional[CompiledDesign]:
+        with self._lock:
+            design = self._designs.get(design_id)
+            if design is not None:
+                self._designs.move_to_end(design_id)
+            return design
+    
+    def __len__(self) -> int:
+        return len(self._designs)
+
+
+_design_registry: Optional[DesignRegistry] = None
+
+
+def get_design_registry() -> DesignRegistry:
+    """Get the process-wide design registry"""
+    global _design_registry
+    if _design_registry is None:
+        _design_registry = DesignRegistry()
+    return _design_registry
@@ -0,0 +1,280 @@
+"""
+Google News URL Decoder
+Resolves news.google.com article links to the publisher's URL
+"""
+
+import asyncio
+import html
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlparse
+from decoded_url_cache import get_decoded_url_cache
+from host_limiter import get_host_limiter
+from news_fetcher import GOOGLE_NEWS_HOST, NEWS_HTTP_TIMEOUT, get_http_session
+
+
+# Maximum articles packed into one batchexecute call
+NEWS_DECODE_BATCH_SIZE = int(os.getenv("NEWS_DECODE_BATCH_SIZE", "50"))
+
+BATCHEXECUTE_URL = "https://news.google.com/_/DotsSplashUi/data/batchexecute"
+
+# The article page carries the decoding signature and timestamp as
+# attributes of a single tag; match that tag instead of parsing the page
+_PARAMS_TAG = re.compile(r'<[^>]*\bdata-n-a-sg="[^"]*"[^>]*>')
+_ATTRIBUTE = re.compile(r'\b(data-n-a-sg|data-n-a-ts)="([^"]*)"')
+
+# Article links: /rss/articles/<id>, /articles/<id> and /read/<id>
+_ARTICLE_PATH = re.compile(r'/(?:articles|read)/([^/]+)')
+
+
+def is_google_news_url(url: str) -> bool:
+    """Whether url points at Google News"""
+    return (urlparse(url).hostname or "").lower() == GOOGLE_NEWS_HOST
+
+
+def article_id(url: str) -> Optional[str]:
+    """
+    Extract the article id from a Google News URL
+    
+    Returns:
+        The id, or None if url is not a Google News article link
+    """
+    if not is_google_news_url(url):
+        return None
+    match = _ARTICLE_PATH.search(urlparse(url).path)
+    return match.group(1) if match else None
+
+
+def extract_decoding_params(page: str, gn_art_id: str) -> Dict[str, str]:
+    """
+    Read the decoding signature and timestamp from an article page
+    
+    Raises:
+        ValueError: If the page has no decoding parameters
+    """
+    tag = _PARAMS_TAG.search(page)
+    if tag is None:
+        raise ValueError("Decoding parameters not found on the article page")
+    attributes = {name: html.unescape(value) for name, value in _ATTRIBUTE.findall(tag.group(0))}
+    if "data-n-a-ts" not in attributes:
+        raise ValueError("Decoding timestamp not found on the article page")
+    return {
+        "signature": attributes["data-n-a-sg"],
+        "timestamp": attributes["data-n-a-ts"],
+        "gn_art_id": gn_art_id,
+    }
+
+
+def get_decoding_params(gn_art_id: str) -> Dict[str, str]:
+    """Fetch the decoding parameters of one article (blocking)"""
+    resp = get_http_session().get(
+        f"https://{GOOGLE_NEWS_HOST}/rss/articles/{gn_art_id}", timeout=NEWS_HTTP_TIMEOUT
+    )
+    resp.raise_for_status()
+    return extract_decoding_params(resp.text, gn_art_id)
+
+
+def decode_batch(articles_params: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Decode many articles with a single batchexecute call (blocking)
+    
+    Each article is sent under its own request id, and each URL in the
+    response is matched back to its article by that id (see
+    parse_batch_response), never by position.
+    
+    Returns:
+        Decoded URLs by article id; articles missing from the response are left out
+    """
+    articles_reqs = [
+        [
+            "Fbv4je",
+            (
+                f'["garturlreq",[["X","X",["X","X"],null,null,1,1,"US:en",'
+                f'null,1,null,null,null,null,null,0,1],"X","X",1,[1,1,1],1,1,'
+                f'null,0,0,null,0],"{art["gn_art_id"]}",{art["timestamp"]},'
+                f'"{art["signature"]}"]'
+            ),
+            None,
+            str(request_id),
+        ]
+        for request_id, art in enumerate(articles_params, 1)
+    ]
+    
+    payload = f"f.req={quote(json.dumps([articles_reqs]))}"
+    headers = {"content-type": "application/x-www-form-urlencoded;charset=UTF-8"}
+    
+    resp = get_http_session().post(
+        BATCHEXECUTE_URL, headers=headers, data=payload, timeout=NEWS_HTTP_TIMEOUT
+    )
+    resp.raise_for_status()
+    return parse_batch_response(resp.text, articles_params)
+
+
+def parse_batch_response(text: str, articles_params: List[Dict[str, str]]) -> Dict[str, str]:
+    """
+    Read the decoded URLs out of a batchexecute response
+    
+    Entries are matched to articles by the request id echoed in each one
+    (request ids count from 1 in the order of articles_params). Entries
+    with an unknown or repeated id, or without an http(s) URL, are skipped,
+    so a reordered or partial response never pairs an article with another
+    article's URL. A single-article batch also accepts the default
+    "generic" id, since there is nothing to mix up.
+    
+    Returns:
+        Decoded URLs by article id
+    
+    Raises:
+        ValueError: If the response cannot be parsed at all
+    """
+    try:
+        entries = json.loads(text.split("\n\n", 1)[1])
+    except (IndexError, ValueError) as e:
+        raise ValueError(f"Unreadable batchexecute response: {e}")
+    
+    ids = {str(request_id): art["gn_art_id"] for request_id, art in enumerate(articles_params, 1)}
+    if len(articles_params) == 1:
+        ids["generic"] = articles_params[0]["gn_art_id"]
+    
+    urls: Dict[str, str] = {}
+    repeated = set()
+    for entry in entries:
+        if not isinstance(entry, list) or len(entry) < 7 or entry[:2] != ["wrb.fr", "Fbv4je"]:
+            continue
+        gn_art_id = ids.get(entry[6])
+        if gn_art_id is None or not isinstance(entry[2], str):
+            continue
+        try:
+            result = json.loads(entry[2])
+        except ValueError:
+            continue
+        url = result[1] if isinstance(result, list) and len(result) > 1 else None
+        if not isinstance(url, str) or urlparse(url).scheme not in ("http", "https"):
+            continue
+        if gn_art_id in urls and urls[gn_art_id] != url:
+            repeated.add(gn_art_id)
+        urls[gn_art_id] = url
+    
+    for gn_art_id in repeated:
+        del urls[gn_art_id]
+    return urls
+
+
+def resolve_google_news_url(url: str) -> str:
+    """
+    Decode one Google News URL (blocking), through the decoded URL cache
+    
+    Returns:
+        The publisher's URL; links outside Google News are returned unchanged
+    
+    Raises:
+        ValueError: If url is a Google News link without an article id, or
+            Google News returns no URL for it
+    """
+    gn_art_id = article_id(url)
+    if gn_art_id is None:
+        if is_google_news_url(url):
+            raise ValueError(f"Not a Google News article URL: {url}")
+        return url
+    cache = get_decoded_url_cache()
+    cached = cache.get_many([gn_art_id])
+    if gn_art_id in cached:
+        return cached[gn_art_id]
+    decoded = decode_batch([get_decoding_params(gn_art_id)]).get(gn_art_id)
+    if decoded is None:
+        raise ValueError(f"Google News returned no URL for article {gn_art_id}")
+    cache.put_many({gn_art_id: decoded})
+    return decoded
+
+
+async def decode_google_news_urls(urls: List[str]) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Decode many Google News URLs
+    
+    Signature pages are fetched concurrently (within the per-host limit),
+    then all articles are decoded with as few batchexecute calls as
+    NEWS_DECODE_BATCH_SIZE allows. If a batch fails, or its response has
+    no URL matched to an article, those articles are retried one by one so
+    one bad article does not fail the others. Only matched URLs are cached.
+    Duplicate URLs are decoded once, and articles already in the
+    persistent decoded URL cache skip the network entirely.
+    
+    Returns:
+        One (decoded_url, error) pair per input URL, in input order.
+        Links outside Google News are returned unchanged; Google News links
+        without an article id get an error.
+    """
+    loop = asyncio.get_running_loop()
+    limiter = get_host_limiter()
+    cache = get_decoded_url_cache()
+    
+    ids = [article_id(url) for url in urls]
+    unique_ids = list(dict.fromkeys(gn_art_id for gn_art_id in ids if gn_art_id))
+    
+    cached = await loop.run_in_executor(None, cache.get_many, unique_ids) if unique_ids else {}
+    decoded: Dict[str, Tuple[Optional[str], Optional[str]]] = {
+        gn_art_id: (url, None) for gn_art_id, url in cached.items()
+    }
+    unique_ids = [gn_art_id for gn_art_id in unique_ids if gn_art_id not in cached]
+    
+    async def fetch_params(gn_art_id: str):
+        async with limiter.limit(GOOGLE_NEWS_HOST):
+            return await loop.run_in_executor(None, get_decoding_params, gn_art_id)
+    
+    outcomes = await asyncio.gather(*(fetch_params(i) for i in unique_ids), return_exceptions=True)
+    
+    ready = []
+    for gn_art_id, outcome in zip(unique_ids, outcomes):
+        if isinstance(outcome, Exception):
+            decoded[gn_art_id] = (None, str(outcome))
+        else:
+            ready.append(outcome)
+    
+    async def decode(batch: List[Dict[str, str]]):
+        async with limiter.limit(GOOGLE_NEWS_HOST):
+            return await loop.run_in_executor(None, decode_batch, batch)
+    
+    batches = [ready[i:i + NEWS_DECODE_BATCH_SIZE] for i in range(0, len(ready), NEWS_DECODE_BATCH_SIZE)]
+    results = await asyncio.gather(*(decode(batch) for batch in batches), return_exceptions=True)
+    
+    retry = []
+    for batch, result in zip(batches, results):
+        for params in batch:
+            gn_art_id = params["gn_art_id"]
+            if not isinstance(result, Exception) and gn_art_id in result:
+                decoded[gn_art_id] = (result[gn_art_id], None)
+            elif len(batch) > 1:
+                retry.append(params)
+            elif isinstance(result, Exception):
+                decoded[gn_art_id] = (None, str(result))
+            else:
+                decoded[gn_art_id] = (None, f"Google News returned no URL for article {gn_art_id}")
+    
+    retried = await asyncio.gather(*(decode([params]) for params in retry), return_exceptions=True)
+    for params, result in zip(retry, retried):
+        gn_art_id = params["gn_art_id"]
+        if isinstance(result, Exception):
+            decoded[gn_art_id] = (None, str(result))
+        elif gn_art_id in result:
+            decoded[gn_art_id] = (result[gn_art_id], None)
+        else:
+            decoded[gn_art_id] = (None, f"Google News returned no URL for article {gn_art_id}")
+    
+    fresh = {
+        gn_art_id: decoded[gn_art_id][0] for gn_art_id in unique_ids
+        if decoded[gn_art_id][0] is not None
+    }
+    if fresh:
+        await loop.run_in_executor(None, cache.put_many, fresh)
+    
+    results = []
+    for url, gn_art_id in zip(urls, ids):
+        if gn_art_id:
+            results.append(decoded[gn_art_id])
+        elif is_google_news_url(url):
+            results.append((None, f"Not a Google News article URL: {url}"))
+        else:
+            results.append((url, None))
+    return results
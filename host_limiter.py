@@ -0,0 +1,76 @@
+"""
+Per-Host Concurrency Limits
+Caps the number of simultaneous outbound requests to any one host
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+HOST_CONCURRENCY = int(os.getenv("HOST_CONCURRENCY", "4"))
+
+
+class HostLimiter:
+    """
+    One semaphore per host, created on first use
+    
+    Requests to different hosts never wait on each other; requests to the
+    same host beyond the limit queue until a slot frees up. A host's
+    semaphore is dropped once no request holds or waits for it, so only
+    hosts with requests in flight are tracked.
+    """
+    
+    def __init__(self, limit: int = HOST_CONCURRENCY, overrides: Optional[Dict[str, int]] = None):
+        """
+        Initialize the host limiter
+        
+        Args:
+            limit: Concurrent requests allowed per host
+            overrides: Per-host limits that replace the default
+        """
+        self.limit_per_host = max(1, limit)
+        self.overrides = overrides or {}
+        # host -> [semaphore, requests holding or waiting for it]
+        self._semaphores: Dict[str, List] = {}
+    
+    @staticmethod
+    def host_of(url_or_host: str) -> str:
+        """Normalize a URL or bare host name to a lowercase host"""
+        if "://" in url_or_host:
+            url_or_host = urlparse(url_or_host).netloc
+        return url_or_host.split("@")[-1].split(":")[0].lower()
+    
+    @asynccontextmanager
+    async def limit(self, url_or_host: str) -> AsyncIterator[None]:
+        """Hold one of the host's slots for the duration of the block"""
+        host = self.host_of(url_or_host)
+        entry = self._semaphores.get(host)
+        if entry is None:
+            entry = [asyncio.Semaphore(self.overrides.get(host, self.limit_per_host)), 0]
+            self._semaphores[host] = entry
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._semaphores[host]
+    
+    def hosts(self) -> List[str]:
+        """Hosts with requests in flight"""
+        return list(self._semaphores)
+
+
+_host_limiter: Optional[HostLimiter] = None
+
+
+def get_host_limiter() -> HostLimiter:
+    """Get the process-wide host limiter"""
+    global _host_limiter
+    if _host_limiter is None:
+        _host_limiter = HostLimiter()
+    return _host_limiter
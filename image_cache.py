@@ -0,0 +1,254 @@
+"""
+Image Cache for Post Generator API
+Downloads web images once and keeps them decoded and pre-sized for rendering
+"""
+
+import io
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+from PIL import Image, ImageOps
+
+
+# Memory budget for downloaded and decoded images
+IMAGE_CACHE_BYTES = int(os.getenv("IMAGE_CACHE_BYTES", str(128 * 1024 * 1024)))
+# Largest image download accepted
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+
+IMAGE_FITS = ("contain", "cover")
+
+# EXIF orientations that swap width and height
+_TRANSPOSED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def fetch_image_bytes(url: str) -> bytes:
+    """
+    Download an image (blocking), streaming at most IMAGE_MAX_BYTES
+    
+    Raises:
+        ValueError: If the response is not an image or is too large
+    """
+    from news_fetcher import NEWS_HTTP_TIMEOUT, get_http_session
+    
+    with get_http_session().get(url, timeout=NEWS_HTTP_TIMEOUT, stream=True) as resp:
+        resp.raise_for_status()
+        content_type = resp.headers.get("content-type", "image/")
+        if not content_type.startswith("image/"):
+            raise ValueError(f"Not an image ({content_type})")
+        
+        data = bytearray()
+        for chunk in resp.iter_content(64 * 1024):
+            data.extend(chunk)
+            if len(data) > IMAGE_MAX_BYTES:
+                raise ValueError(f"Image larger than {IMAGE_MAX_BYTES} bytes")
+        return bytes(data)
+
+
+def _oriented_size(image: Image.Image) -> Tuple[int, int]:
+    """Image size after its EXIF orientation is applied"""
+    if image.getexif().get(0x0112, 1) in _TRANSPOSED_ORIENTATIONS:
+        return image.height, image.width
+    return image.size
+
+
+def fit_scale(size: Tuple[int, int], box: Tuple[int, int], fit: str) -> float:
+    """
+    Scale at which an image of size fits box
+    
+    "contain" fits the whole image inside the box and never enlarges it;
+    "cover" fills the box, cropping the overflow.
+    """
+    scale_x, scale_y = box[0] / size[0], box[1] / size[1]
+    if fit == "cover":
+        return max(scale_x, scale_y)
+    return min(scale_x, scale_y, 1.0)
+
+
+def decode_image(data: bytes, scale: float) -> Image.Image:
+    """
+    Decode an image at a reduced resolution
+    
+    JPEGs are decoded directly at the smallest DCT scale (1/2, 1/4, 1/8) that
+    is still at least scale, so large photos never decode at full size; the
+    remainder is a reducing resize.
+    
+    Args:
+        data: Encoded image bytes
+        scale: Target scale of the oriented image (at most 1.0)
+    
+    Returns:
+        The upright image as RGBA
+    """
+    image = Image.open(io.BytesIO(data))
+    width, height = _oriented_size(image)
+    target = (max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale)))
+    
+    transposed = (width, height) != image.size
+    image.draft("RGB", (target[1], target[0]) if transposed else target)
+    image = ImageOps.exif_transpose(image)
+    if image.size != target:
+        image = image.resize(target, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    return image.convert("RGBA")
+
+
+def _fit_to_box(image: Image.Image, box: Tuple[int, int], fit: str) -> Image.Image:
+    """Resize (and for cover, center-crop) an image to a box"""
+    scale = fit_scale(image.size, box, fit)
+    if fit == "cover":
+        crop_w, crop_h = box[0] / scale, box[1] / scale
+        left, top = (image.width - crop_w) / 2, (image.height - crop_h) / 2
+        return image.resize(box, Image.Resampling.LANCZOS,
+                            box=(left, top, left + crop_w, top + crop_h), reducing_gap=3.0)
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if size == image.size:
+        return image
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+class ImageCache:
+    """
+    Byte-budgeted LRU of web images, by URL
+    
+    Three kinds of entries share one budget: the downloaded bytes, one
+    decoded "master" per URL, and the pre-sized variants handed to the
+    renderer. The master is decoded at the largest scale requested so far
+    (never above full size), and every variant (any box, contain or cover)
+    is cut from it, so an image is downloaded once and decoded once across
+    post variants, draft and full renders, and retries. Requests for the
+    same URL are serialized, so concurrent renders never download or decode
+    it twice either.
+    
+    Returned images are shared: callers must copy before modifying them.
+    """
+    
+    def __init__(self, max_bytes: int = IMAGE_CACHE_BYTES):
+        """
+        Initialize the image cache
+        
+        Args:
+            max_bytes: Memory budget for encoded and decoded images
+        """
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # Lock stripes serialize work per URL without a lock per URL
+        self._url_locks = [threading.RLock() for _ in range(64)]
+        self._stats = {"hits": 0, "downloads": 0, "decodes": 0, "resizes": 0}
+    
+    def _url_lock(self, url: str) -> threading.RLock:
+        return self._url_locks[hash(url) % len(self._url_locks)]
+    
+    def _get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+    
+    def _put(self, key: Hashable, value: Any, nbytes: int):
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def fetch(self, url: str) -> bytes:
+        """
+        Get an image's encoded bytes, downloading them on first use (blocking)
+        
+        Call this ahead of rendering (e.g. within a per-host limit) so the
+        render itself only decodes.
+        """
+        data = self._get(("source", url))
+        if data is not None:
+            return data
+        with self._url_lock(url):
+            data = self._get(("source", url))
+            if data is None:
+                data = fetch_image_bytes(url)
+                self._count("downloads")
+                self._put(("source", url), data, len(data))
+            return data
+    
+    def get_image(self, url: str, box: Tuple[int, int], fit: str = "contain") -> Image.Image:
+        """
+        Get an image decoded and sized for a box (blocking)
+        
+        Args:
+            url: Image URL
+            box: Target (width, height) in pixels
+            fit: "contain" (fit inside the box) or "cover" (fill and crop)
+        
+        Returns:
+            RGBA image; the box size for cover, at most the box for contain
+        """
+        if fit not in IMAGE_FITS:
+            raise ValueError(f"Unknown image fit '{fit}'. Use one of {list(IMAGE_FITS)}")
+        box = (max(1, int(box[0])), max(1, int(box[1])))
+        
+        key = ("image", url, box, fit)
+        image = self._get(key)
+        if image is not None:
+            self._count("hits")
+            return image
+        
+        with self._url_lock(url):
+            image = self._get(key)
+            if image is not None:
+                self._count("hits")
+                return image
+            
+            # The master is (image, source size); its scale is relative to the source
+            master = self._get(("master", url))
+            if master is None or min(1.0, fit_scale(master[1], box, fit)) > master[0].width / master[1][0]:
+                data = self.fetch(url)
+                size = _oriented_size(Image.open(io.BytesIO(data)))
+                scale = min(1.0, fit_scale(size, box, fit))
+                if master is not None:
+                    # Never decode smaller than a master that is being replaced
+                    scale = max(scale, master[0].width / master[1][0])
+                master = (decode_image(data, scale), size)
+                self._count("decodes")
+                self._put(("master", url), master, master[0].width * master[0].height * 4)
+            
+            image = _fit_to_box(master[0], box, fit)
+            if image is not master[0]:
+                self._count("resizes")
+                self._put(key, image, image.width * image.height * 4)
+            return image
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit, download, decode and resize counts, entries and bytes used"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries), bytes=self._bytes)
+    
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """Get the process-wide image cache"""
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache()
+        return _image_cache
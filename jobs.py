@@ -0,0 +1,239 @@
+"""
+Render Jobs for Post Generator API
+Asynchronous job queue so large batches do not hold an HTTP connection open
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from render_service import get_artifact_store, get_batch_pool, render_post_to_bytes
+
+
+# Job queue configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "100"))
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "1000"))
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+@dataclass
+class Job:
+    """A queued or running render job"""
+    id: str
+    specs: List[Dict[str, Any]]
+    logo_url: Optional[str] = None
+    status: str = "queued"  # "queued", "running", "cancelling", "completed", "failed", "cancelled"
+    results: List[Optional[Dict[str, Any]]] = field(default_factory=list)
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+    
+    def __post_init__(self):
+        if not self.results:
+            self.results = [None] * len(self.specs)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status, progress and the results available so far"""
+        done = [result for result in self.results if result is not None]
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.specs),
+            "completed": len(done),
+            "failed": sum(1 for result in done if result["status"] == "error"),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "results": done,
+        }
+
+
+class JobManager:
+    """
+    Bounded queue of render jobs processed by a fixed set of workers
+    
+    Each worker takes one job at a time and renders its items on the batch
+    pool; finished items are stored in the artifact store as they complete,
+    so progress and partial results can be polled while the job runs. A
+    job's artifacts are pinned in the store until the job leaves the history,
+    so other traffic cannot evict results the job has reported.
+    """
+    
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE,
+                 history: int = JOB_HISTORY):
+        """
+        Initialize the job manager
+        
+        Args:
+            workers: Number of jobs processed concurrently
+            queue_size: Maximum number of queued jobs
+            history: Number of jobs (finished or not) kept for status polling
+        """
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.history = history
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        self._stopping = False
+    
+    async def start(self):
+        """Start the worker tasks on the running event loop"""
+        if self._worker_tasks:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._worker_tasks = [
+            asyncio.ensure_future(self._worker()) for _ in range(self.workers)
+        ]
+    
+    async def stop(self):
+        """Cancel running jobs and stop the workers"""
+        self._stopping = True
+        for task in self._worker_tasks:
+            task.cancel()
+        for job in self.jobs.values():
+            if job.task is not None and not job.task.done():
+                job.task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+    
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+    
+    def submit(self, specs: List[Dict[str, Any]], logo_url: Optional[str] = None) -> Job:
+        """
+        Queue a job
+        
+        Raises:
+            JobQueueFull: If queue_size jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("Job manager is not running. Call start() first.")
+        
+        job = Job(id=uuid.uuid4().hex, specs=specs, logo_url=logo_url)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Job queue is full ({self.queue_size} jobs waiting)")
+        
+        self.jobs[job.id] = job
+        self._trim_history()
+        return job
+    
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+    
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Cancel a queued or running job; finished jobs are left as they are
+        
+        A running job is marked "cancelling" at once and sends no further
+        posts to the pool; it becomes "cancelled" once its task has stopped.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        
+        if job.task is not None:
+            job.status = "cancelling"
+            job.task.cancel()
+        else:
+            # Still queued: the worker will skip it
+            job.status = "cancelled"
+            job.finished_at = time.time()
+        return job
+    
+    def _trim_history(self):
+        while len(self.jobs) > self.history:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if not oldest.finished:
+                break
+            del self.jobs[oldest_id]
+            get_artifact_store().unpin(
+                result["artifact_id"] for result in oldest.results
+                if result is not None and "artifact_id" in result
+            )
+    
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status == "cancelled":
+                    continue
+                job.task = asyncio.ensure_future(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    job.status = "cancelled"
+                    if self._stopping or not job.task.cancelled():
+                        raise  # The worker itself is being stopped
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                finally:
+                    job.finished_at = time.time()
+                    job.task = None
+            finally:
+                self._queue.task_done()
+    
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        
+        logo_bytes = None
+        if job.logo_url:
+            import requests
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(None, requests.get, job.logo_url)
+            response.raise_for_status()
+            logo_bytes = response.content
+        
+        store = get_artifact_store()
+        items = [(spec, logo_bytes) for spec in job.specs]
+        renders = get_batch_pool().imap_unordered(render_post_to_bytes, items)
+        try:
+            async for i, png, error in renders:
+                if error is not None:
+                    job.results[i] = {"index": i, "status": "error", "error": str(error)}
+                    continue
+                artifact_id = store.put(png, pinned=True)
+                job.results[i] = {
+                    "index": i,
+                    "status": "success",
+                    "artifact_id": artifact_id,
+                    "url": f"/artifacts/{artifact_id}",
+                }
+        finally:
+            # Cancels the renders not yet started, so a cancelled job feeds
+            # the pool nothing more
+            await renders.aclose()
+        
+        job.status = "completed"
+
+
+_job_manager: Optional[JobManager] = None
+
+
+def get_job_manager() -> JobManager:
+    """Get the process-wide job manager"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = JobManager()
+    return _job_manager
@@ -0,0 +1,132 @@
+"""
+News Cache for Post Generator API
+TTL cache of news queries with stale-while-revalidate and negative caching
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Optional, Set, Tuple
+
+
+# News cache configuration
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL", "300"))
+NEWS_CACHE_STALE_TTL = float(os.getenv("NEWS_CACHE_STALE_TTL", "3600"))
+NEWS_CACHE_NEGATIVE_TTL = float(os.getenv("NEWS_CACHE_NEGATIVE_TTL", "30"))
+NEWS_CACHE_SIZE = int(os.getenv("NEWS_CACHE_SIZE", "1000"))
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fetched_at: float
+    fresh_until: float
+    stale_until: float
+
+
+class NewsCache:
+    """
+    In-memory cache of news query results
+    
+    Results are fresh for ttl seconds. After that, for another stale_ttl
+    seconds, the stale result is returned immediately while one background
+    fetch refreshes it. Empty results (no articles, or a failed fetch, which
+    NewsFetcher reports as an empty list) are kept for negative_ttl seconds
+    only and are never served stale. Set ttl to 0 to disable caching.
+    
+    Meant to be used from a single event loop; it needs no locking.
+    """
+    
+    def __init__(self, ttl: float = NEWS_CACHE_TTL, stale_ttl: float = NEWS_CACHE_STALE_TTL,
+                 negative_ttl: float = NEWS_CACHE_NEGATIVE_TTL, max_entries: int = NEWS_CACHE_SIZE):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Tuple[Any, str]:
+        """
+        Get a cached result, fetching or revalidating as needed
+        
+        Args:
+            key: Identity of the query
+            fetch: Zero-argument coroutine factory that runs the query
+        
+        Returns:
+            (result, status) where status is "hit", "stale" or "miss"
+        """
+        if self.ttl <= 0:
+            return await fetch(), "miss"
+        
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if now < entry.fresh_until:
+                return entry.value, "hit"
+            if now < entry.stale_until:
+                self._revalidate(key, fetch)
+                return entry.value, "stale"
+        
+        value = await fetch()
+        self._store(key, value)
+        return value, "miss"
+    
+    def _store(self, key: Hashable, value: Any):
+        now = time.monotonic()
+        if value:
+            entry = _Entry(value, now, now + self.ttl, now + self.ttl + self.stale_ttl)
+        else:
+            entry = _Entry(value, now, now + self.negative_ttl, now + self.negative_ttl)
+        
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _revalidate(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        """Refresh an entry in the background, once per key at a time"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        
+        async def refresh():
+            try:
+                value = await fetch()
+                # Keep serving the stale articles rather than caching a failure
+                if value or key not in self._entries:
+                    self._store(key, value)
+            except Exception as e:
+                print(f"Warning: Background news refresh failed. Error: {e}")
+            finally:
+                self._refreshing.discard(key)
+        
+        task = asyncio.ensure_future(refresh())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one entry, or every entry when key is None"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_news_cache: Optional[NewsCache] = None
+
+
+def get_news_cache() -> NewsCache:
+    """Get the process-wide news cache"""
+    global _news_cache
+    if _news_cache is None:
+        _news_cache = NewsCache()
+    return _news_cache
@@ -3,8 +3,159 @@ News Fetcher Module
 Uses GNews to fetch trending news articles for post generation
 """
 
-from gnews import GNews
-from typing import List, Dict, Optional
+import copy
+import ipaddress
+import os
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from story_index import StoryIndex
+from subscriptions import get_seen_store
+
+
+# Host serving every feed and decode request
+GOOGLE_NEWS_HOST = "news.google.com"
+
+# HTTP settings shared by every news request
+NEWS_HTTP_TIMEOUT = float(os.getenv("NEWS_HTTP_TIMEOUT", "10"))
+NEWS_HTTP_POOL_SIZE = int(os.getenv("NEWS_HTTP_POOL_SIZE", "20"))
+NEWS_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+)
+# Let the shared session fetch private, loopback and link-local hosts
+# (for local development only: clients choose the article and image URLs)
+ALLOW_PRIVATE_URLS = os.getenv("ALLOW_PRIVATE_URLS", "0") == "1"
+
+_http_session = None
+_http_session_lock = threading.Lock()
+
+
+def check_public_url(url: str):
+    """
+    Reject URLs the server must not fetch on a client's behalf
+    
+    Only http(s) URLs whose host resolves to public addresses pass; private,
+    loopback, link-local, reserved and multicast addresses (including
+    IPv4-mapped IPv6 forms) are refused unless ALLOW_PRIVATE_URLS is set.
+    Google News itself is trusted and not resolved again.
+    
+    Raises:
+        ValueError: If the URL is not http(s), its host cannot be resolved,
+            or any of its addresses is not public
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Not an http(s) URL: {url}")
+    if ALLOW_PRIVATE_URLS or parsed.hostname == GOOGLE_NEWS_HOST:
+        return
+    
+    try:
+        infos = socket.getaddrinfo(parsed.hostname, parsed.port or 0, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ValueError(f"Cannot resolve host {parsed.hostname}: {e}")
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%", 1)[0])
+        if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+            address = address.ipv4_mapped
+        if not address.is_global or address.is_multicast:
+            raise ValueError(f"Refusing to fetch non-public host {parsed.hostname} ({address})")
+
+
+def get_http_session():
+    """
+    Get the process-wide keep-alive HTTP session for news requests
+    
+    Connections to Google News are pooled and reused across requests and
+    threads, so repeat queries skip TCP and TLS setup. Pass
+    timeout=NEWS_HTTP_TIMEOUT on every call; sessions have no default.
+    
+    Every request the session sends, redirects included, goes through
+    check_public_url first, so client-supplied article and image URLs
+    cannot reach internal hosts.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                class PublicHostAdapter(HTTPAdapter):
+                    def send(self, request, **kwargs):
+                        check_public_url(request.url)
+                        return super().send(request, **kwargs)
+                
+                session = requests.Session()
+                adapter = PublicHostAdapter(pool_connections=NEWS_HTTP_POOL_SIZE,
+                                            pool_maxsize=NEWS_HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = NEWS_USER_AGENT
+                _http_session = session
+    return _http_session
+
+
+def select_articles(articles: List[Dict], stories: StoryIndex, dedupe: bool,
+                    subscriber: Optional[str] = None,
+                    limit: Optional[int] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Pick the articles to send: one per story, new to the subscriber
+    
+    With dedupe, near-duplicates are clustered within articles, and
+    articles of stories already in stories are dropped. With a subscriber,
+    articles it has received are skipped in the same transaction that
+    records the picked ones and the dropped near-duplicates of every story
+    it has received, so a later poll does not return a duplicate in the
+    story's place. Stories are added to stories only once the subscriber
+    has them, so a story one call had no room for can still come from
+    another.
+    
+    Blocking (the seen store is SQLite): run it in a worker thread.
+    
+    Returns:
+        (picked articles, articles dropped as near-duplicates)
+    """
+    clusters = []
+    if dedupe:
+        local = StoryIndex(threshold=stories.threshold)
+        positions = {}
+        for article in articles:
+            story_id, is_new = local.add(article)
+            if is_new:
+                positions[story_id] = len(clusters)
+                clusters.append([article])
+            else:
+                clusters[positions[story_id]].append(article)
+    else:
+        clusters = [[article] for article in articles]
+    
+    candidates, duplicates, also_seen = [], [], []
+    for cluster in clusters:
+        if dedupe and stories.find(cluster[0]) is not None:
+            also_seen.extend(cluster)
+        else:
+            candidates.append(cluster[0])
+            duplicates.append(cluster[1:])
+    
+    if subscriber:
+        seen_store = get_seen_store()
+        picked = seen_store.take_unseen(
+            subscriber, candidates, limit=limit, duplicates=duplicates, also_seen=also_seen
+        )
+        if dedupe:
+            # Received: picked now, or seen by an earlier poll
+            unseen = {id(article) for article in seen_store.unseen(subscriber, candidates)}
+            received = [article for article in candidates if id(article) not in unseen]
+    else:
+        picked = candidates if limit is None else candidates[:limit]
+        received = picked
+    
+    if dedupe:
+        for article in received:
+            stories.add(article)
+    return picked, [article for cluster in duplicates for article in cluster] + also_seen
 
 
 class NewsFetcher:
@@ -21,7 +172,8 @@ class NewsFetcher:
         language: str = 'en',
         country: str = 'US',
         period: str = '7d',
-        max_results: int = 10
+        max_results: int = 10,
+        session=None
     ):
         """
         Initialize News Fetcher
@@ -31,13 +183,50 @@ class NewsFetcher:
             country: Country code (default: 'US')
             period: Time period (7d, 1m, 1y, etc.)
             max_results: Maximum number of results
+            session: requests.Session for feed downloads (defaults to the
+                shared keep-alive session)
         """
+        # Imported on first use: gnews pulls in feedparser, bs4 and requests
+        from gnews import GNews
+        
         self.gnews = GNews(
             language=language,
             country=country,
             period=period,
             max_results=max_results
         )
+        self.session = session or get_http_session()
+        
+        # Newer gnews versions download feeds through _fetch_feed with urllib
+        # (a new connection per call); route them through the pooled session.
+        # Older versions keep their own download path.
+        if hasattr(self.gnews, "_fetch_feed"):
+            self.gnews._fetch_feed = self._fetch_feed
+    
+    def _fetch_feed(self, url: str):
+        """Download and parse an RSS feed over the shared session"""
+        import feedparser
+        
+        response = self.session.get(url, timeout=NEWS_HTTP_TIMEOUT,
+                                    proxies=getattr(self.gnews, "proxy", None))
+        feed = feedparser.parse(response.content)
+        feed["status"] = response.status_code
+        return feed
+    
+    def with_max_results(self, max_results: int) -> 'NewsFetcher':
+        """
+        Get a fetcher returning max_results articles
+        
+        Shares the underlying client settings and HTTP session; the original
+        fetcher is left unchanged, so pooled fetchers can be used from many
+        threads with different result counts.
+        """
+        if max_results == self.gnews.max_results:
+            return self
+        fetcher = copy.copy(self)
+        fetcher.gnews = copy.copy(self.gnews)
+        fetcher.gnews.max_results = max_results
+        return fetcher
     
     def get_top_news(self) -> List[Dict]:
         """
@@ -124,7 +313,12 @@ class NewsFetcher:
         keyword: Optional[str] = None,
         topic: Optional[str] = None,
         location: Optional[str] = None,
-        limit: int = 5
+        limit: Optional[int] = 5,
+        dedupe: bool = False,
+        story_index: Optional[StoryIndex] = None,
+        subscriber: Optional[str] = None,
+        articles: Optional[List[Dict]] = None,
+        dropped: Optional[List[Dict]] = None
     ) -> List[Dict]:
         """
         Get articles suitable for social media posts
@@ -133,34 +327,74 @@ class NewsFetcher:
             keyword: Search by keyword
             topic: Search by topic
             location: Search by location
-            limit: Number of articles to return
+            limit: Number of articles to return (None for all)
+            dedupe: Return one article per story
+            story_index: Index to cluster near-duplicate titles in. Defaults
+                to a new index per call; pass a shared one (e.g.
+                get_story_index()) to also skip stories that an earlier
+                call with that index already returned
+            subscriber: Only return articles not yet sent to this
+                subscriber, and record them as sent (see select_articles)
+            articles: Raw articles already fetched (e.g. through a cache);
+                when given, no query is run
+            dropped: List to extend with the articles dropped as
+                near-duplicates
         
         Returns:
             List of simplified article dictionaries
         """
-        articles = []
+        if articles is None:
+            if keyword:
+                articles = self.get_news_by_keyword(keyword)
+            elif topic:
+                articles = self.get_news_by_topic(topic)
+            elif location:
+                articles = self.get_news_by_location(location)
+            else:
+                articles = self.get_top_news()
         
-        if keyword:
-            articles = self.get_news_by_keyword(keyword)
-        elif topic:
-            articles = self.get_news_by_topic(topic)
-        elif location:
-            articles = self.get_news_by_location(location)
-        else:
-            articles = self.get_top_news()
+        picked, duplicates = select_articles(
+            [self.simplify_article(article) for article in articles],
+            story_index if story_index is not None else StoryIndex(),
+            dedupe, subscriber, limit
+        )
+        if dropped is not None:
+            dropped.extend(duplicates)
+        return picked
+    
+    def get_full_article(self, url: str) -> Dict:
+        """
+        Download an article and extract its text and summary
         
-        # Simplify and limit results
-        simplified = []
-        for article in articles[:limit]:
-            simplified.append({
-                'title': article.get('title', ''),
-                'description': article.get('description', ''),
-                'url': article.get('url', ''),
-                'publisher': article.get('publisher', {}).get('title', 'Unknown') if isinstance(article.get('publisher'), dict) else article.get('publisher', 'Unknown'),
-                'published_date': article.get('published date', '')
-            })
+        Args:
+            url: Publisher or Google News article URL
         
-        return simplified
+        Returns:
+            Dictionary with url, title, text, summary, description, authors,
+            published_date and top_image (empty if extraction failed)
+        """
+        from article_extractor import get_article_extractor
+        try:
+            return get_article_extractor().extract(url)
+        except Exception as e:
+            print(f"Error extracting article '{url}': {e}")
+            return {}
+    
+    @staticmethod
+    def simplify_article(article: Dict) -> Dict:
+        """
+        Reduce a raw gnews article to the fields used for posts
+        
+        Returns:
+            Dictionary with title, description, url, publisher and published_date
+        """
+        return {
+            'title': article.get('title', ''),
+            'description': article.get('description', ''),
+            'url': article.get('url', ''),
+            'publisher': article.get('publisher', {}).get('title', 'Unknown') if isinstance(article.get('publisher'), dict) else article.get('publisher', 'Unknown'),
+            'published_date': article.get('published date', '')
+        }
     
     @staticmethod
     def get_available_countries() -> Dict[str, str]:
@@ -202,6 +436,28 @@ class NewsFetcher:
         }
 
 
+_fetcher_pool: Dict[Tuple[str, str, str], NewsFetcher] = {}
+_fetcher_pool_lock = threading.Lock()
+
+
+def get_pooled_fetcher(language: str = 'en', country: str = 'US',
+                       period: str = '7d', max_results: int = 10) -> NewsFetcher:
+    """
+    Get a shared NewsFetcher for a language, country and period
+    
+    Fetchers are created once per (language, country, period) and reused;
+    max_results is applied per call with NewsFetcher.with_max_results.
+    """
+    key = (language, country, period)
+    with _fetcher_pool_lock:
+        fetcher = _fetcher_pool.get(key)
+        if fetcher is None:
+            fetcher = NewsFetcher(language=language, country=country,
+                                  period=period, max_results=max_results)
+            _fetcher_pool[key] = fetcher
+    return fetcher.with_max_results(max_results)
+
+
 # Quick helper functions
 def get_latest_news(keyword: str = None, max_results: int = 10) -> List[Dict]:
     """
@@ -232,7 +488,7 @@ def get_article_summary(url: str) -> str:
     """
     fetcher = NewsFetcher()
     article = fetcher.get_full_article(url)
-    return article.get('summary', article.get('text', ''))
+    return article.get('summary') or article.get('text', '')
 
 
 # Example usage
@@ -3,10 +3,33 @@ LinkedIn-style Post Generator
 A versatile image generation library for creating branded social media posts
 """
 
-from .generator import PostGenerator
-from .color_schemes import ColorScheme
-from .typography import Typography
-from .template_loader import TemplateLoader
+import importlib
 
 __version__ = "1.0.0"
-__all__ = ["PostGenerator", "ColorScheme", "Typography", "TemplateLoader"]
+
+# Public names and the submodule defining each. Submodules are imported on
+# first attribute access, so e.g. color_schemes can be used without PIL.
+_EXPORTS = {
+    "PostGenerator": ".generator",
+    "ColorScheme": ".color_schemes",
+    "Typography": ".typography",
+    "TemplateLoader": ".template_loader",
+    "TemplateRegistry": ".template_loader",
+    "get_template_registry": ".template_loader",
+    "RenderResources": ".resources",
+    "get_shared_resources": ".resources",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,16 +3,30 @@ Main Post Generator Module
 Creates branded social media posts with various styles and effects
 """
 
-from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
+from PIL import Image, ImageDraw, ImageFilter, ImageEnhance, ImageOps
 from typing import Tuple, Optional, List, Dict, Union
+import io
 import os
 import math
+import random
 from .color_schemes import ColorScheme, ColorSchemes
-from .typography import Typography
+from .resources import RenderResources, get_shared_resources
+
+
+# Images can be given as a file path, raw encoded bytes or a PIL image
+ImageSource = Union[str, bytes, Image.Image]
 
 
 class PostGenerator:
-    """Main class for generating branded social media posts"""
+    """
+    Main class for generating branded social media posts
+
+    Each instance is a lightweight, single-use render context: it owns the
+    canvas, draw handle and random state of one post. Fonts and other
+    caches live on a RenderResources object that is shared process-wide by
+    default, so creating a generator per request is cheap and instances on
+    different threads never touch each other's state.
+    """
     
     # Standard dimensions
     DIMENSIONS = {
@@ -25,20 +39,58 @@ class PostGenerator:
         "twitter_post": (1200, 675),
     }
     
-    def __init__(self, base_path: str = "."):
+    # Render scale used for draft previews
+    DRAFT_SCALE = 0.25
+    
+    def __init__(self, base_path: str = ".", draft: bool = False,
+                 scale: Optional[float] = None,
+                 resources: Optional[RenderResources] = None,
+                 seed: Optional[int] = None):
         """
         Initialize the post generator
         
         Args:
             base_path: Base directory path for fonts and assets
+            draft: Render a low-resolution preview at DRAFT_SCALE
+            scale: Explicit render scale (overrides draft). All coordinates,
+                sizes and radii passed to the drawing methods are given at
+                full resolution and scaled by this factor.
+            resources: Shared fonts and caches (defaults to the process-wide
+                resources for base_path)
+            seed: Seed for shapes and noise, for reproducible renders
         """
-        self.base_path = base_path
-        self.typography = Typography(base_path)
+        self.resources = resources or get_shared_resources(base_path)
+        self.base_path = self.resources.base_path
+        self.typography = self.resources.typography
+        self.rng = random.Random(seed)
+        if scale is None:
+            scale = self.DRAFT_SCALE if draft else 1.0
+        if scale <= 0:
+            raise ValueError(f"Render scale must be positive, got {scale}")
+        self.scale = scale
         self.img = None
         self.draw = None
         self.width = 0
         self.height = 0
     
+    @property
+    def is_draft(self) -> bool:
+        """True when rendering below full resolution"""
+        return self.scale < 1.0
+    
+    def _scaled(self, value: float) -> int:
+        """Scale a full-resolution coordinate to the render scale"""
+        return int(round(value * self.scale))
+    
+    def _scaled_size(self, value: float) -> int:
+        """Scale a full-resolution length, never collapsing it to zero"""
+        if value <= 0:
+            return int(value)
+        return max(1, self._scaled(value))
+    
+    def _scaled_point(self, point: Tuple[int, int]) -> Tuple[int, int]:
+        return (self._scaled(point[0]), self._scaled(point[1]))
+    
     def create_canvas(self, dimension: Union[str, Tuple[int, int]] = "square", 
                      color: Tuple[int, int, int] = (0, 0, 0)) -> 'PostGenerator':
         """
@@ -51,14 +103,28 @@ class PostGenerator:
         if isinstance(dimension, str):
             if dimension not in self.DIMENSIONS:
                 raise ValueError(f"Unknown dimension preset: {dimension}. Available: {list(self.DIMENSIONS.keys())}")
-            self.width, self.height = self.DIMENSIONS[dimension]
+            width, height = self.DIMENSIONS[dimension]
         else:
-            self.width, self.height = dimension
+            width, height = dimension
         
+        self.width = self._scaled_size(width)
+        self.height = self._scaled_size(height)
         self.img = Image.new("RGB", (self.width, self.height), color=color)
         self.draw = ImageDraw.Draw(self.img)
         return self
     
+    def load_canvas(self, image: Image.Image) -> 'PostGenerator':
+        """
+        Use a copy of an already rendered image as the canvas
+        
+        Args:
+            image: Image rendered at this generator's scale (e.g. a cached background)
+        """
+        self.img = image.copy()
+        self.width, self.height = self.img.size
+        self.draw = ImageDraw.Draw(self.img)
+        return self
+    
     def apply_gradient(self, start_color: Tuple[int, int, int], 
                       end_color: Tuple[int, int, int],
                       direction: str = "vertical") -> 'PostGenerator':
@@ -131,6 +197,8 @@ class PostGenerator:
             width: Line width
             opacity: Opacity (0-255)
         """
+        spacing = self._scaled_size(spacing)
+        width = self._scaled_size(width)
         overlay = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(overlay)
         
@@ -155,8 +223,7 @@ class PostGenerator:
                          fill=line_color, width=width)
         
         # Composite overlay onto main image
-        self.img = Image.alpha_composite(self.img.convert('RGBA'), overlay).convert('RGB')
-        self.draw = ImageDraw.Draw(self.img)
+        self._composite(overlay)
         return self
     
     def add_geometric_shapes(self, shape_type: str = "circles",
@@ -171,16 +238,19 @@ class PostGenerator:
             opacity: Opacity (0-255)
             count: Number of shapes
         """
-        import random
         overlay = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
         draw = ImageDraw.Draw(overlay)
         
         shape_color = (*color, opacity)
         
+        # Draw positions at full resolution so drafts match the final layout
+        full_width = int(round(self.width / self.scale))
+        full_height = int(round(self.height / self.scale))
+        
         for _ in range(count):
-            x = random.randint(0, self.width)
-            y = random.randint(0, self.height)
-            size = random.randint(50, 200)
+            x = self._scaled(self.rng.randint(0, full_width))
+            y = self._scaled(self.rng.randint(0, full_height))
+            size = self._scaled_size(self.rng.randint(50, 200))
             
             if shape_type == "circles":
                 draw.ellipse([x, y, x + size, y + size], fill=shape_color)
@@ -190,8 +260,7 @@ class PostGenerator:
                 points = [(x, y), (x + size, y), (x + size//2, y - size)]
                 draw.polygon(points, fill=shape_color)
         
-        self.img = Image.alpha_composite(self.img.convert('RGBA'), overlay).convert('RGB')
-        self.draw = ImageDraw.Draw(self.img)
+        self._composite(overlay)
         return self
     
     def add_vignette(self, intensity: float = 0.6) -> 'PostGenerator':
@@ -214,8 +283,7 @@ class PostGenerator:
                 alpha = int(255 * ratio * intensity)
                 draw.point((x, y), fill=(0, 0, 0, alpha))
         
-        self.img = Image.alpha_composite(self.img.convert('RGBA'), overlay).convert('RGB')
-        self.draw = ImageDraw.Draw(self.img)
+        self._composite(overlay)
         return self
     
     def add_noise(self, intensity: int = 10) -> 'PostGenerator':
@@ -225,13 +293,12 @@ class PostGenerator:
         Args:
             intensity: Noise intensity (0-50)
         """
-        import random
         pixels = self.img.load()
         
         for y in range(self.height):
             for x in range(self.width):
                 r, g, b = pixels[x, y]
-                noise = random.randint(-intensity, intensity)
+                noise = self.rng.randint(-intensity, intensity)
                 r = max(0, min(255, r + noise))
                 g = max(0, min(255, g + noise))
                 b = max(0, min(255, b + noise))
@@ -247,8 +314,9 @@ class PostGenerator:
             radius: Blur radius
             region: Optional (x1, y1, x2, y2) to blur only a region
         """
+        radius = radius * self.scale
         if region:
-            x1, y1, x2, y2 = region
+            x1, y1, x2, y2 = (self._scaled(v) for v in region)
             cropped = self.img.crop((x1, y1, x2, y2))
             blurred = cropped.filter(ImageFilter.GaussianBlur(radius))
             self.img.paste(blurred, (x1, y1))
@@ -258,30 +326,69 @@ class PostGenerator:
         self.draw = ImageDraw.Draw(self.img)
         return self
     
-    def add_logo(self, logo_path: str, position: str = "top-left",
+    def _composite(self, overlay: Image.Image):
+        """Composite a full-canvas RGBA overlay, keeping the canvas mode"""
+        composited = Image.alpha_composite(self.img.convert('RGBA'), overlay)
+        self.img = composited if self.img.mode == 'RGBA' else composited.convert('RGB')
+        self.draw = ImageDraw.Draw(self.img)
+    
+    def _paste(self, image: Image.Image, position: Tuple[int, int]):
+        """Draw an RGBA image over the canvas at position"""
+        if self.img.mode == 'RGBA':
+            # paste() would replace the alpha of a transparent canvas; composite instead
+            overlay = Image.new('RGBA', self.img.size, (0, 0, 0, 0))
+            overlay.paste(image, position)
+            self._composite(overlay)
+        else:
+            self.img.paste(image, position, image)
+            self.draw = ImageDraw.Draw(self.img)
+    
+    def add_layer(self, layer: Image.Image) -> 'PostGenerator':
+        """
+        Composite a pre-rendered full-canvas RGBA layer over the canvas
+        
+        Args:
+            layer: Image the size of the canvas, transparent where the canvas shows through
+        """
+        self._paste(layer, (0, 0))
+        return self
+    
+    @staticmethod
+    def _open_image(source: ImageSource) -> Image.Image:
+        """Open an image source as a new RGBA image"""
+        if isinstance(source, Image.Image):
+            return source.convert("RGBA")
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return Image.open(io.BytesIO(source)).convert("RGBA")
+        return Image.open(source).convert("RGBA")
+    
+    def add_logo(self, logo_path: ImageSource, position: str = "top-left",
                 size: Tuple[int, int] = (200, 200),
                 margin: int = 40, custom_position: Optional[Tuple[int, int]] = None) -> 'PostGenerator':
         """
         Add a logo to the canvas
         
         Args:
-            logo_path: Path to logo file
+            logo_path: Path to logo file, encoded image bytes or a PIL image
             position: "top-left", "top-center", "top-right", "bottom-left", "bottom-center", "bottom-right", "center"
             size: Maximum logo size (will maintain aspect ratio)
             margin: Margin from edges
             custom_position: Custom (x, y) position (overrides position preset)
         """
-        if not os.path.exists(logo_path):
+        if isinstance(logo_path, str) and not os.path.exists(logo_path):
             print(f"Warning: Logo file not found: {logo_path}")
             return self
         
+        size = (self._scaled_size(size[0]), self._scaled_size(size[1]))
+        margin = self._scaled(margin)
+        
         try:
-            logo = Image.open(logo_path).convert("RGBA")
+            logo = self._open_image(logo_path)
             logo.thumbnail(size, Image.Resampling.LANCZOS)
             
             # Calculate position
             if custom_position:
-                x, y = custom_position
+                x, y = self._scaled_point(custom_position)
             else:
                 logo_w, logo_h = logo.size
                 
@@ -303,15 +410,14 @@ class PostGenerator:
                     x, y = margin, margin
             
             # Paste logo with transparency
-            self.img.paste(logo, (x, y), logo)
-            self.draw = ImageDraw.Draw(self.img)
+            self._paste(logo, (x, y))
         
         except Exception as e:
             print(f"Warning: Could not add logo. Error: {e}")
         
         return self
     
-    def add_image(self, image_path: str, position: str = "center",
+    def add_image(self, image_path: ImageSource, position: str = "center",
                  size: Optional[Tuple[int, int]] = None,
                  margin: int = 40, custom_position: Optional[Tuple[int, int]] = None,
                  opacity: int = 255) -> 'PostGenerator':
@@ -319,23 +425,32 @@ class PostGenerator:
         Add an additional image overlay to the canvas
         
         Args:
-            image_path: Path to image file
+            image_path: Path to image file, encoded image bytes or a PIL image
             position: "top-left", "top-center", "top-right", "bottom-left", "bottom-center", "bottom-right", "center"
             size: Maximum image size (will maintain aspect ratio), if None uses original size
             margin: Margin from edges
             custom_position: Custom (x, y) position (overrides position preset)
             opacity: Image opacity (0-255)
         """
-        if not os.path.exists(image_path):
+        if isinstance(image_path, str) and not os.path.exists(image_path):
             print(f"Warning: Image file not found: {image_path}")
             return self
         
+        margin = self._scaled(margin)
+        
         try:
-            image = Image.open(image_path).convert("RGBA")
+            image = self._open_image(image_path)
             
-            # Resize if size specified
+            # Resize if size specified; unsized images keep their full-resolution
+            # proportion of the canvas
             if size:
+                size = (self._scaled_size(size[0]), self._scaled_size(size[1]))
                 image.thumbnail(size, Image.Resampling.LANCZOS)
+            elif self.scale != 1.0:
+                image = image.resize(
+                    (self._scaled_size(image.width), self._scaled_size(image.height)),
+                    Image.Resampling.LANCZOS
+                )
             
             # Apply opacity
             if opacity < 255:
@@ -345,7 +460,7 @@ class PostGenerator:
             
             # Calculate position
             if custom_position:
-                x, y = custom_position
+                x, y = self._scaled_point(custom_position)
             else:
                 img_w, img_h = image.size
                 
@@ -367,14 +482,43 @@ class PostGenerator:
                     x, y = margin, margin
             
             # Paste image with transparency
-            self.img.paste(image, (x, y), image)
-            self.draw = ImageDraw.Draw(self.img)
+            self._paste(image, (x, y))
         
         except Exception as e:
             print(f"Warning: Could not add image. Error: {e}")
         
         return self
     
+    def add_background_image(self, image_path: ImageSource, opacity: int = 255) -> 'PostGenerator':
+        """
+        Cover the whole canvas with an image, cropped to the canvas aspect ratio
+        
+        Args:
+            image_path: Path to image file, encoded image bytes or a PIL image
+            opacity: Image opacity (0-255); below 255 the canvas shows through
+        """
+        if isinstance(image_path, str) and not os.path.exists(image_path):
+            print(f"Warning: Image file not found: {image_path}")
+            return self
+        
+        try:
+            image = self._open_image(image_path)
+            if image.size != (self.width, self.height):
+                image = ImageOps.fit(image, (self.width, self.height), Image.Resampling.LANCZOS)
+            
+            # Apply opacity
+            if opacity < 255:
+                alpha = image.split()[3]
+                alpha = ImageEnhance.Brightness(alpha).enhance(opacity / 255.0)
+                image.putalpha(alpha)
+            
+            self._paste(image, (0, 0))
+        
+        except Exception as e:
+            print(f"Warning: Could not add background image. Error: {e}")
+        
+        return self
+    
     def add_text(self, text: str, position: Tuple[int, int],
                 font_path: str = "fonts/Poppins-Bold.ttf", font_size: int = 70,
                 color: Tuple[int, int, int] = (255, 255, 255),
@@ -394,20 +538,25 @@ class PostGenerator:
             shadow: Add shadow effect
             outline: Add outline effect
         """
-        font = self.typography.get_font(font_path, font_size)
+        font = self.typography.get_font(font_path, self._scaled_size(font_size))
+        position = self._scaled_point(position)
         
         if max_width:
             self.typography.draw_multiline_text(
-                self.draw, position, text, font, color, max_width, align=align
+                self.draw, position, text, font, color, self._scaled_size(max_width),
+                line_spacing=self._scaled(10), align=align
             )
         else:
             if shadow:
+                offset = self._scaled_size(3)
                 self.typography.draw_text_with_shadow(
-                    self.draw, position, text, font, color
+                    self.draw, position, text, font, color,
+                    shadow_offset=(offset, offset)
                 )
             elif outline:
                 self.typography.draw_text_with_outline(
-                    self.draw, position, text, font, color
+                    self.draw, position, text, font, color,
+                    outline_width=self._scaled_size(2)
                 )
             else:
                 self.draw.text(position, text, font=font, fill=color)
@@ -433,8 +582,9 @@ class PostGenerator:
             font_size: Font size
             padding: Padding inside box
         """
-        x, y = box_position
-        w, h = box_size
+        x, y = self._scaled_point(box_position)
+        w, h = self._scaled_point(box_size)
+        padding = self._scaled(padding)
         
         # Draw semi-transparent box
         overlay = Image.new('RGBA', (self.width, self.height), (0, 0, 0, 0))
@@ -444,13 +594,14 @@ class PostGenerator:
         self.draw = ImageDraw.Draw(self.img)
         
         # Add text inside box
-        font = self.typography.get_font(font_path, font_size)
+        font = self.typography.get_font(font_path, self._scaled_size(font_size))
         text_x = x + padding
         text_y = y + padding
         max_width = w - (2 * padding)
         
         self.typography.draw_multiline_text(
-            self.draw, (text_x, text_y), text, font, text_color, max_width
+            self.draw, (text_x, text_y), text, font, text_color, max_width,
+            line_spacing=self._scaled(10)
         )
         
         return self
@@ -486,6 +637,28 @@ class PostGenerator:
         print(f"✓ Generated: {output_path}")
         return output_path
     
+    def to_bytes(self, format: str = "PNG", quality: int = 95, optimize: bool = True) -> bytes:
+        """
+        Encode the generated image in memory
+        
+        Args:
+            format: Image format ("PNG" or "JPEG")
+            quality: JPEG quality (1-100)
+            optimize: Optimize file size
+        
+        Returns:
+            Encoded image bytes
+        """
+        if self.img is None:
+            raise ValueError("No image to encode. Generate content first.")
+        
+        buffer = io.BytesIO()
+        if format.upper() in ("JPEG", "JPG"):
+            self.img.convert('RGB').save(buffer, "JPEG", quality=quality, optimize=optimize)
+        else:
+            self.img.save(buffer, format.upper(), optimize=optimize)
+        return buffer.getvalue()
+    
     def show(self):
         """Display the image"""
         if self.img:
@@ -0,0 +1,44 @@
+"""
+Shared Render Resources for Post Generator
+Holds the immutable, thread-safe state that many renders can share
+"""
+
+import os
+import threading
+from typing import Dict
+from .typography import Typography
+
+
+class RenderResources:
+    """
+    Fonts, caches and assets shared between renders
+
+    A single instance can back any number of PostGenerator objects running
+    on different threads. Everything that changes during a render (canvas,
+    draw handle, random state) lives on the PostGenerator itself.
+    """
+    
+    def __init__(self, base_path: str = "."):
+        """
+        Initialize shared resources
+        
+        Args:
+            base_path: Base directory path for fonts and assets
+        """
+        self.base_path = base_path
+        self.typography = Typography(base_path)
+
+
+_shared_resources: Dict[str, RenderResources] = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_resources(base_path: str = ".") -> RenderResources:
+    """Get the process-wide resources for a base path, creating them once"""
+    key = os.path.abspath(base_path)
+    with _shared_lock:
+        resources = _shared_resources.get(key)
+        if resources is None:
+            resources = RenderResources(base_path)
+            _shared_resources[key] = resources
+        return resources
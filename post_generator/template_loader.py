@@ -3,10 +3,25 @@ Template Loader for Post Generator
 Loads and manages post templates from JSON files
 """
 
+import glob
+import hashlib
 import json
 import os
-from typing import Dict, Any, List, Optional
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass, asdict
+from PIL import Image
+from .color_schemes import ColorSchemes
+from .generator import PostGenerator
+
+
+# Seconds between checks of the template directory for changed files
+# (0 checks on every lookup)
+TEMPLATE_RELOAD_INTERVAL = float(os.getenv("TEMPLATE_RELOAD_INTERVAL", "2"))
+
+# Bump to invalidate every stored background after a change to the drawing code
+TEMPLATE_BACKGROUND_VERSION = "2"
 
 
 @dataclass
@@ -78,6 +93,98 @@ class PostTemplate:
     def from_dict(cls, data: Dict[str, Any]) -> 'PostTemplate':
         """Create template from dictionary"""
         return cls(**data)
+    
+    def validate(self):
+        """
+        Check that the template only references known presets
+        
+        Raises:
+            ValueError: If the dimension, background type or color scheme is unknown
+        """
+        if self.dimension not in PostGenerator.DIMENSIONS:
+            raise ValueError(f"Unknown dimension preset: {self.dimension}")
+        if self.background_type not in ("solid", "gradient", "pattern"):
+            raise ValueError(f"Unknown background type: {self.background_type}")
+        ColorSchemes.get_scheme(self.color_scheme)
+    
+    def render_background(self, generator: PostGenerator) -> PostGenerator:
+        """
+        Draw the text- and logo-independent layer of the template
+        
+        Args:
+            generator: Generator to draw on; a new canvas is created at its scale
+        """
+        self.render_base(generator)
+        self.render_decorations(generator)
+        if self.add_noise:
+            generator.add_noise(self.noise_intensity)
+        
+        return generator
+    
+    def render_base(self, generator: PostGenerator) -> PostGenerator:
+        """
+        Draw the canvas color and gradient of the template
+        
+        Args:
+            generator: Generator to draw on; a new canvas is created at its scale
+        """
+        color_scheme = ColorSchemes.get_scheme(self.color_scheme)
+        
+        generator.create_canvas(self.dimension, color_scheme.get_background_rgb())
+        
+        if self.background_type == "gradient":
+            generator.apply_gradient(
+                color_scheme.get_primary_rgb(),
+                color_scheme.get_secondary_rgb(),
+                self.gradient_direction
+            )
+        
+        return generator
+    
+    def render_decorations(self, generator: PostGenerator) -> PostGenerator:
+        """
+        Draw the pattern, shapes and vignette of the template
+        
+        Shapes are seeded from the template settings, so they are the same at
+        every scale and whether drawn onto the base or onto a separate layer.
+        
+        Args:
+            generator: Generator whose canvas (opaque or transparent) to draw on
+        """
+        color_scheme = ColorSchemes.get_scheme(self.color_scheme)
+        generator.rng.seed(self.seed)
+        
+        if self.pattern_type:
+            if self.pattern_type == "lines":
+                generator.add_pattern_lines(
+                    color_scheme.get_accent_rgb(),
+                    spacing=self.pattern_spacing,
+                    angle=self.pattern_angle
+                )
+            else:
+                generator.add_geometric_shapes(
+                    self.pattern_type,
+                    color_scheme.get_accent_rgb()
+                )
+        
+        if self.add_vignette:
+            generator.add_vignette(self.vignette_intensity)
+        
+        return generator
+    
+    @property
+    def seed(self) -> int:
+        """Seed for the template's shapes and noise, derived from its settings"""
+        canonical = json.dumps(self.to_dict(), sort_keys=True, separators=(",", ":"))
+        return int(hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16], 16)
+    
+    def background_key(self, scale: float = 1.0) -> str:
+        """Version of the background layer: changes whenever its pixels would"""
+        canonical = json.dumps(
+            {"version": TEMPLATE_BACKGROUND_VERSION, "scale": scale, "template": self.to_dict()},
+            sort_keys=True, separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
 
 
 class TemplateLoader:
@@ -105,6 +212,7 @@ class TemplateLoader:
         
         with open(template_path, 'w') as f:
             json.dump(template.to_dict(), f, indent=2)
+        get_template_registry(self.template_dir).invalidate()
         
         print(f"✓ Saved template: {template_path}")
     
@@ -126,6 +234,7 @@ class TemplateLoader:
         
         if os.path.exists(template_path):
             os.remove(template_path)
+            get_template_registry(self.template_dir).invalidate()
             print(f"✓ Deleted template: {name}")
         else:
             print(f"Template '{name}' not found")
@@ -271,3 +380,208 @@ class TemplateLoader:
             self.save_template(template)
         
         print(f"✓ Created {len(templates)} default templates")
+
+
+class TemplateRegistry:
+    """
+    Process-wide, in-memory view of a template directory
+    
+    Templates are parsed and validated once and served from a dict. The
+    directory is re-scanned at most every reload_interval seconds; only
+    files whose modification time changed are parsed again, and deleted
+    files are dropped. Files that fail to parse or validate are skipped
+    with a warning until they change.
+    
+    Template backgrounds are pre-rendered on first use and stored next to
+    the template JSON as <name>.bg-<scale>x-<version>.png, where the version
+    hashes the template settings. Older versions are removed when replaced.
+    The base and overlay layers used under lead images are stored the same
+    way as <name>.base-... and <name>.overlay-...
+    """
+    
+    def __init__(self, template_dir: str = "templates",
+                 reload_interval: float = TEMPLATE_RELOAD_INTERVAL):
+        self.template_dir = template_dir
+        self.reload_interval = reload_interval
+        self._templates: Dict[str, Tuple[float, Optional[PostTemplate]]] = {}
+        self._last_scan: Optional[float] = None
+        self._lock = threading.Lock()
+        self._backgrounds: Dict[Tuple[str, float, str], Tuple[str, Image.Image]] = {}
+        self._background_locks: Dict[Tuple[str, float, str], threading.Lock] = {}
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.template_dir, f"{name}.json")
+    
+    def _refresh(self, force: bool = False):
+        now = time.monotonic()
+        if (not force and self._last_scan is not None
+                and now - self._last_scan < self.reload_interval):
+            return
+        
+        with self._lock:
+            if (not force and self._last_scan is not None
+                    and now - self._last_scan < self.reload_interval):
+                return
+            
+            mtimes = {}
+            if os.path.isdir(self.template_dir):
+                for entry in os.scandir(self.template_dir):
+                    if entry.name.endswith('.json') and entry.is_file():
+                        mtimes[entry.name[:-len('.json')]] = entry.stat().st_mtime
+            
+            templates = {}
+            for name, mtime in mtimes.items():
+                cached = self._templates.get(name)
+                if cached is not None and cached[0] == mtime:
+                    templates[name] = cached
+                else:
+                    templates[name] = (mtime, self._load(name))
+            
+            self._templates = templates
+            self._last_scan = now
+    
+    def _load(self, name: str) -> Optional[PostTemplate]:
+        try:
+            with open(self._path(name), 'r') as f:
+                template = PostTemplate.from_dict(json.load(f))
+            template.validate()
+            return template
+        except Exception as e:
+            print(f"Warning: Skipping invalid template '{name}'. Error: {e}")
+            return None
+    
+    def get(self, name: str) -> PostTemplate:
+        """
+        Get a parsed template by name
+        
+        Raises:
+            FileNotFoundError: If the template does not exist or is invalid
+        """
+        self._refresh()
+        cached = self._templates.get(name)
+        if cached is None or cached[1] is None:
+            raise FileNotFoundError(f"Template '{name}' not found at {self._path(name)}")
+        return cached[1]
+    
+    def mtime(self, name: str) -> Optional[float]:
+        """Modification time of the loaded template file, or None if unknown"""
+        self._refresh()
+        cached = self._templates.get(name)
+        return cached[0] if cached is not None else None
+    
+    def names(self) -> List[str]:
+        """Names of all valid templates"""
+        self._refresh()
+        return sorted(name for name, (_, template) in self._templates.items() if template is not None)
+    
+    def invalidate(self):
+        """Re-scan the directory on the next lookup"""
+        self._last_scan = None
+    
+    def get_background(self, name: str, scale: float = 1.0) -> Image.Image:
+        """
+        Get the pre-rendered background layer of a template
+        
+        Served from memory, then from the stored asset, and rendered (and
+        stored) only when neither matches the current template version.
+        The returned image is shared: copy it before drawing on it.
+        
+        Args:
+            name: Template name
+            scale: Render scale (1.0 for full size)
+        
+        Raises:
+            FileNotFoundError: If the template does not exist or is invalid
+        """
+        return self._get_layer(name, scale, "bg")
+    
+    def get_background_layers(self, name: str, scale: float = 1.0) -> Tuple[Image.Image, Image.Image]:
+        """
+        Get the background of a template split into (base, overlay) layers
+        
+        The base holds the canvas and gradient; the transparent overlay holds
+        the pattern, shapes and vignette, so an image can be drawn between
+        them. Noise has no overlay form and is left out. Stored and served
+        like get_background; the returned images are shared.
+        
+        Raises:
+            FileNotFoundError: If the template does not exist or is invalid
+        """
+        return self._get_layer(name, scale, "base"), self._get_layer(name, scale, "overlay")
+    
+    def _get_layer(self, name: str, scale: float, layer: str) -> Image.Image:
+        template = self.get(name)
+        key = template.background_key(scale)
+        cache_key = (name, scale, layer)
+        
+        cached = self._backgrounds.get(cache_key)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        
+        with self._lock:
+            lock = self._background_locks.setdefault(cache_key, threading.Lock())
+        
+        with lock:
+            cached = self._backgrounds.get(cache_key)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+            
+            mode = "RGBA" if layer == "overlay" else "RGB"
+            prefix = os.path.join(self.template_dir, f"{name}.{layer}-{scale:g}x-")
+            path = f"{prefix}{key}.png"
+            background = None
+            if os.path.exists(path):
+                try:
+                    with Image.open(path) as stored:
+                        background = stored.convert(mode)
+                except OSError as e:
+                    print(f"Warning: Could not read template background {path}. Error: {e}")
+            
+            if background is None:
+                background = self._render_layer(template, scale, layer)
+                self._store_background(prefix, path, background)
+            
+            self._backgrounds[cache_key] = (key, background)
+            return background
+    
+    @staticmethod
+    def _render_layer(template: PostTemplate, scale: float, layer: str) -> Image.Image:
+        if layer == "bg":
+            return template.render_background(PostGenerator(scale=scale)).img
+        base = template.render_base(PostGenerator(scale=scale)).img
+        if layer == "base":
+            return base
+        overlay = PostGenerator(scale=scale).load_canvas(Image.new("RGBA", base.size, (0, 0, 0, 0)))
+        return template.render_decorations(overlay).img
+    
+    def _store_background(self, prefix: str, path: str, background: Image.Image):
+        """Write a background asset and remove older versions of it"""
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            background.save(tmp_path, format="PNG")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not store template background {path}. Error: {e}")
+            return
+        
+        for old_path in glob.glob(glob.escape(prefix) + "*.png"):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+
+_registries: Dict[str, TemplateRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_template_registry(template_dir: str = "templates") -> TemplateRegistry:
+    """Get the process-wide template registry for a directory, creating it once"""
+    key = os.path.abspath(template_dir)
+    with _registries_lock:
+        registry = _registries.get(key)
+        if registry is None:
+            registry = TemplateRegistry(template_dir)
+            _registries[key] = registry
+        return registry
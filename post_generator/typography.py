@@ -6,6 +6,7 @@ Handles text rendering, wrapping, and font management
 from typing import Tuple, List, Optional
 from PIL import Image, ImageDraw, ImageFont
 import textwrap
+import threading
 import os
 
 
@@ -30,14 +31,23 @@ class Typography:
     def __init__(self, base_path: str = "."):
         self.base_path = base_path
         self.font_cache = {}
+        self._cache_lock = threading.Lock()
     
     def get_font(self, font_path: str, size: int) -> ImageFont.FreeTypeFont:
-        """Get a font with caching"""
+        """Get a font with caching (safe to call from multiple threads)"""
         cache_key = f"{font_path}_{size}"
         
-        if cache_key in self.font_cache:
-            return self.font_cache[cache_key]
+        font = self.font_cache.get(cache_key)
+        if font is not None:
+            return font
         
+        with self._cache_lock:
+            if cache_key in self.font_cache:
+                return self.font_cache[cache_key]
+            return self._load_font(font_path, size, cache_key)
+    
+    def _load_font(self, font_path: str, size: int, cache_key: str) -> ImageFont.FreeTypeFont:
+        """Load a font from disk and store it in the cache"""
         # Try custom font first
         full_path = os.path.join(self.base_path, font_path)
         
@@ -0,0 +1,186 @@
+"""
+Render Cache for Post Generator API
+Content-addressed cache of encoded posts with a memory tier and a disk tier
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+# Bump to invalidate every cached render after a change to the pipeline output
+RENDER_CACHE_VERSION = "2"
+
+RENDER_CACHE_MEMORY_BYTES = int(os.getenv("RENDER_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+RENDER_CACHE_DISK_BYTES = int(os.getenv("RENDER_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+RENDER_CACHE_DIR = os.getenv(
+    "RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "post_generator_cache")
+)
+
+
+def render_key(spec: Dict[str, Any], assets: Optional[Dict[str, Optional[bytes]]] = None) -> str:
+    """
+    Canonical hash of a render request
+    
+    Args:
+        spec: Normalized request fields (defaults filled in)
+        assets: Uploaded files by role (e.g. "logo"); hashed by content
+    
+    Returns:
+        Hex digest that is identical for identical renders
+    """
+    asset_hashes = {
+        name: hashlib.sha256(data).hexdigest()
+        for name, data in (assets or {}).items()
+        if data is not None
+    }
+    canonical = json.dumps(
+        {"version": RENDER_CACHE_VERSION, "spec": spec, "assets": asset_hashes},
+        sort_keys=True, separators=(",", ":"), default=str
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(
+        tag == etag or tag == f"W/{etag}" for tag in candidates
+    )
+
+
+class RenderCache:
+    """
+    Two-tier cache of encoded renders keyed by render_key
+    
+    The memory tier is an LRU bounded by total bytes. The disk tier keeps one
+    file per key under cache_dir and evicts least recently used files once
+    disk_bytes is exceeded. Set disk_bytes to 0 to disable the disk tier.
+    """
+    
+    def __init__(self, memory_bytes: int = RENDER_CACHE_MEMORY_BYTES,
+                 disk_bytes: int = RENDER_CACHE_DISK_BYTES,
+                 cache_dir: str = RENDER_CACHE_DIR):
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.cache_dir = cache_dir
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_total = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()
+        self._disk_total = 0
+        self._lock = threading.Lock()
+        
+        if self.disk_bytes > 0:
+            os.makedirs(cache_dir, exist_ok=True)
+            self._load_disk_index()
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.bin")
+    
+    def _load_disk_index(self):
+        """Index existing cache files, oldest first"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".bin"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_total += size
+    
+    def get_memory(self, key: str) -> Optional[bytes]:
+        """Look up the memory tier only"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+            return data
+    
+    def get(self, key: str) -> Optional[bytes]:
+        """Look up both tiers, promoting disk hits into memory"""
+        data = self.get_memory(key)
+        if data is not None or self.disk_bytes <= 0:
+            return data
+        
+        with self._lock:
+            if key not in self._disk:
+                return None
+            self._disk.move_to_end(key)
+        
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self._lock:
+                self._disk_total -= self._disk.pop(key, 0)
+            return None
+        
+        self._put_memory(key, data)
+        return data
+    
+    def put(self, key: str, data: bytes):
+        """Store data in both tiers"""
+        self._put_memory(key, data)
+        if self.disk_bytes > 0 and len(data) <= self.disk_bytes:
+            self._put_disk(key, data)
+    
+    def _put_memory(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_total -= len(self._memory.pop(key))
+            self._memory[key] = data
+            self._memory_total += len(data)
+            while self._memory_total > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_total -= len(evicted)
+    
+    def _put_disk(self, key: str, data: bytes):
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not write render cache entry. Error: {e}")
+            return
+        
+        evicted = []
+        with self._lock:
+            self._disk_total -= self._disk.pop(key, 0)
+            self._disk[key] = len(data)
+            self._disk_total += len(data)
+            while self._disk_total > self.disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_total -= size
+                evicted.append(old_key)
+        
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+
+_render_cache: Optional[RenderCache] = None
+
+
+def get_render_cache() -> RenderCache:
+    """Get the process-wide render cache"""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
@@ -0,0 +1,628 @@
+"""
+Render Service for Post Generator API
+Runs the post rendering pipeline off the event loop on a bounded worker pool
+"""
+
+import asyncio
+import functools
+import io
+import os
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+from PIL import Image
+from image_cache import ImageCache, get_image_cache
+from post_generator import PostGenerator, get_shared_resources
+from post_generator.generator import ImageSource
+from post_generator.color_schemes import ColorSchemes
+from post_generator.template_loader import get_template_registry
+from render_cache import render_key
+
+
+# Worker pool configuration
+RENDER_EXECUTOR = os.getenv("RENDER_EXECUTOR", "thread")  # "thread" or "process"
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+RENDER_MAX_CONCURRENCY = int(os.getenv("RENDER_MAX_CONCURRENCY", str(RENDER_WORKERS * 2)))
+
+# Batch endpoints get their own pool so large batches never starve single renders
+BATCH_EXECUTOR = os.getenv("BATCH_EXECUTOR", "process")
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", str(os.cpu_count() or 1)))
+
+# Memory budget for rendered images kept for later download
+ARTIFACT_STORE_BYTES = int(os.getenv("ARTIFACT_STORE_BYTES", str(256 * 1024 * 1024)))
+
+# Fonts loaded into every worker before its first render
+WARM_FONTS = [
+    ("fonts/Poppins-Bold.ttf", 70),
+    ("fonts/Poppins-Regular.ttf", 40),
+    ("fonts/Poppins-Regular.ttf", 35),
+]
+
+
+# Spec fields that change per post or per render but not the background
+BACKGROUND_INDEPENDENT_FIELDS = ("text", "subtext", "textbox_content", "draft")
+
+
+def hex_to_rgb(hex_color: str) -> tuple:
+    """Convert hex color to RGB tuple"""
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+
+def background_seed(spec: Dict[str, Any]) -> int:
+    """
+    Seed for the random shapes and noise of a spec's background
+    
+    Derived from the background fields only, so every post, scale and
+    layered render of one design draws the same shapes.
+    """
+    fields = {
+        name: value for name, value in spec.items()
+        if name not in BACKGROUND_INDEPENDENT_FIELDS
+    }
+    return int(render_key(fields)[:16], 16)
+
+
+def build_post(spec: Dict[str, Any], logo: Optional[ImageSource] = None,
+               additional_image: Optional[ImageSource] = None,
+               additional_image_position: str = "center",
+               additional_image_size: Optional[int] = None,
+               additional_image_opacity: int = 255) -> PostGenerator:
+    """
+    Render a post from a request spec
+    
+    Args:
+        spec: PostRequest fields as a plain dict
+        logo: Optional logo (path or encoded bytes)
+        additional_image: Optional overlay image (path or encoded bytes)
+        additional_image_position: Overlay position preset
+        additional_image_size: Maximum overlay size (None keeps original)
+        additional_image_opacity: Overlay opacity (0-255)
+    
+    Returns:
+        The generator holding the rendered image
+    """
+    generator = build_background(
+        spec, logo, additional_image,
+        additional_image_position, additional_image_size, additional_image_opacity
+    )
+    add_post_text(generator, spec)
+    return generator
+
+
+def build_background(spec: Dict[str, Any], logo: Optional[ImageSource] = None,
+                     additional_image: Optional[ImageSource] = None,
+                     additional_image_position: str = "center",
+                     additional_image_size: Optional[int] = None,
+                     additional_image_opacity: int = 255) -> PostGenerator:
+    """
+    Render the text-independent layer of a post: background, effects and images
+    
+    Takes the same arguments as build_post; the text fields of spec are ignored.
+    """
+    generator = PostGenerator(draft=spec.get("draft", False), seed=background_seed(spec))
+    
+    if spec.get("template"):
+        _build_template_background(generator, spec, logo)
+        return generator
+    
+    _build_canvas(generator, spec)
+    _add_decorations(generator, spec)
+    
+    # Effects
+    if spec["add_vignette"]:
+        generator.add_vignette(spec["vignette_intensity"])
+    if spec["add_noise"]:
+        generator.add_noise(spec["noise_intensity"])
+    if spec["add_blur"]:
+        generator.add_blur(spec["blur_radius"])
+    
+    # Logo
+    if logo:
+        generator.add_logo(logo, position=spec["logo_position"],
+                           size=(spec["logo_size"], spec["logo_size"]))
+    
+    # Additional image
+    if additional_image:
+        img_size = (additional_image_size, additional_image_size) if additional_image_size else None
+        generator.add_image(
+            additional_image,
+            position=additional_image_position,
+            size=img_size,
+            opacity=additional_image_opacity
+        )
+    
+    return generator
+
+
+def build_background_layers(spec: Dict[str, Any],
+                            logo: Optional[ImageSource] = None) -> Tuple[Image.Image, Image.Image]:
+    """
+    Render the background of a post as two layers, for drawing an image in between
+    
+    The base is the canvas and gradient. The overlay is transparent and
+    holds what is drawn over the background: patterns, shapes, the vignette
+    and the logo. Shapes are seeded as in build_background, so they match
+    the single-layer render. Noise and blur change the pixels beneath them,
+    so they have no overlay form and are left out.
+    
+    Returns:
+        (base, overlay) images at the spec's render scale
+    """
+    draft = spec.get("draft", False)
+    if spec.get("template"):
+        registry = get_template_registry()
+        template = registry.get(spec["template"])
+        overlay = PostGenerator(draft=draft)
+        base, decorations = registry.get_background_layers(spec["template"], overlay.scale)
+        overlay.load_canvas(decorations)
+        if logo:
+            overlay.add_logo(logo, position=template.logo_position,
+                             size=template.logo_size, margin=template.logo_margin)
+        return base, overlay.img
+    
+    base = PostGenerator(draft=draft)
+    _build_canvas(base, spec)
+    overlay = PostGenerator(draft=draft, seed=background_seed(spec)).load_canvas(
+        Image.new("RGBA", base.img.size, (0, 0, 0, 0))
+    )
+    _add_decorations(overlay, spec)
+    if spec["add_vignette"]:
+        overlay.add_vignette(spec["vignette_intensity"])
+    if logo:
+        overlay.add_logo(logo, position=spec["logo_position"],
+                         size=(spec["logo_size"], spec["logo_size"]))
+    return base.img, overlay.img
+
+
+def _build_canvas(generator: PostGenerator, spec: Dict[str, Any]):
+    """Create the canvas in its background color or gradient"""
+    canvas_size = spec["dimension"]
+    if spec["dimension"] == "custom" and spec["custom_width"] and spec["custom_height"]:
+        canvas_size = (spec["custom_width"], spec["custom_height"])
+    
+    # Background
+    bg_color = (0, 0, 0)
+    if spec["color_scheme"]:
+        scheme = ColorSchemes.get_scheme(spec["color_scheme"])
+        bg_color = scheme.get_background_rgb()
+    elif spec["bg_color"]:
+        bg_color = hex_to_rgb(spec["bg_color"])
+    
+    generator.create_canvas(canvas_size, bg_color)
+    
+    # Gradient
+    if spec["gradient_start"] and spec["gradient_end"]:
+        start = hex_to_rgb(spec["gradient_start"])
+        end = hex_to_rgb(spec["gradient_end"])
+        generator.apply_gradient(start, end, spec["gradient_direction"])
+
+
+def _add_decorations(generator: PostGenerator, spec: Dict[str, Any]):
+    """Draw the line pattern and geometric shapes"""
+    if spec["pattern"] == 'lines':
+        pattern_color = hex_to_rgb(spec["pattern_color"]) if spec["pattern_color"] else (255, 255, 255)
+        generator.add_pattern_lines(
+            color=pattern_color,
+            spacing=spec["pattern_spacing"],
+            angle=spec["pattern_angle"],
+            width=spec["pattern_width"],
+            opacity=spec["pattern_opacity"]
+        )
+    
+    if spec["shape_type"]:
+        shape_color = hex_to_rgb(spec["shape_color"]) if spec["shape_color"] else (255, 255, 255)
+        generator.add_geometric_shapes(
+            spec["shape_type"],
+            color=shape_color,
+            opacity=spec["shape_opacity"],
+            count=spec["shape_count"]
+        )
+
+
+def add_post_text(generator: PostGenerator, spec: Dict[str, Any]):
+    """Draw the text, subtext and text box of a post onto a rendered background"""
+    if spec.get("template"):
+        _add_template_text(generator, spec)
+        return
+    
+    # Main text
+    text_color = hex_to_rgb(spec["text_color"])
+    generator.add_text(
+        spec["text"],
+        position=(spec["text_x"], spec["text_y"]),
+        font_size=spec["font_size"],
+        color=text_color,
+        max_width=spec["text_max_width"],
+        shadow=spec["text_shadow"],
+        outline=spec["text_outline"]
+    )
+    
+    # Subtext
+    if spec["subtext"]:
+        subtext_color = hex_to_rgb(spec["subtext_color"]) if spec["subtext_color"] else text_color
+        generator.add_text(
+            spec["subtext"],
+            position=(spec["subtext_x"], spec["subtext_y"]),
+            font_size=spec["subtext_font_size"],
+            color=subtext_color,
+            max_width=spec["text_max_width"]
+        )
+    
+    # Text box
+    if spec["add_textbox"] and spec["textbox_content"]:
+        tb_bg = hex_to_rgb(spec["textbox_bg_color"]) + (spec["textbox_bg_opacity"],)
+        tb_text = hex_to_rgb(spec["textbox_text_color"])
+        generator.add_text_box(
+            spec["textbox_content"],
+            box_position=(spec["textbox_x"], spec["textbox_y"]),
+            box_size=(spec["textbox_width"], spec["textbox_height"]),
+            bg_color=tb_bg,
+            text_color=tb_text,
+            font_size=spec["textbox_font_size"],
+            padding=spec["textbox_padding"]
+        )
+
+
+LEAD_IMAGE_MODES = ("overlay", "background")
+
+
+def add_lead_image(generator: PostGenerator, url: str, mode: str = "overlay",
+                   position: str = "center", size: int = 600, opacity: int = 255,
+                   cache: Optional[ImageCache] = None):
+    """
+    Draw a web image (e.g. an article's lead image) onto a post
+    
+    The image comes from the image cache already decoded at the size this
+    canvas needs, so draft and full renders of the same article share one
+    download.
+    
+    Args:
+        generator: Generator with its background loaded
+        url: Image URL
+        mode: "overlay" (placed like add_image) or "background" (covers the canvas)
+        position: Overlay position preset
+        size: Overlay bounding box edge, at full resolution
+        opacity: Image opacity (0-255)
+        cache: Image cache (defaults to the process-wide one)
+    """
+    cache = cache or get_image_cache()
+    if mode == "background":
+        image = cache.get_image(url, (generator.width, generator.height), "cover")
+        generator.add_background_image(image, opacity=opacity)
+    else:
+        box = max(1, int(round(size * generator.scale)))
+        image = cache.get_image(url, (box, box), "contain")
+        generator.add_image(image, position=position, size=(size, size), opacity=opacity)
+
+
+def _build_template_background(generator: PostGenerator, spec: Dict[str, Any],
+                               logo: Optional[ImageSource] = None):
+    """Render the background layer of a saved template"""
+    registry = get_template_registry()
+    template = registry.get(spec["template"])
+    
+    # Canvas, gradient, pattern and effects come pre-rendered
+    generator.load_canvas(registry.get_background(spec["template"], generator.scale))
+    
+    if logo:
+        generator.add_logo(logo, position=template.logo_position,
+                           size=template.logo_size, margin=template.logo_margin)
+
+
+def _add_template_text(generator: PostGenerator, spec: Dict[str, Any]):
+    """Draw headline and subheadline using a saved template's layout"""
+    template = get_template_registry().get(spec["template"])
+    color_scheme = ColorSchemes.get_scheme(template.color_scheme)
+    
+    generator.add_text(
+        spec["text"],
+        position=tuple(template.headline_position),
+        font_size=template.headline_size,
+        color=color_scheme.get_text_rgb(),
+        max_width=template.headline_max_width,
+        shadow=template.headline_shadow,
+        outline=template.headline_outline
+    )
+    
+    if spec["subtext"] and template.has_subheadline:
+        generator.add_text(
+            spec["subtext"],
+            position=tuple(template.subheadline_position),
+            font_path=template.subheadline_font,
+            font_size=template.subheadline_size,
+            color=color_scheme.get_text_rgb(),
+            max_width=template.subheadline_max_width
+        )
+
+
+def render_post_to_bytes(spec: Dict[str, Any], logo: Optional[ImageSource] = None,
+                         **kwargs) -> bytes:
+    """Render a post and encode it as PNG in memory; runs inside a pool worker"""
+    return build_post(spec, logo=logo, **kwargs).to_bytes("PNG")
+
+
+def render_post_timed(spec: Dict[str, Any], logo: Optional[ImageSource] = None,
+                      **kwargs) -> Tuple[bytes, float]:
+    """Render a post to PNG bytes, also returning the render time in milliseconds"""
+    start = time.perf_counter()
+    png = render_post_to_bytes(spec, logo=logo, **kwargs)
+    return png, (time.perf_counter() - start) * 1000
+
+
+def warm_worker():
+    """Load the common fonts into this process's shared resources"""
+    typography = get_shared_resources().typography
+    for font_path, size in WARM_FONTS:
+        typography.get_font(font_path, size)
+
+
+class RenderPool:
+    """
+    Bounded worker pool for CPU-bound rendering
+    
+    Renders run on a thread or process pool so the event loop stays free
+    for I/O. At most max_concurrency renders are in flight; further callers
+    wait asynchronously for a slot instead of piling work onto the pool.
+    """
+    
+    def __init__(self, kind: str = RENDER_EXECUTOR, workers: int = RENDER_WORKERS,
+                 max_concurrency: int = RENDER_MAX_CONCURRENCY,
+                 initializer: Optional[Callable] = None):
+        """
+        Initialize the render pool
+        
+        Args:
+            kind: "thread" or "process"
+            workers: Number of pool workers
+            max_concurrency: Maximum renders submitted at once
+            initializer: Called once in each worker before its first task
+        """
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown render executor '{kind}'. Use 'thread' or 'process'")
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_concurrency = max(1, max_concurrency)
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    @property
+    def executor(self) -> Executor:
+        """The underlying executor, created on first use"""
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=self.initializer
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="render",
+                    initializer=self.initializer
+                )
+        return self._executor
+    
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        """Render slots, created on first use"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+    
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on the pool and await its result"""
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, functools.partial(func, *args, **kwargs)
+            )
+    
+    async def run_local(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) in this process, within the same render slots
+        
+        For renders that need state owned by this process (e.g. a compiled
+        design's cached background), which cannot be sent to a process pool.
+        A thread pool runs them on its own workers; a process pool runs them
+        on a thread of this process.
+        """
+        if self.kind != "process":
+            return await self.run(func, *args, **kwargs)
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+    
+    async def map(self, func: Callable, arg_list: Iterable[Tuple]) -> List[Tuple[Any, Optional[Exception]]]:
+        """
+        Run func over many argument tuples in parallel
+        
+        Returns:
+            One (result, error) pair per input, in input order. A failing
+            item sets its error and leaves the rest of the batch running.
+        """
+        outcomes = await asyncio.gather(
+            *(self.run(func, *args) for args in arg_list),
+            return_exceptions=True
+        )
+        return [
+            (None, outcome) if isinstance(outcome, Exception) else (outcome, None)
+            for outcome in outcomes
+        ]
+    
+    async def imap_unordered(self, func: Callable,
+                             arg_list: Iterable[Tuple]) -> AsyncIterator[Tuple[int, Any, Optional[Exception]]]:
+        """
+        Run func over many argument tuples, yielding results as they finish
+        
+        Yields:
+            (index, result, error) for each input in completion order. At most
+            max_concurrency items are in flight, so finished results never pile
+            up faster than the consumer takes them.
+        """
+        pending = {}
+        args_iter = iter(enumerate(arg_list))
+        
+        def submit_next() -> bool:
+            try:
+                index, args = next(args_iter)
+            except StopIteration:
+                return False
+            pending[asyncio.ensure_future(self.run(func, *args))] = index
+            return True
+        
+        try:
+            while len(pending) < self.max_concurrency and submit_next():
+                pass
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = pending.pop(task)
+                    error = task.exception()
+                    yield index, (None if error else task.result()), error
+                    submit_next()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    def shutdown(self, wait: bool = True):
+        """Stop the pool workers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+        self._semaphore = None
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that hands written bytes back in chunks"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[bytes]:
+    """
+    Build a ZIP archive incrementally from (name, data) pairs
+    
+    Each entry is yielded as soon as it is written, so the first bytes go out
+    after the first entry rather than after the whole archive. Entries are
+    stored uncompressed: PNGs are already compressed and deflating them again
+    only costs CPU.
+    """
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as zip_file:
+        async for name, data in entries:
+            zip_file.writestr(name, data)
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+class ArtifactStore:
+    """
+    In-memory store for rendered images that clients fetch later by id
+    
+    Bounded by total size: once max_bytes is exceeded the least recently
+    used artifacts are dropped. Pinned artifacts (e.g. the results of a
+    render job still listed by the job API) count towards the size but are
+    never dropped until they are unpinned.
+    """
+    
+    def __init__(self, max_bytes: int = ARTIFACT_STORE_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._items: "OrderedDict[str, Tuple[bytes, str]]" = OrderedDict()
+        self._pinned = set()
+        self._lock = threading.Lock()
+    
+    def put(self, data: bytes, media_type: str = "image/png", pinned: bool = False) -> str:
+        """Store data and return its artifact id"""
+        artifact_id = uuid.uuid4().hex
+        with self._lock:
+            self._items[artifact_id] = (data, media_type)
+            self.total_bytes += len(data)
+            if pinned:
+                self._pinned.add(artifact_id)
+            self._evict()
+        return artifact_id
+    
+    def unpin(self, artifact_ids: Iterable[str]):
+        """Let pinned artifacts be evicted again like any other"""
+        with self._lock:
+            self._pinned.difference_update(artifact_ids)
+            self._evict()
+    
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        # Oldest first; the newest artifact is always kept
+        for artifact_id in list(self._items)[:-1]:
+            if self.total_bytes <= self.max_bytes:
+                break
+            if artifact_id in self._pinned:
+                continue
+            evicted, _ = self._items.pop(artifact_id)
+            self.total_bytes -= len(evicted)
+    
+    def get(self, artifact_id: str) -> Optional[Tuple[bytes, str]]:
+        """Get (data, media_type) for an artifact, or None if unknown or evicted"""
+        with self._lock:
+            item = self._items.get(artifact_id)
+            if item is not None:
+                self._items.move_to_end(artifact_id)
+            return item
+
+
+_artifact_store: Optional[ArtifactStore] = None
+_render_pool: Optional[RenderPool] = None
+_batch_pool: Optional[RenderPool] = None
+
+
+def get_render_pool() -> RenderPool:
+    """Get the process-wide render pool"""
+    global _render_pool
+    if _render_pool is None:
+        _render_pool = RenderPool(initializer=warm_worker)
+    return _render_pool
+
+
+def get_batch_pool() -> RenderPool:
+    """Get the process-wide pool used by batch endpoints"""
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = RenderPool(
+            kind=BATCH_EXECUTOR,
+            workers=BATCH_WORKERS,
+            max_concurrency=BATCH_WORKERS * 2,
+            initializer=warm_worker
+        )
+    return _batch_pool
+
+
+def get_artifact_store() -> ArtifactStore:
+    """Get the process-wide artifact store"""
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = ArtifactStore()
+    return _artifact_store
+
+
+def shutdown_pools():
+    """Stop every render pool"""
+    for pool in (_render_pool, _batch_pool):
+        if pool is not None:
+            pool.shutdown(wait=False)
@@ -0,0 +1,52 @@
+"""
+Single-Flight Request Coalescing
+Lets concurrent identical requests share one in-flight computation
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key
+    
+    The first caller for a key starts the work; callers that arrive while it
+    is still running await the same result (or exception) instead of starting
+    their own. Once the work finishes the key is forgotten, so later calls
+    start fresh - caching results is left to the caller.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+    
+    @property
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed"""
+        return len(self._calls)
+    
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run func() once per key at a time
+        
+        Args:
+            key: Hashable identity of the request
+            func: Zero-argument coroutine factory that performs the work
+        
+        Returns:
+            The shared result of func()
+        """
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        
+        # Shield so one caller disconnecting does not cancel the shared work
+        return await asyncio.shield(future)
+    
+    def _forget(self, key: Hashable, future: asyncio.Future):
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # Mark retrieved even if every waiter went away
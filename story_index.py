@@ -0,0 +1,225 @@
+"""
+Story Index for Post Generator API
+Clusters news articles that cover the same story under different titles
+"""
+
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+
+# Minimum Jaccard similarity of two titles' word shingles to count as one story
+NEWS_DEDUPE_THRESHOLD = float(os.getenv("NEWS_DEDUPE_THRESHOLD", "0.5"))
+# Seconds a story is remembered after it was last seen
+NEWS_DEDUPE_WINDOW = float(os.getenv("NEWS_DEDUPE_WINDOW", "86400"))
+# Maximum number of stories kept in the index
+NEWS_DEDUPE_INDEX_SIZE = int(os.getenv("NEWS_DEDUPE_INDEX_SIZE", "10000"))
+
+_WORD = re.compile(r"[^\W_]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have he her his how in is it its "
+    "new of on or over says she than that the their this to up was what when "
+    "who why will with after amid".split()
+)
+
+
+def _publisher_name(article: Dict) -> str:
+    publisher = article.get('publisher') or ''
+    if isinstance(publisher, dict):
+        publisher = publisher.get('title') or ''
+    return publisher
+
+
+def title_shingles(title: str, publisher: str = '') -> FrozenSet[str]:
+    """
+    Normalized word shingles of a headline
+    
+    The " - Publisher" suffix Google News appends is removed, the title is
+    lowercased and split into words, and stopwords are dropped, so the same
+    story worded slightly differently by two publishers shares most shingles.
+    """
+    suffix = f" - {publisher}"
+    if publisher and title.endswith(suffix):
+        title = title[:-len(suffix)]
+    return frozenset(word for word in _WORD.findall(title.lower()) if word not in _STOPWORDS)
+
+
+def _normalize_url(url: str) -> str:
+    return (url or '').strip().rstrip('/').lower()
+
+
+def article_fingerprints(article: Dict) -> List[str]:
+    """
+    Exact identity keys of an article: its normalized URL and title shingles
+    
+    Unlike StoryIndex matching these never merge different wordings; they
+    only catch the same article re-listed under another URL or title casing.
+    """
+    fingerprints = []
+    url = _normalize_url(article.get('url'))
+    if url:
+        fingerprints.append(f"url:{url}")
+    shingles = title_shingles(article.get('title') or '', _publisher_name(article))
+    if shingles:
+        fingerprints.append("title:" + " ".join(sorted(shingles)))
+    return fingerprints
+
+
+@dataclass
+class _Story:
+    id: int
+    shingles: FrozenSet[str]
+    seen_at: float
+    urls: List[str] = field(default_factory=list)
+
+
+class StoryIndex:
+    """
+    Incremental near-duplicate index of news stories
+    
+    Each article is matched against the stories seen so far by its URL and
+    by the Jaccard similarity of its title shingles; candidates are found
+    through an inverted index from shingle to story, so matching costs
+    about the number of stories sharing a word with the title, not the
+    size of the index. Stories are forgotten window seconds after they were
+    last seen, and the least recently seen are evicted beyond max_stories.
+    
+    Thread-safe: NewsFetcher calls run in worker threads.
+    """
+    
+    def __init__(self, threshold: float = NEWS_DEDUPE_THRESHOLD,
+                 window: float = NEWS_DEDUPE_WINDOW,
+                 max_stories: int = NEWS_DEDUPE_INDEX_SIZE):
+        """
+        Initialize the story index
+        
+        Args:
+            threshold: Minimum title similarity (0-1) of two articles of one story
+            window: Seconds a story is remembered after it was last seen
+            max_stories: Maximum number of stories kept
+        """
+        self.threshold = threshold
+        self.window = window
+        self.max_stories = max(1, max_stories)
+        self._stories: "OrderedDict[int, _Story]" = OrderedDict()
+        self._postings: Dict[str, Set[int]] = {}
+        self._urls: Dict[str, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+    
+    def add(self, article: Dict) -> Tuple[int, bool]:
+        """
+        Assign an article to a story, creating the story if it is new
+        
+        Args:
+            article: Article dictionary with title, url and publisher
+        
+        Returns:
+            (story_id, is_new) where is_new is False for a near-duplicate
+            of a story already in the index
+        """
+        shingles = title_shingles(article.get('title') or '', _publisher_name(article))
+        url = _normalize_url(article.get('url'))
+        now = time.monotonic()
+        
+        with self._lock:
+            self._expire(now)
+            
+            story_id = self._urls.get(url) if url else None
+            if story_id is None:
+                story_id = self._match(shingles)
+            if story_id is not None:
+                story = self._stories[story_id]
+                story.seen_at = now
+                self._stories.move_to_end(story_id)
+                if url and url not in self._urls:
+                    self._urls[url] = story_id
+                    story.urls.append(url)
+                return story_id, False
+            
+            story = _Story(self._next_id, shingles, now)
+            self._next_id += 1
+            self._stories[story.id] = story
+            for shingle in shingles:
+                self._postings.setdefault(shingle, set()).add(story.id)
+            if url:
+                self._urls[url] = story.id
+                story.urls.append(url)
+            while len(self._stories) > self.max_stories:
+                self._remove(next(iter(self._stories)))
+            return story.id, True
+    
+    def find(self, article: Dict) -> Optional[int]:
+        """
+        Story an article belongs to, without adding it or refreshing the story
+        
+        Returns:
+            The story id, or None if the article is a new story
+        """
+        shingles = title_shingles(article.get('title') or '', _publisher_name(article))
+        url = _normalize_url(article.get('url'))
+        with self._lock:
+            self._expire(time.monotonic())
+            story_id = self._urls.get(url) if url else None
+            return story_id if story_id is not None else self._match(shingles)
+    
+    def _match(self, shingles: FrozenSet[str]) -> Optional[int]:
+        """Most similar story at or above the threshold"""
+        if not shingles:
+            return None
+        shared = Counter()
+        for shingle in shingles:
+            shared.update(self._postings.get(shingle, ()))
+        
+        best, best_score = None, self.threshold
+        for story_id, overlap in shared.items():
+            other = self._stories[story_id].shingles
+            score = overlap / (len(shingles) + len(other) - overlap)
+            if score >= best_score:
+                best, best_score = story_id, score
+        return best
+    
+    def _expire(self, now: float):
+        while self._stories:
+            story = next(iter(self._stories.values()))
+            if now - story.seen_at < self.window:
+                break
+            self._remove(story.id)
+    
+    def _remove(self, story_id: int):
+        story = self._stories.pop(story_id)
+        for shingle in story.shingles:
+            postings = self._postings.get(shingle)
+            if postings is not None:
+                postings.discard(story_id)
+                if not postings:
+                    del self._postings[shingle]
+        for url in story.urls:
+            self._urls.pop(url, None)
+    
+    def clear(self):
+        """Forget every story"""
+        with self._lock:
+            self._stories.clear()
+            self._postings.clear()
+            self._urls.clear()
+    
+    def __len__(self) -> int:
+        return len(self._stories)
+
+
+_story_index: Optional[StoryIndex] = None
+_story_index_lock = threading.Lock()
+
+
+def get_story_index() -> StoryIndex:
+    """Get the process-wide story index"""
+    global _story_index
+    with _story_index_lock:
+        if _story_index is None:
+            _story_index = StoryIndex()
+        return _story_index
@@ -205,6 +205,10 @@ generate_col1, generate_col2, generate_col3 = st.columns([1, 1, 1])
 
 with generate_col2:
     filename = st.text_input("Filename", "my_awesome_post.png")
+    draft_preview = st.checkbox(
+        "Draft preview",
+        help="Render a quick low-resolution preview; untick for the final full-size post"
+    )
     generate_button = st.button("🚀 Generate Post", type="primary", use_container_width=True)
 
 # Generate the post
@@ -212,7 +216,7 @@ if generate_button:
     try:
         with st.spinner("Creating your amazing post..."):
             # Initialize generator
-            gen = PostGenerator()
+            gen = PostGenerator(draft=draft_preview)
             
             # Create canvas
             if dimension == "custom":
@@ -274,29 +278,17 @@ if generate_button:
             
             # Add logo
             if logo_file:
-                # Save uploaded logo temporarily
-                temp_logo_path = os.path.join("output", "temp_logo.png")
-                os.makedirs("output", exist_ok=True)
-                with open(temp_logo_path, "wb") as f:
-                    f.write(logo_file.getbuffer())
-                
                 gen.add_logo(
-                    temp_logo_path,
+                    logo_file.getvalue(),
                     position=logo_position,
                     size=(logo_size, logo_size)
                 )
             
             # Add additional image
             if additional_image_file:
-                # Save uploaded image temporarily
-                temp_image_path = os.path.join("output", "temp_additional_image.png")
-                os.makedirs("output", exist_ok=True)
-                with open(temp_image_path, "wb") as f:
-                    f.write(additional_image_file.getbuffer())
-                
                 img_size = (additional_image_size, additional_image_size) if additional_image_size > 0 else None
                 gen.add_image(
-                    temp_image_path,
+                    additional_image_file.getvalue(),
                     position=additional_image_position,
                     size=img_size,
                     opacity=additional_image_opacity
@@ -0,0 +1,212 @@
+"""
+News Subscriptions for Post Generator API
+Per-subscriber seen-sets so polling workflows only receive new articles
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+from story_index import article_fingerprints
+
+
+# Directory for persistent state; kept across restarts, unlike the temp dir
+DATA_DIR = os.getenv("DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+NEWS_SUBSCRIPTIONS_PATH = os.getenv(
+    "NEWS_SUBSCRIPTIONS_PATH", os.path.join(DATA_DIR, "subscriptions.sqlite3")
+)
+# Fingerprints remembered per subscriber (about two per article)
+NEWS_SUBSCRIPTION_SEEN_LIMIT = int(os.getenv("NEWS_SUBSCRIPTION_SEEN_LIMIT", "10000"))
+# Seconds an article stays seen
+NEWS_SUBSCRIPTION_SEEN_TTL = float(os.getenv("NEWS_SUBSCRIPTION_SEEN_TTL", str(30 * 24 * 3600)))
+
+
+def _fingerprint_hash(fingerprint: str) -> int:
+    """64-bit signed hash, so each seen entry is one small integer"""
+    digest = hashlib.blake2b(fingerprint.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class SeenStore:
+    """
+    SQLite-backed seen-sets, one per subscriber
+    
+    Every article delivered to a subscriber is recorded by its fingerprints
+    (URL and normalized title) as 64-bit hashes. Later polls drop articles
+    with a recorded fingerprint, so a workflow polling every few minutes
+    only gets what is new since its last poll. Each set is bounded: entries
+    expire after seen_ttl seconds and the oldest are dropped beyond
+    seen_limit. The file runs in WAL mode and is shared by all workers.
+    """
+    
+    def __init__(self, path: str = NEWS_SUBSCRIPTIONS_PATH,
+                 seen_limit: int = NEWS_SUBSCRIPTION_SEEN_LIMIT,
+                 seen_ttl: float = NEWS_SUBSCRIPTION_SEEN_TTL):
+        """
+        Initialize the seen store
+        
+        Args:
+            path: SQLite database file
+            seen_limit: Maximum fingerprints kept per subscriber
+            seen_ttl: Seconds a fingerprint is kept
+        """
+        self.path = path
+        self.seen_limit = max(1, seen_limit)
+        self.seen_ttl = seen_ttl
+        self._local = threading.local()
+        
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS seen ("
+                "subscriber TEXT NOT NULL, fingerprint INTEGER NOT NULL, seen_at REAL NOT NULL, "
+                "PRIMARY KEY (subscriber, fingerprint)) WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS seen_age ON seen (subscriber, seen_at)")
+    
+    def _connect(self) -> sqlite3.Connection:
+        """One connection per thread"""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+    
+    def _seen_hashes(self, db: sqlite3.Connection, subscriber: str, hashes: List[int]) -> set:
+        if not hashes:
+            return set()
+        rows = db.execute(
+            f"SELECT fingerprint FROM seen WHERE subscriber = ? AND seen_at >= ? "
+            f"AND fingerprint IN ({','.join('?' * len(hashes))})",
+            [subscriber, time.time() - self.seen_ttl, *hashes]
+        )
+        return {fingerprint for (fingerprint,) in rows}
+    
+    def _record(self, db: sqlite3.Connection, subscriber: str, hashes: List[int]):
+        now = time.time()
+        db.executemany(
+            "INSERT OR REPLACE INTO seen (subscriber, fingerprint, seen_at) VALUES (?, ?, ?)",
+            [(subscriber, fingerprint, now) for fingerprint in hashes]
+        )
+        db.execute(
+            "DELETE FROM seen WHERE subscriber = ? AND seen_at < ?",
+            (subscriber, now - self.seen_ttl)
+        )
+        (count,) = db.execute("SELECT COUNT(*) FROM seen WHERE subscriber = ?", (subscriber,)).fetchone()
+        if count > self.seen_limit:
+            db.execute(
+                "DELETE FROM seen WHERE subscriber = ? AND fingerprint IN ("
+                "SELECT fingerprint FROM seen WHERE subscriber = ? ORDER BY seen_at LIMIT ?)",
+                (subscriber, subscriber, count - self.seen_limit)
+            )
+    
+    @staticmethod
+    def _article_hashes(article: Dict) -> List[int]:
+        return [_fingerprint_hash(fingerprint) for fingerprint in article_fingerprints(article)]
+    
+    def unseen(self, subscriber: str, articles: List[Dict]) -> List[Dict]:
+        """Articles the subscriber has not been sent yet (nothing is recorded)"""
+        per_article = [self._article_hashes(article) for article in articles]
+        seen = self._seen_hashes(
+            self._connect(), subscriber, [h for hashes in per_article for h in hashes]
+        )
+        return [
+            article for article, hashes in zip(articles, per_article)
+            if not any(h in seen for h in hashes)
+        ]
+    
+    def mark_seen(self, subscriber: str, articles: List[Dict]):
+        """Record articles as sent to the subscriber"""
+        hashes = [h for article in articles for h in self._article_hashes(article)]
+        if not hashes:
+            return
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._record(db, subscriber, hashes)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+    
+    def take_unseen(self, subscriber: str, articles: List[Dict], limit: Optional[int] = None,
+                    duplicates: Optional[List[List[Dict]]] = None,
+                    also_seen: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Filter out articles the subscriber has seen and record the rest
+        
+        Runs as one write transaction, so two concurrent polls of the same
+        subscriber never both receive an article.
+        
+        Args:
+            subscriber: Subscriber id
+            articles: Candidate articles, in order of preference
+            limit: Take at most this many new articles; the rest stay unseen
+            duplicates: Near-duplicates the caller dropped, one list per
+                article. They are recorded once their article has been
+                received (taken now or seen before), so a later poll does
+                not return them in its place
+            also_seen: Articles to record without returning them
+        
+        Returns:
+            The new articles, in their original order
+        """
+        duplicates = duplicates or [[] for _ in articles]
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            per_article = [self._article_hashes(article) for article in articles]
+            seen = self._seen_hashes(db, subscriber, [h for hashes in per_article for h in hashes])
+            fresh, record = [], [h for article in also_seen or [] for h in self._article_hashes(article)]
+            for article, hashes, dropped in zip(articles, per_article, duplicates):
+                if not any(h in seen for h in hashes):
+                    if limit is not None and len(fresh) >= limit:
+                        continue
+                    fresh.append(article)
+                    record.extend(hashes)
+                    # A duplicate later in the same list is not new either
+                    seen.update(hashes)
+                record.extend(h for duplicate in dropped for h in self._article_hashes(duplicate))
+            if record:
+                self._record(db, subscriber, record)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return fresh
+    
+    def count(self, subscriber: str) -> int:
+        """Number of fingerprints remembered for a subscriber"""
+        (count,) = self._connect().execute(
+            "SELECT COUNT(*) FROM seen WHERE subscriber = ? AND seen_at >= ?",
+            (subscriber, time.time() - self.seen_ttl)
+        ).fetchone()
+        return count
+    
+    def reset(self, subscriber: str) -> int:
+        """
+        Forget everything a subscriber has seen
+        
+        Returns:
+            Number of fingerprints removed
+        """
+        return self._connect().execute("DELETE FROM seen WHERE subscriber = ?", (subscriber,)).rowcount
+
+
+_seen_store: Optional[SeenStore] = None
+_seen_store_lock = threading.Lock()
+
+
+def get_seen_store() -> SeenStore:
+    """Get the process-wide seen store"""
+    global _seen_store
+    with _seen_store_lock:
+        if _seen_store is None:
+            _seen_store = SeenStore()
+        return _seen_store
@@ -0,0 +1,163 @@
+"""
+Article extraction tests
+
+Extracts the saved article pages in fixtures/articles, and serves them from
+a local HTTP server to check concurrent fetching, per-host limits and the
+URL cache. No internet access is needed.
+
+Run with:
+    python -m pytest test_article_extractor.py
+    python test_article_extractor.py
+"""
+
+import asyncio
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import news_fetcher
+
+from article_extractor import ArticleExtractor, extract_article, summarize
+from host_limiter import HostLimiter
+from news_fetcher import check_public_url, get_http_session
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class FixtureServer:
+    """Serves the fixtures slowly, recording requests and peak concurrency"""
+    
+    def __init__(self, delay: float = 0.1):
+        server = self
+        self.requests = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+        
+        class Handler(SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super().__init__(*args, directory=FIXTURES, **kwargs)
+            
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append(self.path)
+                    server.active += 1
+                    server.peak = max(server.peak, server.active)
+                try:
+                    time.sleep(delay)
+                    super().do_GET()
+                finally:
+                    with server._lock:
+                        server.active -= 1
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+    
+    def __enter__(self):
+        # The stand-in server is on loopback, which the shared session refuses
+        news_fetcher.ALLOW_PRIVATE_URLS = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        news_fetcher.ALLOW_PRIVATE_URLS = False
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_extract_article_with_description():
+    article = extract_article(read_fixture("storm.html"), "https://coastalherald.example/news/storm")
+    assert article["title"] == "Storm batters coastal towns as thousands lose power"
+    assert "two fishing boats broke free" in article["text"]
+    assert "Privacy" not in article["text"]
+    assert article["summary"].startswith("A powerful storm swept through coastal towns overnight")
+    assert article["authors"] == ["Dana Reyes"]
+    assert article["published_date"].startswith("2024-05-01")
+    assert article["top_image"] == "https://cdn.coastalherald.example/images/storm-lead.jpg"
+
+
+def test_summary_falls_back_to_lead_sentences():
+    article = extract_article(read_fixture("markets.html"), "https://marketdaily.example/story/rates")
+    assert article["description"] == ""
+    assert article["summary"].startswith("Stock markets climbed on Wednesday")
+    assert article["summary"].count(". ") == 2  # three sentences, "1.4" is not a break
+    assert article["top_image"] == "https://marketdaily.example/media/markets/trading-floor.jpg"
+
+
+def test_summarize_skips_headings():
+    text = "Breaking news\n\nThe first sentence is long enough to count here. The second one follows it. A third."
+    assert summarize(text, sentences=2) == (
+        "The first sentence is long enough to count here. The second one follows it."
+    )
+
+
+def test_extract_many_concurrent_limited_and_cached():
+    with FixtureServer() as server:
+        urls = [f"{server.url}/storm.html?v={i}" for i in range(4)]
+        urls += [f"{server.url}/markets.html", f"{server.url}/missing.html", urls[0]]
+        extractor = ArticleExtractor(limiter=HostLimiter(limit=2))
+        
+        start = time.perf_counter()
+        results = asyncio.run(extractor.extract_many(urls))
+        elapsed = time.perf_counter() - start
+        
+        assert [error is None for _, error in results] == [True] * 5 + [False, True]
+        assert results[4][0]["title"] == "Shares rise as investors cheer rate pause"
+        assert results[6][0] is results[0][0]
+        assert "404" in results[5][1]
+        # Six distinct URLs: the duplicate is fetched once, two at a time
+        assert len(server.requests) == 6
+        assert server.peak == 2
+        assert elapsed < 6 * 0.1
+        
+        # Cached: a second pass makes no requests
+        results = asyncio.run(extractor.extract_many(urls[:5]))
+        assert all(error is None for _, error in results)
+        assert len(server.requests) == 6
+        assert extractor.extract(urls[4])["title"] == "Shares rise as investors cheer rate pause"
+        assert len(server.requests) == 6
+
+
+def test_private_hosts_are_refused():
+    for url in ["http://127.0.0.1/", "http://localhost:8000/", "http://10.1.2.3/", "http://192.168.0.1/",
+                "http://169.254.169.254/latest/meta-data/", "http://[::1]/", "http://[::ffff:10.0.0.1]/",
+                "http://224.0.0.1/", "http://0.0.0.0/", "file:///etc/passwd"]:
+        try:
+            check_public_url(url)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{url} was allowed")
+    check_public_url("https://8.8.8.8/")
+    
+    # The shared session checks before connecting, so the server sees nothing
+    with FixtureServer() as server:
+        news_fetcher.ALLOW_PRIVATE_URLS = False
+        try:
+            get_http_session().get(f"{server.url}/storm.html", timeout=5)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("loopback URL was fetched")
+        assert server.requests == []
+        
+        [(article, error)] = asyncio.run(ArticleExtractor().extract_many([f"{server.url}/storm.html"]))
+        assert article is None and "non-public host" in error
+        assert server.requests == []
+
+
+if __name__ == "__main__":
+    test_extract_article_with_description()
+    test_summary_falls_back_to_lead_sentences()
+    test_summarize_skips_headings()
+    test_extract_many_concurrent_limited_and_cached()
+    test_private_hosts_are_refused()
+    print("✓ Article extraction tests passed")
@@ -0,0 +1,78 @@
+"""
+Draft preview tests
+
+Checks that draft renders come out at the draft scale with the same layout,
+and that full-resolution output is unchanged: it must match
+fixtures/posts/full_res_reference.png, rendered before draft mode existed.
+No internet access is needed.
+
+Run with:
+    python -m pytest test_draft.py
+    python test_draft.py
+"""
+
+import os
+
+from PIL import Image, ImageChops, ImageStat
+
+from api import PostRequest, request_to_spec
+from post_generator import PostGenerator
+from render_service import build_post
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "posts")
+LOGO = os.path.join(FIXTURES, "logo.png")
+
+
+def render(generator: PostGenerator) -> Image.Image:
+    generator.create_canvas("square", (20, 20, 40))
+    generator.apply_gradient((102, 126, 234), (118, 75, 162), "diagonal")
+    generator.add_pattern_lines((255, 255, 255), spacing=60, angle=45, width=3, opacity=40)
+    generator.add_logo(LOGO, position="top-right", size=(200, 200))
+    generator.add_text("Draft previews keep the layout", position=(80, 400), font_size=70,
+                       color=(255, 255, 255), max_width=900, shadow=True)
+    generator.add_text_box("Rendered at full size", box_position=(80, 750), box_size=(920, 180),
+                           bg_color=(0, 0, 0, 160), text_color=(255, 255, 255), font_size=40, padding=30)
+    return generator.get_image()
+
+
+def test_full_resolution_is_unchanged():
+    with Image.open(os.path.join(FIXTURES, "full_res_reference.png")) as reference:
+        reference = reference.convert("RGB")
+    for generator in (PostGenerator(), PostGenerator(draft=False), PostGenerator(scale=1.0)):
+        image = render(generator)
+        assert image.size == (1080, 1080)
+        assert image.tobytes() == reference.tobytes()
+
+
+def test_draft_is_scaled():
+    full = render(PostGenerator())
+    draft = render(PostGenerator(draft=True))
+    assert draft.size == (270, 270)
+    assert render(PostGenerator(scale=0.5)).size == (540, 540)
+    
+    # Same layout: the draft looks like the full render scaled down
+    difference = ImageChops.difference(full.resize(draft.size, Image.LANCZOS), draft)
+    assert max(ImageStat.Stat(difference).mean) < 12
+
+
+def test_draft_spec():
+    spec = request_to_spec(PostRequest(text="Story draft", dimension="story", draft=True))
+    assert build_post(spec).get_image().size == (270, 480)
+    spec["draft"] = False
+    assert build_post(spec).get_image().size == (1080, 1920)
+
+
+def test_invalid_scale():
+    try:
+        PostGenerator(scale=0)
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
+
+
+if __name__ == "__main__":
+    test_full_resolution_is_unchanged()
+    test_draft_is_scaled()
+    test_draft_spec()
+    test_invalid_scale()
+    print("✓ Draft tests passed")
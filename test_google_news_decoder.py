@@ -0,0 +1,90 @@
+"""
+Google News decoder tests
+
+Parses canned batchexecute responses to check that decoded URLs are paired
+with their articles by request id, never by position, and that article
+ids are read from every kind of Google News link. No internet access is
+needed.
+
+Run with:
+    python -m pytest test_google_news_decoder.py
+    python test_google_news_decoder.py
+"""
+
+import json
+
+from google_news_decoder import article_id, parse_batch_response
+
+PARAMS = [
+    {"gn_art_id": "AAA", "timestamp": "1", "signature": "s1"},
+    {"gn_art_id": "BBB", "timestamp": "2", "signature": "s2"},
+    {"gn_art_id": "CCC", "timestamp": "3", "signature": "s3"},
+]
+
+
+def entry(url, request_id):
+    return ["wrb.fr", "Fbv4je", json.dumps(["garturlres", url, 1]), None, None, None, request_id]
+
+
+def response(*entries):
+    trailer = [["di", 42], ["af.httprm", 41, "-123", 7]]
+    return ")]}'\n\n" + json.dumps(list(entries) + trailer)
+
+
+def test_reordered_response_is_matched_by_request_id():
+    text = response(
+        entry("https://c.example/3", "3"),
+        entry("https://a.example/1", "1"),
+        entry("https://b.example/2", "2"),
+    )
+    assert parse_batch_response(text, PARAMS) == {
+        "AAA": "https://a.example/1",
+        "BBB": "https://b.example/2",
+        "CCC": "https://c.example/3",
+    }
+
+
+def test_unmatched_entries_are_skipped():
+    text = response(
+        entry("https://a.example/1", "1"),
+        entry("https://x.example/unknown", "9"),     # Unknown request id
+        entry("https://x.example/generic", "generic"),  # Ambiguous in a batch
+        entry("javascript:alert(1)", "2"),           # Not a web URL
+        ["wrb.fr", "Fbv4je", None, None, None, None, "3"],  # Failed entry
+    )
+    assert parse_batch_response(text, PARAMS) == {"AAA": "https://a.example/1"}
+
+
+def test_conflicting_entries_for_one_article_are_dropped():
+    text = response(entry("https://a.example/1", "1"), entry("https://b.example/2", "1"))
+    assert parse_batch_response(text, PARAMS) == {}
+
+
+def test_single_article_accepts_generic_id():
+    text = response(entry("https://a.example/1", "generic"))
+    assert parse_batch_response(text, PARAMS[:1]) == {"AAA": "https://a.example/1"}
+
+
+def test_unreadable_response():
+    try:
+        parse_batch_response("<html>Error</html>", PARAMS)
+    except ValueError:
+        return
+    raise AssertionError("expected ValueError")
+
+
+def test_article_id():
+    assert article_id("https://news.google.com/rss/articles/CBMiXYZ?oc=5") == "CBMiXYZ"
+    assert article_id("https://news.google.com/read/CBMiXYZ") == "CBMiXYZ"
+    assert article_id("https://news.google.com/topics/ABC") is None
+    assert article_id("https://example.com/articles/CBMiXYZ") is None
+
+
+if __name__ == "__main__":
+    test_reordered_response_is_matched_by_request_id()
+    test_unmatched_entries_are_skipped()
+    test_conflicting_entries_for_one_article_are_dropped()
+    test_single_article_accepts_generic_id()
+    test_unreadable_response()
+    test_article_id()
+    print("✓ Google News decoder tests passed")
@@ -0,0 +1,261 @@
+"""
+Lead image and image cache tests
+
+Serves an article page and its lead image from a local HTTP server, and
+checks that the image is downloaded and decoded once across post variants,
+decoded at reduced resolution and kept within the cache budget. No internet
+access is needed.
+
+Run with:
+    python -m pytest test_image_cache.py
+    python test_image_cache.py
+"""
+
+import glob
+import io
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from PIL import Image, ImageChops
+
+import news_fetcher
+
+from api import PostRequest, request_to_spec
+from article_extractor import ArticleExtractor
+from designs import CompiledDesign
+from image_cache import ImageCache
+from post_generator import PostGenerator
+from post_generator.template_loader import PostTemplate, TemplateLoader
+from render_service import add_lead_image, build_background, build_background_layers
+
+ARTICLE_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+  <meta charset="utf-8">
+  <title>Harbour reopens after storm repairs</title>
+  <meta property="og:image" content="/images/hero.jpg">
+</head>
+<body>
+  <article>
+    <h1>Harbour reopens after storm repairs</h1>
+    <p>The harbour reopened to fishing boats on Monday after three weeks of repairs to the sea wall damaged in last month's storm.</p>
+    <p>Engineers said the new wall was built to withstand waves a metre higher than the ones that broke through in the storm.</p>
+  </article>
+</body>
+</html>
+"""
+
+
+def make_logo() -> bytes:
+    logo = io.BytesIO()
+    Image.new("RGBA", (200, 200), (0, 255, 0, 255)).save(logo, "PNG")
+    return logo.getvalue()
+
+
+def make_jpeg(size=(1600, 1000)) -> bytes:
+    image = Image.new("RGB", size, (200, 60, 40))
+    image.paste((30, 90, 200), (0, 0, size[0] // 2, size[1]))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class StandInServer:
+    """A publisher stand-in serving one article and its lead image, counting requests"""
+    
+    def __init__(self):
+        server = self
+        self.requests = []
+        self._lock = threading.Lock()
+        pages = {
+            "/news/harbour": ("text/html; charset=utf-8", ARTICLE_HTML.encode("utf-8")),
+            "/images/hero.jpg": ("image/jpeg", make_jpeg()),
+        }
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append(self.path)
+                if self.path not in pages:
+                    self.send_error(404)
+                    return
+                content_type, body = pages[self.path]
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+    
+    def __enter__(self):
+        # The stand-in server is on loopback, which the shared session refuses
+        news_fetcher.ALLOW_PRIVATE_URLS = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+    
+    def __exit__(self, *exc):
+        news_fetcher.ALLOW_PRIVATE_URLS = False
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def test_lead_image_extracted():
+    with StandInServer() as server:
+        article = ArticleExtractor().extract(f"{server.url}/news/harbour")
+        assert article["top_image"] == f"{server.url}/images/hero.jpg"
+
+
+def test_variants_download_and_decode_once():
+    with StandInServer() as server:
+        url = f"{server.url}/images/hero.jpg"
+        cache = ImageCache()
+        
+        # Largest first: every smaller variant is cut from the same master
+        cover = cache.get_image(url, (1080, 1080), "cover")
+        assert cover.size == (1080, 1080) and cover.mode == "RGBA"
+        assert cache.get_image(url, (270, 270), "cover").size == (270, 270)
+        assert cache.get_image(url, (600, 600), "contain").size == (600, 375)
+        # Retries hit the cache
+        assert cache.get_image(url, (1080, 1080), "cover") is cover
+        
+        stats = cache.stats()
+        assert server.requests == ["/images/hero.jpg"]
+        assert stats["downloads"] == 1
+        assert stats["decodes"] == 1
+        assert stats["hits"] == 1
+
+
+def test_small_box_decodes_at_reduced_size():
+    with StandInServer() as server:
+        url = f"{server.url}/images/hero.jpg"
+        cache = ImageCache()
+        
+        assert cache.get_image(url, (200, 200), "contain").size == (200, 125)
+        # The JPEG is decoded at 1/4 scale at most, never at 1600x1000
+        assert cache.stats()["bytes"] < 1600 * 1000 * 4 // 4
+        
+        # A larger box needs a sharper master: decoded again, not downloaded again
+        assert cache.get_image(url, (1080, 1080), "cover").size == (1080, 1080)
+        stats = cache.stats()
+        assert stats["downloads"] == 1
+        assert stats["decodes"] == 2
+
+
+def test_byte_budget():
+    with StandInServer() as server:
+        url = f"{server.url}/images/hero.jpg"
+        cache = ImageCache(max_bytes=1024 * 1024)
+        for edge in (100, 200, 300, 400, 500):
+            cache.get_image(url, (edge, edge), "cover")
+        assert cache.stats()["bytes"] <= 1024 * 1024
+
+
+def test_add_lead_image_modes():
+    with StandInServer() as server:
+        url = f"{server.url}/images/hero.jpg"
+        cache = ImageCache()
+        
+        generator = PostGenerator(draft=True)
+        generator.create_canvas(color=(255, 255, 255))
+        add_lead_image(generator, url, mode="background", cache=cache)
+        # The left half of the photo is blue, the right half red
+        assert generator.img.getpixel((10, generator.height // 2))[:3][2] > 150
+        assert generator.img.getpixel((generator.width - 10, generator.height // 2))[:3][0] > 150
+        
+        generator = PostGenerator(draft=True)
+        generator.create_canvas(color=(255, 255, 255))
+        add_lead_image(generator, url, mode="overlay", size=600, cache=cache)
+        # A 600 box in a 1080 canvas leaves the corners untouched
+        assert generator.img.getpixel((5, 5))[:3] == (255, 255, 255)
+        assert generator.img.getpixel((generator.width // 2, generator.height // 2))[:3] != (255, 255, 255)
+        
+        assert cache.stats()["downloads"] == 1
+
+
+def test_background_lead_image_stays_under_logo_and_patterns():
+    spec = request_to_spec(PostRequest(
+        text="", gradient_start="#000000", gradient_end="#333333",
+        pattern="lines", pattern_angle=90, pattern_spacing=100, pattern_width=8,
+        pattern_color="#FFFFFF", pattern_opacity=255,
+        logo_position="top-left", logo_size=200
+    ))
+    design = CompiledDesign(id="lead-image-test", spec=spec, logo=make_logo())
+    
+    with StandInServer() as server:
+        lead_image = {"url": f"{server.url}/images/hero.jpg", "mode": "background", "cache": ImageCache()}
+        post = Image.open(io.BytesIO(design.render({"text": "Harbour reopens", "draft": True}, lead_image=lead_image)))
+        post = post.convert("RGB")
+    
+    # Draft scale 0.25: the 200px logo sits at (10, 10) and is 50px wide
+    assert post.getpixel((30, 30)) == (0, 255, 0)
+    # Pattern lines (every 25px at draft scale) are drawn over the photo
+    assert post.getpixel((50, 200)) == (255, 255, 255)
+    # Between them the photo replaces the gradient: blue left half, red right half
+    assert post.getpixel((60, 200))[2] > 150
+    assert post.getpixel((240, 200))[0] > 150
+
+
+def test_background_lead_image_stays_under_template_decorations():
+    name = "lead-image-test"
+    created = not os.path.isdir("templates")
+    loader = TemplateLoader("templates")
+    loader.save_template(PostTemplate(
+        name=name, dimension="square", background_type="solid", color_scheme="bold_orange",
+        pattern_type="lines", pattern_spacing=100, pattern_angle=90, logo_size=[200, 200]
+    ))
+    try:
+        spec = request_to_spec(PostRequest(text="", template=name))
+        design = CompiledDesign(id="lead-image-template-test", spec=spec, logo=make_logo())
+        
+        with StandInServer() as server:
+            lead_image = {"url": f"{server.url}/images/hero.jpg", "mode": "background", "cache": ImageCache()}
+            post = Image.open(io.BytesIO(design.render({"text": "Harbour reopens", "draft": True}, lead_image=lead_image)))
+            post = post.convert("RGB")
+    finally:
+        loader.delete_template(name)
+        for path in glob.glob(os.path.join("templates", f"{name}.*")):
+            os.remove(path)
+        if created:
+            os.rmdir("templates")
+    
+    # The logo (margin 40, so at 10 at draft scale) is drawn over the photo
+    assert post.getpixel((30, 30)) == (0, 255, 0)
+    # The template's faint orange lines still tint the blue photo beneath them
+    line, photo = post.getpixel((50, 200)), post.getpixel((60, 200))
+    assert photo[2] > 150
+    assert line[0] > photo[0] + 15 and line[2] < photo[2] - 15
+
+
+def test_layered_background_matches_single_layer():
+    spec = request_to_spec(PostRequest(
+        text="", bg_color="#202040", shape_type="circles", shape_count=6, shape_opacity=200,
+        logo_position="top-left", logo_size=200
+    ))
+    for draft in (False, True):
+        spec["draft"] = draft
+        single = build_background(spec, logo=make_logo()).img
+        base, overlay = build_background_layers(spec, logo=make_logo())
+        layered = Image.alpha_composite(base.convert("RGBA"), overlay).convert("RGB")
+        # The same shapes in both: only 8-bit compositing rounding differs
+        assert max(high for _, high in ImageChops.difference(single, layered).getextrema()) <= 2
+    
+    # Shapes do not depend on the post text
+    assert build_background(dict(spec, text="Other")).img.tobytes() == build_background(spec).img.tobytes()
+
+
+if __name__ == "__main__":
+    test_lead_image_extracted()
+    test_variants_download_and_decode_once()
+    test_small_box_decodes_at_reduced_size()
+    test_byte_budget()
+    test_add_lead_image_modes()
+    test_background_lead_image_stays_under_logo_and_patterns()
+    test_background_lead_image_stays_under_template_decorations()
+    test_layered_background_matches_single_layer()
+    print("✓ Image cache tests passed")
@@ -0,0 +1,67 @@
+"""
+Cold-start import time test for the API
+
+Imports the API in a fresh interpreter and fails if it takes longer than
+IMPORT_TIME_BUDGET_MS, or if the news stack is loaded at import time.
+
+Run with:
+    python -m pytest test_import_time.py
+    python test_import_time.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500"))
+RUNS = 3
+
+# Modules that must only be loaded when a news endpoint is used
+NEWS_MODULES = ["gnews", "feedparser", "bs4", "newspaper"]
+
+MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import api
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {modules!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(api_mode: str) -> dict:
+    """Import api in a fresh interpreter; best of RUNS to ignore disk-cache noise"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, API_MODE=api_mode, WARMUP="0")
+    results = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", MEASURE.format(modules=NEWS_MODULES)],
+            cwd=here, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    return min(results, key=lambda result: result["ms"])
+
+
+def test_render_mode_import_time():
+    result = measure_import("render")
+    print(f"API_MODE=render: import api took {result['ms']:.0f} ms")
+    assert result["ms"] < IMPORT_TIME_BUDGET_MS, (
+        f"import api took {result['ms']:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+    )
+    assert result["loaded"] == [], f"News modules loaded at import: {result['loaded']}"
+
+
+def test_full_mode_defers_news_stack():
+    result = measure_import("full")
+    print(f"API_MODE=full: import api took {result['ms']:.0f} ms")
+    assert result["ms"] < IMPORT_TIME_BUDGET_MS, (
+        f"import api took {result['ms']:.0f} ms (budget {IMPORT_TIME_BUDGET_MS:.0f} ms)"
+    )
+    assert result["loaded"] == [], f"News modules loaded at import: {result['loaded']}"
+
+
+if __name__ == "__main__":
+    test_render_mode_import_time()
+    test_full_mode_defers_news_stack()
+    print("✓ Import time within budget")
@@ -0,0 +1,116 @@
+"""
+Render job tests
+
+Drives JobManager directly and through the job API: submitting, polling,
+cancelling, a full queue, stopping with a job mid-render, and keeping a
+job's images when other artifacts fill the store. No internet access is
+needed.
+
+Run with:
+    python -m pytest test_jobs.py
+    python test_jobs.py
+"""
+
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+import jobs
+from api import PostRequest, app, request_to_spec
+from jobs import JobManager
+from render_service import ArtifactStore, get_artifact_store
+
+SPEC = request_to_spec(PostRequest(text="Job post", gradient_start="#667eea", gradient_end="#764ba2"))
+
+
+def wait_for(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+async def wait_for_async(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def test_stop_with_job_mid_render():
+    async def scenario():
+        manager = JobManager(workers=1)
+        await manager.start()
+        job = manager.submit([SPEC] * 30)
+        await wait_for_async(lambda: job.status == "running")
+        
+        await asyncio.wait_for(manager.stop(), timeout=10)
+        assert job.status == "cancelled"
+        assert job.finished_at is not None
+    
+    asyncio.run(scenario())
+
+
+def test_pinned_artifacts_survive_eviction():
+    store = ArtifactStore(max_bytes=100)
+    pinned = store.put(b"j" * 60, pinned=True)
+    for _ in range(5):
+        store.put(b"s" * 60)
+    assert store.get(pinned) is not None
+    
+    store.unpin([pinned])
+    store.put(b"s" * 60)
+    assert store.get(pinned) is None
+    assert store.total_bytes <= 100
+
+
+def test_job_api_submit_poll_cancel_and_queue_full():
+    previous = jobs._job_manager
+    jobs._job_manager = JobManager(workers=1, queue_size=1, history=1)
+    try:
+        with TestClient(app) as client:
+            # One job running, one queued: the next one does not fit
+            response = client.post("/jobs", json={"design": {"text": ""}, "texts": [f"Post {i}" for i in range(40)]})
+            assert response.status_code == 202
+            running = response.json()
+            assert running["total"] == 40
+            wait_for(lambda: client.get(running["url"]).json()["status"] == "running")
+            
+            queued = client.post("/jobs", json={"posts": [{"text": "Queued"}]}).json()
+            assert queued["status"] == "queued"
+            response = client.post("/jobs", json={"posts": [{"text": "Too many"}]})
+            assert response.status_code == 429
+            
+            # Cancelling a running job is reported at once
+            response = client.delete(running["url"])
+            assert response.json() == {"job_id": running["job_id"], "status": "cancelling"}
+            wait_for(lambda: client.get(running["url"]).json()["status"] == "cancelled")
+            cancelled = client.get(running["url"]).json()
+            assert cancelled["completed"] < 40
+            
+            # The queued job runs next; its image stays downloadable
+            wait_for(lambda: client.get(queued["url"]).json()["status"] == "completed")
+            status = client.get(queued["url"]).json()
+            assert (status["total"], status["completed"], status["failed"]) == (1, 1, 0)
+            result = status["results"][0]
+            response = client.get(result["url"])
+            assert response.status_code == 200
+            assert response.content.startswith(b"\x89PNG")
+            
+            assert client.get("/jobs/unknown").status_code == 404
+            assert client.delete("/jobs/unknown").status_code == 404
+            
+            # Dropping the job from the history unpins its image
+            client.post("/jobs", json={"posts": [{"text": "Next"}]})
+            assert client.get(queued["url"]).status_code == 404
+            assert result["artifact_id"] not in get_artifact_store()._pinned
+    finally:
+        jobs._job_manager = previous
+
+
+if __name__ == "__main__":
+    test_stop_with_job_mid_render()
+    test_pinned_artifacts_survive_eviction()
+    test_job_api_submit_poll_cancel_and_queue_full()
+    print("✓ Job tests passed")
@@ -0,0 +1,91 @@
+"""
+News cache tests
+
+Checks stale-while-revalidate: a stale result is served at once while a
+single background fetch refreshes it, and failures never replace it. No
+internet access is needed.
+
+Run with:
+    python -m pytest test_news_cache.py
+    python test_news_cache.py
+"""
+
+import asyncio
+
+from news_cache import NewsCache
+
+
+class Source:
+    """Fake query: returns a new result on every fetch, slowly"""
+    
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.calls = 0
+        self.fail = False
+    
+    async def fetch(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            return []
+        return [f"article {self.calls}"]
+
+
+def test_serves_stale_and_refreshes_once():
+    async def scenario():
+        cache = NewsCache(ttl=0.1, stale_ttl=60, negative_ttl=0.1)
+        source = Source()
+        
+        assert await cache.get("tech", source.fetch) == (["article 1"], "miss")
+        assert await cache.get("tech", source.fetch) == (["article 1"], "hit")
+        await asyncio.sleep(0.15)
+        
+        # Every caller gets the stale result without waiting for the fetch
+        results = await asyncio.wait_for(
+            asyncio.gather(*(cache.get("tech", source.fetch) for _ in range(10))), timeout=0.04
+        )
+        assert results == [(["article 1"], "stale")] * 10
+        assert source.calls == 2
+        
+        await asyncio.sleep(0.1)
+        assert await cache.get("tech", source.fetch) == (["article 2"], "hit")
+        assert source.calls == 2
+    
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_keeps_stale_result():
+    async def scenario():
+        cache = NewsCache(ttl=0.1, stale_ttl=60, negative_ttl=0.1)
+        source = Source(delay=0)
+        await cache.get("tech", source.fetch)
+        await asyncio.sleep(0.15)
+        
+        source.fail = True
+        assert await cache.get("tech", source.fetch) == (["article 1"], "stale")
+        await asyncio.sleep(0.01)
+        assert await cache.get("tech", source.fetch) == (["article 1"], "stale")
+    
+    asyncio.run(scenario())
+
+
+def test_empty_results_are_not_served_stale():
+    async def scenario():
+        cache = NewsCache(ttl=0.1, stale_ttl=60, negative_ttl=0.05)
+        source = Source(delay=0)
+        source.fail = True
+        assert await cache.get("tech", source.fetch) == ([], "miss")
+        assert await cache.get("tech", source.fetch) == ([], "hit")
+        
+        await asyncio.sleep(0.1)
+        source.fail = False
+        assert await cache.get("tech", source.fetch) == (["article 2"], "miss")
+    
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_serves_stale_and_refreshes_once()
+    test_failed_refresh_keeps_stale_result()
+    test_empty_results_are_not_served_stale()
+    print("✓ News cache tests passed")
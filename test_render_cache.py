@@ -0,0 +1,92 @@
+"""
+Render cache and ETag tests
+
+Checks canonical render keys, ETag revalidation through the API, and the
+memory and disk tiers of RenderCache. No internet access is needed.
+
+Run with:
+    python -m pytest test_render_cache.py
+    python test_render_cache.py
+"""
+
+import tempfile
+import uuid
+
+from fastapi.testclient import TestClient
+
+from api import app
+from render_cache import RenderCache, etag_matches, render_key
+
+
+def test_render_key_is_canonical():
+    assert render_key({"a": 1, "b": [1, 2]}) == render_key({"b": [1, 2], "a": 1})
+    assert render_key({"a": 1}) != render_key({"a": 2})
+    assert render_key({"a": 1}, {"logo": b"x"}) != render_key({"a": 1}, {"logo": b"y"})
+    # A missing asset is the same as no asset
+    assert render_key({"a": 1}, {"logo": None}) == render_key({"a": 1})
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"x", "abc"', '"abc"')
+    assert etag_matches('*', '"abc"')
+    assert not etag_matches('"abd"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_etag_round_trip():
+    # A fresh text so earlier runs' disk cache entries cannot hit
+    post = {"text": f"ETag {uuid.uuid4().hex}", "gradient_start": "#667eea", "gradient_end": "#764ba2"}
+    with TestClient(app) as client:
+        first = client.post("/generate/json", json=post)
+        assert first.status_code == 200
+        assert first.headers["X-Render-Cache"] == "miss"
+        etag = first.headers["ETag"]
+        
+        repeat = client.post("/generate/json", json=post)
+        assert repeat.headers["X-Render-Cache"] == "hit"
+        assert repeat.headers["ETag"] == etag
+        assert repeat.content == first.content
+        
+        revalidated = client.post("/generate/json", json=post, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated.headers["ETag"] == etag
+        
+        # A changed spec is a different render: new ETag, cache miss, full response
+        changed = client.post("/generate/json", json=dict(post, gradient_end="#000000"),
+                              headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+        assert changed.headers["X-Render-Cache"] == "miss"
+        assert changed.content != first.content
+
+
+def test_memory_tier_is_bounded():
+    cache = RenderCache(memory_bytes=100, disk_bytes=0)
+    cache.put("a", b"a" * 40)
+    cache.put("b", b"b" * 40)
+    assert cache.get("a") is not None  # Now the most recently used
+    cache.put("c", b"c" * 40)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"a" * 40 and cache.get("c") == b"c" * 40
+
+
+def test_disk_tier_survives_restart():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        RenderCache(memory_bytes=1000, disk_bytes=1000, cache_dir=cache_dir).put("key", b"png")
+        
+        restarted = RenderCache(memory_bytes=1000, disk_bytes=1000, cache_dir=cache_dir)
+        assert restarted.get_memory("key") is None
+        assert restarted.get("key") == b"png"
+        assert restarted.get_memory("key") == b"png"  # Promoted into memory
+
+
+if __name__ == "__main__":
+    test_render_key_is_canonical()
+    test_etag_matches()
+    test_etag_round_trip()
+    test_memory_tier_is_bounded()
+    test_disk_tier_survives_restart()
+    print("✓ Render cache tests passed")
@@ -0,0 +1,153 @@
+"""
+Render service tests
+
+Checks the render pool and the batch endpoints: ordering, per-item errors,
+the concurrency bound and downloadable results. No internet access is needed.
+
+Run with:
+    python -m pytest test_render_service.py
+    python test_render_service.py
+"""
+
+import asyncio
+import io
+import threading
+import time
+import zipfile
+
+from fastapi.testclient import TestClient
+
+from api import app
+from render_service import RenderPool, stream_zip
+
+
+class Gauge:
+    """Counts calls running at once"""
+    
+    def __init__(self):
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+    
+    def __exit__(self, *exc):
+        with self._lock:
+            self.active -= 1
+
+
+def slow_square(value: int, gauge: Gauge) -> int:
+    """Later items finish first; negative items fail"""
+    with gauge:
+        time.sleep(0.01 * (10 - value % 10))
+        if value < 0:
+            raise ValueError(f"bad item {value}")
+        return value * value
+
+
+def test_pool_map_keeps_order_and_reports_item_errors():
+    pool = RenderPool(kind="thread", workers=4, max_concurrency=3)
+    gauge = Gauge()
+    values = [1, 2, -3, 4, 5, 6, -7, 8]
+    try:
+        outcomes = asyncio.run(pool.map(slow_square, [(value, gauge) for value in values]))
+    finally:
+        pool.shutdown()
+    
+    assert [result for result, _ in outcomes] == [1, 4, None, 16, 25, 36, None, 64]
+    assert [str(error) if error else None for _, error in outcomes] == [
+        None, None, "bad item -3", None, None, None, "bad item -7", None
+    ]
+    assert gauge.peak <= 3
+
+
+def test_pool_imap_unordered_yields_every_item():
+    pool = RenderPool(kind="thread", workers=4, max_concurrency=2)
+    gauge = Gauge()
+    
+    async def collect():
+        return [item async for item in pool.imap_unordered(slow_square, [(v, gauge) for v in (1, -2, 3, 4)])]
+    
+    try:
+        items = asyncio.run(collect())
+    finally:
+        pool.shutdown()
+    
+    assert sorted(index for index, _, _ in items) == [0, 1, 2, 3]
+    by_index = {index: (result, error) for index, result, error in items}
+    assert by_index[0] == (1, None) and by_index[2] == (9, None) and by_index[3] == (16, None)
+    assert by_index[1][0] is None and isinstance(by_index[1][1], ValueError)
+    assert gauge.peak <= 2
+
+
+def test_stream_zip_is_a_valid_archive():
+    entries = [(f"post_{i}.png", bytes([i]) * (1000 * i)) for i in range(1, 6)]
+    
+    async def source():
+        for entry in entries:
+            await asyncio.sleep(0)
+            yield entry
+    
+    async def collect():
+        return [chunk async for chunk in stream_zip(source())]
+    
+    chunks = asyncio.run(collect())
+    # One chunk per entry as it is written, then the central directory
+    assert len(chunks) == len(entries) + 1
+    assert all(chunks[:-1])
+    
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert archive.namelist() == [name for name, _ in entries]
+    for name, data in entries:
+        assert archive.read(name) == data
+        assert archive.getinfo(name).compress_type == zipfile.ZIP_STORED
+
+
+def test_generate_batch_returns_artifacts():
+    with TestClient(app) as client:
+        response = client.post("/generate/batch", json=[
+            {"text": "Post 1"},
+            {"text": "Post 2", "color_scheme": "no_such_scheme"},
+            {"text": "Post 3", "dimension": "story"},
+        ])
+        assert response.status_code == 200
+        body = response.json()
+        assert (body["generated"], body["failed"]) == (2, 1)
+        assert [f["index"] for f in body["files"]] == [0, 1, 2]
+        assert [f["status"] for f in body["files"]] == ["success", "error", "success"]
+        assert "no_such_scheme" in body["files"][1]["error"]
+        
+        # Results are downloaded over HTTP, not read from server paths
+        for result in (body["files"][0], body["files"][2]):
+            assert "path" not in result
+            image = client.get(result["url"])
+            assert image.status_code == 200
+            assert image.headers["content-type"] == "image/png"
+            assert image.content.startswith(b"\x89PNG")
+
+
+
+def test_batch_smart_lists_errors_in_post_order():
+    with TestClient(app) as client:
+        response = client.post("/generate/batch-smart", json={
+            "texts": [f"Post {i}" for i in range(1, 13)],
+            "design": {"text": "", "color_scheme": "no_such_scheme"},
+        })
+        assert response.status_code == 200
+        archive = zipfile.ZipFile(io.BytesIO(response.content))
+        assert archive.namelist() == ["errors.txt"]
+        lines = archive.read("errors.txt").decode().splitlines()
+        # post_10 sorts after post_9, not after post_1
+        assert [line.split(":")[0] for line in lines] == [f"post_{i}.png" for i in range(1, 13)]
+
+
+if __name__ == "__main__":
+    test_pool_map_keeps_order_and_reports_item_errors()
+    test_pool_imap_unordered_yields_every_item()
+    test_stream_zip_is_a_valid_archive()
+    test_generate_batch_returns_artifacts()
+    test_batch_smart_lists_errors_in_post_order()
+    print("✓ Render service tests passed")
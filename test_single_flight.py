@@ -0,0 +1,84 @@
+"""
+Single-flight coalescing tests
+
+Checks that concurrent calls with one key share a single computation and
+its result or exception, that different keys and later calls run on
+their own, and that one waiter going away does not cancel the others.
+
+Run with:
+    python -m pytest test_single_flight.py
+    python test_single_flight.py
+"""
+
+import asyncio
+
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return object()
+        
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+        assert len(calls) == 1
+        assert all(result is results[0] for result in results)
+        assert flight.in_flight == 0
+        
+        # Once finished, the key is forgotten: a later call runs again
+        await flight.do("key", work)
+        assert len(calls) == 2
+        
+        # Different keys do not share
+        await asyncio.gather(flight.do("a", work), flight.do("b", work))
+        assert len(calls) == 4
+    
+    asyncio.run(scenario())
+
+
+def test_exception_reaches_every_waiter():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+        
+        async def fail():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            raise ValueError("upstream failed")
+        
+        outcomes = await asyncio.gather(*(flight.do("key", fail) for _ in range(5)), return_exceptions=True)
+        assert len(calls) == 1
+        assert all(isinstance(outcome, ValueError) and str(outcome) == "upstream failed" for outcome in outcomes)
+        assert flight.in_flight == 0
+    
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_does_not_cancel_the_work():
+    async def scenario():
+        flight = SingleFlight()
+        
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+        
+        first = asyncio.ensure_future(flight.do("key", work))
+        second = asyncio.ensure_future(flight.do("key", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await second == "done"
+        assert first.cancelled()
+    
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_computation()
+    test_exception_reaches_every_waiter()
+    test_cancelled_waiter_does_not_cancel_the_work()
+    print("✓ Single-flight tests passed")
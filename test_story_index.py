@@ -0,0 +1,142 @@
+"""
+Near-duplicate story clustering tests
+
+Checks title normalization, the similarity threshold, the time window and
+the size bound of StoryIndex, and how get_articles_for_posts uses it. No
+internet access is needed.
+
+Run with:
+    python -m pytest test_story_index.py
+    python test_story_index.py
+"""
+
+import time
+
+from news_fetcher import NewsFetcher
+from story_index import StoryIndex, article_fingerprints, title_shingles
+
+
+def article(title: str, url: str, publisher: str = "Daily Post") -> dict:
+    return {"title": title, "url": url, "publisher": publisher}
+
+
+def test_publisher_suffix_and_stopwords_stripped():
+    assert title_shingles("Mayor opens the new bridge - Daily Post", "Daily Post") == {"mayor", "opens", "bridge"}
+    # Only the article's own publisher suffix is removed
+    assert "herald" in title_shingles("Mayor opens bridge - Herald", "Daily Post")
+    assert article_fingerprints(article("Mayor opens bridge - Daily Post", "https://a.example/1/")) == [
+        "url:https://a.example/1", "title:bridge mayor opens"
+    ]
+    
+    index = StoryIndex()
+    story, is_new = index.add(article("Mayor opens bridge - Daily Post", "https://a.example/1"))
+    assert is_new
+    # Same headline from another publisher, under another URL
+    assert index.add(article("Mayor Opens Bridge - Herald", "https://b.example/2", "Herald")) == (story, False)
+
+
+def test_threshold_boundary():
+    first = article("Mayor opens bridge", "https://a.example/1")
+    second = article("Mayor opens tunnel", "https://b.example/2")  # Jaccard 2/4 = 0.5
+    
+    index = StoryIndex(threshold=0.5)
+    story, _ = index.add(first)
+    assert index.add(second) == (story, False)
+    
+    index = StoryIndex(threshold=0.51)
+    index.add(first)
+    assert index.add(second)[1]
+    assert len(index) == 2
+
+
+def test_same_url_is_one_story():
+    index = StoryIndex()
+    story, _ = index.add(article("Mayor opens bridge", "https://a.example/1"))
+    assert index.add(article("Completely different headline", "https://A.example/1/")) == (story, False)
+
+
+def test_window_expiry():
+    index = StoryIndex(window=0.4)
+    first = article("Mayor opens bridge", "https://a.example/1")
+    story, _ = index.add(first)
+    
+    # Seeing the story again keeps it alive
+    time.sleep(0.25)
+    assert index.add(article("Mayor opens bridge - Herald", "https://b.example/2", "Herald")) == (story, False)
+    time.sleep(0.25)
+    assert index.add(first) == (story, False)
+    
+    # Unseen for longer than the window, it is forgotten
+    time.sleep(0.5)
+    new_story, is_new = index.add(first)
+    assert is_new and new_story != story
+    assert len(index) == 1
+
+
+def test_size_bound_evicts_least_recently_seen():
+    index = StoryIndex(max_stories=2)
+    bridge = article("Mayor opens bridge", "https://a.example/1")
+    index.add(bridge)
+    index.add(article("Storm floods harbour", "https://a.example/2"))
+    index.add(bridge)  # Now the most recently seen
+    index.add(article("Council approves budget", "https://a.example/3"))
+    
+    assert len(index) == 2
+    assert not index.add(bridge)[1]
+    assert index.add(article("Storm floods harbour", "https://a.example/2"))[1]
+
+
+def test_get_articles_for_posts_dedupes_per_call():
+    raw = [
+        {"title": "Mayor opens bridge - Daily Post", "url": "https://a.example/1",
+         "publisher": {"title": "Daily Post"}},
+        {"title": "Mayor opens new bridge - Herald", "url": "https://b.example/2",
+         "publisher": {"title": "Herald"}},
+        {"title": "Storm floods harbour - Herald", "url": "https://b.example/3",
+         "publisher": {"title": "Herald"}},
+    ]
+    fetcher = NewsFetcher()
+    fetcher.get_top_news = lambda: raw
+    
+    first = fetcher.get_articles_for_posts(limit=5, dedupe=True)
+    assert [a["url"] for a in first] == ["https://a.example/1", "https://b.example/3"]
+    # Unrelated calls do not hide each other's stories
+    assert fetcher.get_articles_for_posts(limit=5, dedupe=True) == first
+    
+    # A shared index remembers stories across calls
+    shared = StoryIndex()
+    assert fetcher.get_articles_for_posts(limit=5, dedupe=True, story_index=shared) == first
+    assert fetcher.get_articles_for_posts(limit=5, dedupe=True, story_index=shared) == []
+
+
+
+def test_get_articles_for_posts_with_fetched_articles():
+    raw = [
+        {"title": "Mayor opens bridge - Daily Post", "url": "https://a.example/1", "publisher": "Daily Post"},
+        {"title": "Mayor opens new bridge - Herald", "url": "https://b.example/2", "publisher": "Herald"},
+        {"title": "Storm floods harbour - Herald", "url": "https://b.example/3", "publisher": "Herald"},
+        {"title": "Council approves budget - Herald", "url": "https://b.example/4", "publisher": "Herald"},
+    ]
+    fetcher = NewsFetcher()
+    fetcher.get_top_news = lambda: []  # Never queried when articles are given
+    
+    stories, dropped = StoryIndex(), []
+    picked = fetcher.get_articles_for_posts(limit=1, dedupe=True, story_index=stories,
+                                            articles=raw, dropped=dropped)
+    assert [a["url"] for a in picked] == ["https://a.example/1"]
+    assert [a["url"] for a in dropped] == ["https://b.example/2"]
+    
+    # Stories with no room in the first call can still come from the next
+    picked = fetcher.get_articles_for_posts(limit=None, dedupe=True, story_index=stories, articles=raw)
+    assert [a["url"] for a in picked] == ["https://b.example/3", "https://b.example/4"]
+
+
+if __name__ == "__main__":
+    test_publisher_suffix_and_stopwords_stripped()
+    test_threshold_boundary()
+    test_same_url_is_one_story()
+    test_window_expiry()
+    test_size_bound_evicts_least_recently_seen()
+    test_get_articles_for_posts_dedupes_per_call()
+    test_get_articles_for_posts_with_fetched_articles()
+    print("✓ Story index tests passed")
@@ -0,0 +1,126 @@
+"""
+Template registry tests
+
+Works on a temporary template directory: templates are served from memory,
+picked up again when their file's modification time changes, and skipped
+while invalid. Pre-rendered backgrounds are stored per template version and
+reused across registries. No internet access is needed.
+
+Run with:
+    python -m pytest test_template_registry.py
+    python test_template_registry.py
+"""
+
+import glob
+import json
+import os
+import tempfile
+
+from post_generator.template_loader import PostTemplate, TemplateRegistry
+
+
+def write_template(template_dir: str, template: PostTemplate, mtime: float):
+    path = os.path.join(template_dir, f"{template.name}.json")
+    with open(path, "w") as f:
+        json.dump(template.to_dict(), f)
+    os.utime(path, (mtime, mtime))
+
+
+def make_template(**settings) -> PostTemplate:
+    fields = dict(name="news", dimension="square", background_type="gradient", color_scheme="bold_red")
+    fields.update(settings)
+    return PostTemplate(**fields)
+
+
+def test_reloads_changed_files():
+    with tempfile.TemporaryDirectory() as template_dir:
+        write_template(template_dir, make_template(headline_size=70), mtime=1000)
+        registry = TemplateRegistry(template_dir, reload_interval=0)
+        first = registry.get("news")
+        assert first.headline_size == 70
+        assert registry.get("news") is first  # Served from memory
+        
+        write_template(template_dir, make_template(headline_size=90), mtime=2000)
+        assert registry.get("news").headline_size == 90
+        assert registry.mtime("news") == 2000
+        
+        os.remove(os.path.join(template_dir, "news.json"))
+        assert registry.names() == []
+        try:
+            registry.get("news")
+        except FileNotFoundError:
+            pass
+        else:
+            raise AssertionError("expected FileNotFoundError")
+
+
+def test_invalid_templates_are_skipped():
+    with tempfile.TemporaryDirectory() as template_dir:
+        write_template(template_dir, make_template(name="good"), mtime=1000)
+        write_template(template_dir, make_template(name="bad", color_scheme="no_such_scheme"), mtime=1000)
+        registry = TemplateRegistry(template_dir, reload_interval=0)
+        assert registry.names() == ["good"]
+        
+        # Fixing the file brings it back
+        write_template(template_dir, make_template(name="bad"), mtime=2000)
+        assert registry.names() == ["bad", "good"]
+
+
+def test_reload_interval():
+    with tempfile.TemporaryDirectory() as template_dir:
+        write_template(template_dir, make_template(headline_size=70), mtime=1000)
+        registry = TemplateRegistry(template_dir, reload_interval=3600)
+        assert registry.get("news").headline_size == 70
+        
+        write_template(template_dir, make_template(headline_size=90), mtime=2000)
+        assert registry.get("news").headline_size == 70  # Not re-checked yet
+        registry.invalidate()
+        assert registry.get("news").headline_size == 90
+
+
+def test_background_key_follows_settings_and_scale():
+    template = make_template()
+    key = template.background_key()
+    assert make_template().background_key() == key
+    assert make_template(gradient_direction="horizontal").background_key() != key
+    assert make_template(add_noise=True).background_key() != key
+    assert template.background_key(0.5) != key
+    # Text settings are part of the template, so they version it too
+    assert make_template(headline_size=90).background_key() != key
+
+
+def test_background_assets_are_versioned_and_reused():
+    with tempfile.TemporaryDirectory() as template_dir:
+        write_template(template_dir, make_template(), mtime=1000)
+        registry = TemplateRegistry(template_dir, reload_interval=0)
+        background = registry.get_background("news")
+        assert registry.get_background("news") is background  # Served from memory
+        
+        key = make_template().background_key()
+        assets = glob.glob(os.path.join(template_dir, "news.bg-*.png"))
+        assert assets == [os.path.join(template_dir, f"news.bg-1x-{key}.png")]
+        
+        # A new registry reads the stored asset instead of rendering
+        def no_render(*args):
+            raise AssertionError("rendered again")
+        
+        reloaded = TemplateRegistry(template_dir, reload_interval=0)
+        reloaded._render_layer = no_render
+        assert reloaded.get_background("news").tobytes() == background.tobytes()
+        
+        # Editing the template renders a new version and removes the old one
+        write_template(template_dir, make_template(gradient_direction="horizontal"), mtime=2000)
+        changed = registry.get_background("news")
+        assert changed.tobytes() != background.tobytes()
+        new_key = make_template(gradient_direction="horizontal").background_key()
+        assets = glob.glob(os.path.join(template_dir, "news.bg-*.png"))
+        assert assets == [os.path.join(template_dir, f"news.bg-1x-{new_key}.png")]
+
+
+if __name__ == "__main__":
+    test_reloads_changed_files()
+    test_invalid_templates_are_skipped()
+    test_reload_interval()
+    test_background_key_follows_settings_and_scale()
+    test_background_assets_are_versioned_and_reused()
+    print("✓ Template registry tests passed")
@@ -0,0 +1,157 @@
+"""
+Startup Warmup for Post Generator API
+Loads fonts, templates and encoders before the API reports itself ready
+"""
+
+import asyncio
+import importlib
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+from post_generator import PostGenerator
+from post_generator.color_schemes import ColorSchemes
+from post_generator.template_loader import get_template_registry
+from render_cache import get_render_cache
+from render_service import get_batch_pool, get_render_pool, warm_worker
+
+
+# Warmup configuration
+WARMUP_ENABLED = os.getenv("WARMUP", "1") != "0"
+# Comma-separated templates whose backgrounds are pre-rendered ("*" for all)
+WARMUP_TEMPLATES = os.getenv("WARMUP_TEMPLATES", "*")
+# Also start and warm the batch pool workers
+WARMUP_BATCH_POOL = os.getenv("WARMUP_BATCH_POOL", "1") != "0"
+# Import the news stack (gnews, feedparser, bs4) ahead of the first news request
+WARMUP_NEWS = os.getenv("WARMUP_NEWS", "1") != "0"
+
+
+class Warmup:
+    """
+    Runs the warmup steps once and tracks readiness
+    
+    Every step runs off the event loop. A failing step is recorded and
+    skipped; the API still becomes ready, just with that part cold.
+    """
+    
+    def __init__(self, enabled: bool = WARMUP_ENABLED,
+                 templates: str = WARMUP_TEMPLATES,
+                 batch_pool: bool = WARMUP_BATCH_POOL,
+                 news: bool = WARMUP_NEWS):
+        self.enabled = enabled
+        self.templates = templates
+        self.batch_pool = batch_pool
+        self.news = news
+        self.status = "pending"  # "pending", "warming", "ready"
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        if not enabled:
+            self.status = "ready"
+    
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+    
+    def start(self, news: bool = True) -> Optional[asyncio.Task]:
+        """
+        Start warming up in the background on the running event loop
+        
+        Args:
+            news: Whether the news endpoints are served (skips the news step if not)
+        """
+        self.news = self.news and news
+        if self.enabled and self._task is None:
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+    
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+    
+    async def run(self):
+        """Run every warmup step in order"""
+        self.status = "warming"
+        self.started_at = time.time()
+        
+        await self._step("fonts", lambda: get_render_pool().run(warm_worker))
+        await self._step("color_schemes", self._offload(
+            lambda: {"color_schemes": len(ColorSchemes.get_all_schemes())}
+        ))
+        await self._step("templates", self._offload(self._warm_templates))
+        await self._step("render_cache", self._offload(get_render_cache))
+        await self._step("encoders", self._offload(self._warm_encoders))
+        if self.batch_pool:
+            await self._step("batch_pool", self._warm_batch_pool)
+        if self.news:
+            await self._step("news", self._offload(lambda: importlib.import_module("gnews")))
+        
+        self.finished_at = time.time()
+        self.status = "ready"
+    
+    async def _step(self, name: str, func: Callable):
+        start = time.perf_counter()
+        try:
+            result = await func()
+            self.steps[name] = {"status": "ok"}
+            if isinstance(result, dict):
+                self.steps[name].update(result)
+        except Exception as e:
+            print(f"Warning: Warmup step '{name}' failed. Error: {e}")
+            self.steps[name] = {"status": "error", "error": str(e)}
+        self.steps[name]["ms"] = round((time.perf_counter() - start) * 1000, 1)
+    
+    @staticmethod
+    def _offload(func: Callable) -> Callable:
+        return lambda: asyncio.get_running_loop().run_in_executor(None, func)
+    
+    def _warm_templates(self) -> Dict[str, Any]:
+        """Parse all templates and pre-render the configured backgrounds"""
+        registry = get_template_registry()
+        names = registry.names()
+        if self.templates.strip() != "*":
+            wanted = [name.strip() for name in self.templates.split(",") if name.strip()]
+            names = [name for name in wanted if name in names]
+        
+        for name in names:
+            registry.get_background(name)
+        return {"templates": len(registry.names()), "backgrounds": names}
+    
+    @staticmethod
+    def _warm_encoders():
+        """Draw and encode a small post once in each output format"""
+        scheme = ColorSchemes.get_scheme("professional_blue")
+        generator = PostGenerator(draft=True).create_canvas("square", scheme.get_background_rgb())
+        generator.apply_gradient(scheme.get_primary_rgb(), scheme.get_secondary_rgb())
+        generator.add_text("Warmup", position=(40, 400), color=scheme.get_text_rgb())
+        for format in ("PNG", "JPEG"):
+            generator.to_bytes(format)
+    
+    async def _warm_batch_pool(self) -> Dict[str, Any]:
+        """Start every batch worker (each one loads fonts as it starts)"""
+        pool = get_batch_pool()
+        await pool.map(warm_worker, [()] * pool.workers)
+        return {"workers": pool.workers, "kind": pool.kind}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Readiness and per-step timings"""
+        return {
+            "status": self.status,
+            "ready": self.ready,
+            "enabled": self.enabled,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "steps": self.steps,
+        }
+
+
+_warmup: Optional[Warmup] = None
+
+
+def get_warmup() -> Warmup:
+    """Get the process-wide warmup state"""
+    global _warmup
+    if _warmup is None:
+        _warmup = Warmup()
+    return _warmup